@@ -0,0 +1,114 @@
+# benchmarks/bench_analytics.py - Vectorized analytics (utils.analytics) vs. the ORM list-comprehension approach
+#
+# Generates an org with utils.synthetic, then answers the same questions
+# both ways: per-department average check-in, late rate, average and p90
+# hours, total overtime, and the overtime p90. The ORM side loads
+# Attendance objects and aggregates in Python, like reports() and
+# calculate_productivity() do. Results are compared before timings print.
+#
+#   python benchmarks/bench_analytics.py --employees 500 --years 1 --runs 3
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def orm_department_stats(start, end):
+    from models import User, Attendance
+    import numpy as np
+
+    users = {user.id: user.department for user in User.query.all()}
+    records = Attendance.query.filter(Attendance.date >= start, Attendance.date <= end).all()
+    by_dept = defaultdict(list)
+    for att in records:
+        by_dept[users.get(att.user_id) or 'General'].append(att)
+
+    result = {}
+    for dept, rows in by_dept.items():
+        present = [att for att in rows if att.status == 'present']
+        late = len([att for att in present if att.is_late])
+        check_ins = [att.check_in.hour * 3600 + att.check_in.minute * 60 + att.check_in.second
+                     for att in rows if att.check_in]
+        hours = [att.total_hours for att in rows if att.total_hours and att.total_hours > 0]
+        result[dept] = {
+            'late_rate': round(late / len(present) * 100, 1) if present else None,
+            'avg_check_in': sum(check_ins) / len(check_ins) if check_ins else None,
+            'avg_hours': round(sum(hours) / len(hours), 2) if hours else None,
+            'p90_hours': round(float(np.percentile(hours, 90)), 2) if hours else None,
+            'total_overtime': round(sum(att.overtime_hours or 0 for att in rows), 2),
+        }
+    overtime = [att.overtime_hours for att in records if att.overtime_hours and att.overtime_hours > 0]
+    return result, (round(float(np.percentile(overtime, 90)), 2) if overtime else None)
+
+
+def vectorized_department_stats(start, end):
+    from utils.analytics import AttendanceFrame
+
+    frame = AttendanceFrame.load(start, end)
+    departments = {row['department']: row for row in frame.by_department()}
+    return departments, frame.overtime_distribution()['percentiles']['p90']
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analytics benchmark')
+    parser.add_argument('--employees', type=int, default=500)
+    parser.add_argument('--years', type=float, default=1.0)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_analytics_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'analytics.db')}"
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    from app import create_app, init_db
+    from extensions import db
+    from utils.synthetic import generate_org
+
+    app = create_app({'LOG_TO_FILE': False, 'METRICS_ENABLED': False, 'SLOW_QUERY_MS': 0})
+    init_db(app)
+    end = date.today() - timedelta(days=1)
+    start = end - timedelta(days=int(args.years * 365))
+    with app.app_context():
+        counts = generate_org(args.employees, args.years, end=end, password_hash='x')
+        print(f"{counts['attendance']:,} attendance rows, {args.employees} employees")
+
+        (orm, orm_p90), orm_seconds = timed(lambda: orm_department_stats(start, end), args.runs)
+        db.session.expire_all()
+        (vec, vec_p90), vec_seconds = timed(lambda: vectorized_department_stats(start, end), args.runs)
+
+        # Hours are float32 in the frame, so allow a rounding step on 2-decimal values
+        close = lambda a, b, tolerance=0.011: a == b or (a is not None and b is not None and abs(a - b) <= tolerance)
+        assert set(orm) == set(vec), (set(orm), set(vec))
+        assert close(orm_p90, vec_p90), (orm_p90, vec_p90)
+        for dept, expected in orm.items():
+            got = vec[dept]
+            assert got['late_rate'] == expected['late_rate'], (dept, got, expected)
+            assert close(got['avg_hours'], expected['avg_hours']), (dept, got, expected)
+            assert close(got['p90_hours'], expected['p90_hours']), (dept, got, expected)
+            assert close(got['total_overtime'], expected['total_overtime'], 0.05), (dept, got, expected)
+            assert got['avg_check_in'] == (None if expected['avg_check_in'] is None else
+                                           '%02d:%02d' % divmod(round(expected['avg_check_in']) // 60, 60)), (dept, got, expected)
+
+    print(f"{'approach':<12} {'median s':>9}")
+    print(f"{'orm':<12} {orm_seconds:>9.3f}")
+    print(f"{'numpy':<12} {vec_seconds:>9.3f}   ({orm_seconds / vec_seconds:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
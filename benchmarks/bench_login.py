@@ -0,0 +1,125 @@
+# benchmarks/bench_login.py - Login throughput vs. hashing workers, and server responsiveness meanwhile
+#
+# Fires a shift-start login rush at /login while a probe thread keeps
+# requesting a cheap page. Runs once with verification on the request thread
+# and then with the process pool at 1..N workers, printing logins/sec, how
+# many logins were shed with 503, login latency and the probe's latency.
+# Under --gevent (the wsgi.py worker model) an in-process hash blocks every
+# greenlet, which shows up in the probe column.
+#
+#   python benchmarks/bench_login.py --logins 200 --concurrency 50 --workers 1,2,4
+#   python benchmarks/bench_login.py --gevent ...
+import sys
+
+if '--gevent' in sys.argv:
+    from gevent import monkey
+    monkey.patch_all()
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_punches import percentile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(app, args):
+    stop = threading.Event()
+    probe_latencies = []
+
+    def probe():
+        # Includes the time spent waiting to be scheduled again after the
+        # sleep, which is where a blocked hub or a busy GIL shows up
+        client = app.test_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            time.sleep(0.01)
+            client.get('/favicon.ico')
+            probe_latencies.append(time.perf_counter() - started - 0.01)
+
+    def login(i):
+        client = app.test_client()
+        started = time.perf_counter()
+        response = client.post('/login', data={'username': f'bench{i % args.users}', 'password': 'bench'})
+        return response.status_code, time.perf_counter() - started
+
+    prober = threading.Thread(target=probe, daemon=True)
+    prober.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(login, range(args.logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    prober.join()
+
+    ok = [latency for status, latency in results if status == 302]
+    shed = sum(1 for status, _ in results if status == 503)
+    return {
+        'logins_per_sec': len(ok) / elapsed,
+        'shed': shed,
+        'login_p50': statistics.median(ok) * 1000 if ok else 0,
+        'login_p95': percentile(ok, 95) * 1000 if ok else 0,
+        'probe_p95': percentile(probe_latencies, 95) * 1000 if probe_latencies else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Login throughput benchmark')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--workers', default=','.join(str(n) for n in sorted({1, max(1, (os.cpu_count() or 1) // 2), os.cpu_count() or 1})),
+                        help='comma separated pool sizes to try')
+    parser.add_argument('--max-pending', type=int, default=0, help='LOGIN_MAX_PENDING (default workers * 8)')
+    parser.add_argument('--method', default='scrypt', help='hash method stored for the bench users')
+    parser.add_argument('--gevent', action='store_true', help='run under gevent monkey patching')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_login_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    from werkzeug.security import generate_password_hash
+    from app import create_app, init_db
+    from extensions import db
+    from models import User
+    from utils.hashing import login_pool
+
+    password = generate_password_hash('bench', args.method)
+    app = create_app({'LOG_TO_FILE': False, 'METRICS_ENABLED': False, 'PASSWORD_HASH_METHOD': args.method,
+                      'LOGIN_HASH_POOL': False})
+    init_db(app)
+    with app.app_context():
+        db.session.add_all([
+            User(username=f'bench{i}', password=password, role='employee',
+                 name=f'Bench User {i}', email=f'bench{i}@example.com')
+            for i in range(args.users)
+        ])
+        db.session.commit()
+
+    print(f"cpus: {os.cpu_count()}  logins: {args.logins}  concurrency: {args.concurrency}  "
+          f"method: {args.method}  mode: {'gevent' if args.gevent else 'threading'}")
+    print(f"{'mode':<16} {'logins/s':>9} {'503s':>6} {'p50 ms':>8} {'p95 ms':>8} {'probe p95 ms':>13}")
+
+    def show(label, stats):
+        print(f"{label:<16} {stats['logins_per_sec']:>9.1f} {stats['shed']:>6} {stats['login_p50']:>8.0f} "
+              f"{stats['login_p95']:>8.0f} {stats['probe_p95']:>13.1f}")
+
+    show('request thread', run(app, args))
+
+    app.config['LOGIN_HASH_POOL'] = True
+    for workers in [int(n) for n in args.workers.split(',')]:
+        app.config['LOGIN_HASH_WORKERS'] = workers
+        login_pool.configure(workers, args.max_pending or workers * 8)
+        login_pool.warm()
+        show(f'pool x{workers}', run(app, args))
+
+
+if __name__ == '__main__':
+    main()
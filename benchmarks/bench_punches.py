@@ -0,0 +1,118 @@
+# benchmarks/bench_punches.py - Concurrent check-in throughput with a slow geocoder
+#
+# Starts a local HTTP server that imitates Nominatim with a fixed delay, points
+# the app at it and fires concurrent /mark_attendance check-ins, one logged-in
+# client per employee. Reports punches/sec, latency percentiles and how many
+# TCP connections the geocoder stub saw (keep-alive reuse).
+#
+#   python benchmarks/bench_punches.py --users 200 --concurrency 50 --delay 0.2
+#   python benchmarks/bench_punches.py --gevent ...   # green-thread worker model
+import sys
+
+if '--gevent' in sys.argv:
+    from gevent import monkey
+    monkey.patch_all()
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SlowGeocoderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    delay = 0.2
+    connections = set()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.connections.add(self.client_address)
+        time.sleep(self.delay)
+        body = json.dumps({'address': {'city': 'Bench City', 'state': 'Bench State', 'country': 'Benchland'}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent check-in throughput benchmark')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--delay', type=float, default=0.2, help='geocoder stub latency in seconds')
+    parser.add_argument('--gevent', action='store_true', help='run under gevent monkey patching')
+    args = parser.parse_args()
+
+    SlowGeocoderHandler.delay = args.delay
+    stub = ThreadingHTTPServer(('127.0.0.1', 0), SlowGeocoderHandler)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    workdir = tempfile.mkdtemp(prefix='bench_punches_')
+    os.environ['NOMINATIM_URL'] = f'http://127.0.0.1:{stub.server_port}/reverse'
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    from werkzeug.security import generate_password_hash
+    from app import create_app, init_db
+    from extensions import db
+    from models import User
+
+    app = create_app()
+    init_db(app)
+    with app.app_context():
+        password = generate_password_hash('bench', method='pbkdf2:sha256:1')
+        db.session.add_all([
+            User(username=f'bench{i}', password=password, role='employee',
+                 name=f'Bench User {i}', email=f'bench{i}@example.com')
+            for i in range(args.users)
+        ])
+        db.session.commit()
+
+    clients = []
+    for i in range(args.users):
+        client = app.test_client()
+        client.post('/login', data={'username': f'bench{i}', 'password': 'bench'})
+        clients.append(client)
+
+    def punch(client):
+        started = time.perf_counter()
+        response = client.post('/mark_attendance', json={
+            'action': 'check_in', 'latitude': '28.6139', 'longitude': '77.2090'
+        })
+        return response.status_code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(punch, clients))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for _, latency in results]
+    errors = sum(1 for status, _ in results if status != 200)
+    print(f"mode:            {'gevent' if args.gevent else 'threading'}")
+    print(f"punches:         {len(results)} ({errors} errors)")
+    print(f"throughput:      {len(results) / elapsed:.1f} punches/sec")
+    print(f"latency p50/p95: {statistics.median(latencies) * 1000:.0f} / {percentile(latencies, 95) * 1000:.0f} ms")
+    print(f"geocoder TCP connections: {len(SlowGeocoderHandler.connections)}")
+    stub.shutdown()
+
+
+if __name__ == '__main__':
+    main()
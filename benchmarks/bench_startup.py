@@ -0,0 +1,52 @@
+# benchmarks/bench_startup.py - Import time, create_app() time and first-request latency
+#
+# Each sample runs in a fresh interpreter so module caches do not hide the
+# cost a new worker or test process pays.
+#
+#   python benchmarks/bench_startup.py --runs 10
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r'''
+import json, os, sys, time
+sys.path.insert(0, sys.argv[1])
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+application = app.create_app({'SQLALCHEMY_DATABASE_URI': sys.argv[2], 'LOG_TO_FILE': False,
+                              'SOCKETIO_ASYNC_MODE': 'threading'})
+t2 = time.perf_counter()
+client = application.test_client()
+client.get('/login')
+t3 = time.perf_counter()
+client.get('/login')
+t4 = time.perf_counter()
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1, 'first_request': t3 - t2, 'second_request': t4 - t3}))
+'''
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup cost benchmark')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    samples = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for i in range(args.runs):
+            db_uri = f"sqlite:///{os.path.join(workdir, f'startup_{i}.db')}"
+            output = subprocess.run([sys.executable, '-c', PROBE, REPO_ROOT, db_uri],
+                                    cwd=workdir, capture_output=True, text=True, check=True).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    for key in ('import', 'create_app', 'first_request', 'second_request'):
+        values = [sample[key] * 1000 for sample in samples]
+        print(f"{key:<15} median {statistics.median(values):7.1f} ms   min {min(values):7.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+# benchmarks/load_test.py - Mixed-workload load test on a generated org
+#
+# Generates an org with utils.synthetic (history ending yesterday), then runs
+# four phases against the app in-process and reports throughput and
+# p50/p95/p99 latency for each:
+#
+#   checkin    morning rush, every employee POSTs /mark_attendance at once
+#   dashboard  admins refreshing /admin/dashboard, then each
+#              /admin/api/dashboard/<panel> the page fetches, reported per panel
+#   chat       employees exchanging messages over SocketIO (ack latency)
+#   reports    month attendance and leave reports (/admin/reports)
+#
+#   python benchmarks/load_test.py --employees 500 --years 1 --concurrency 50
+#   python benchmarks/load_test.py --phases checkin,chat --gevent
+import sys
+
+if '--gevent' in sys.argv:
+    from gevent import monkey
+    monkey.patch_all()
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from http.server import ThreadingHTTPServer
+
+from bench_punches import SlowGeocoderHandler, percentile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASES = ('checkin', 'dashboard', 'chat', 'reports')
+
+
+def report(name, results, elapsed):
+    latencies = [latency for _, latency in results]
+    errors = sum(1 for ok, _ in results if not ok)
+    if not latencies:
+        return
+    print(f"{name:<20} {len(results):>6} ops {errors:>4} errors {len(results) / elapsed:>8.1f} ops/s   "
+          f"p50 {percentile(latencies, 50) * 1000:7.1f}  p95 {percentile(latencies, 95) * 1000:7.1f}  "
+          f"p99 {percentile(latencies, 99) * 1000:7.1f} ms")
+
+
+def run_phase(name, work, items, concurrency):
+    def timed(item):
+        started = time.perf_counter()
+        try:
+            ok = work(item)
+        except Exception:
+            ok = False
+        return ok, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, items))
+    report(name, results, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mixed-workload load test')
+    parser.add_argument('--employees', type=int, default=500)
+    parser.add_argument('--years', type=float, default=1.0)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--phases', default=','.join(PHASES), help='comma separated subset of ' + ','.join(PHASES))
+    parser.add_argument('--dashboard-views', type=int, default=50)
+    parser.add_argument('--dashboard-cache-ttl', type=int, default=0,
+                        help='DASHBOARD_CACHE_TTL; 0 runs every panel query on every view')
+    parser.add_argument('--chatters', type=int, default=100, help='employees holding a SocketIO connection')
+    parser.add_argument('--messages', type=int, default=10, help='messages sent per chatter')
+    parser.add_argument('--reports', type=int, default=20)
+    parser.add_argument('--delay', type=float, default=0.05, help='geocoder stub latency in seconds')
+    parser.add_argument('--gevent', action='store_true', help='run under gevent monkey patching')
+    args = parser.parse_args()
+    phases = [phase for phase in args.phases.split(',') if phase]
+
+    SlowGeocoderHandler.delay = args.delay
+    stub = ThreadingHTTPServer(('127.0.0.1', 0), SlowGeocoderHandler)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    workdir = tempfile.mkdtemp(prefix='load_test_')
+    os.environ['NOMINATIM_URL'] = f'http://127.0.0.1:{stub.server_port}/reverse'
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    from werkzeug.security import generate_password_hash
+    from app import create_app, init_db, create_admin_user
+    from extensions import db, socketio
+    from models import User
+    from utils.synthetic import generate_org
+
+    app = create_app({'LOG_TO_FILE': False, 'SLOW_QUERY_MS': 0, 'DASHBOARD_CACHE_TTL': args.dashboard_cache_ttl})
+    init_db(app)
+    started = time.perf_counter()
+    with app.app_context():
+        create_admin_user()
+        counts = generate_org(args.employees, args.years, end=date.today() - timedelta(days=1),
+                              password_hash=generate_password_hash('password', method='pbkdf2:sha256:1'))
+        usernames = [name for name, in db.session.query(User.username).filter_by(role='employee', is_active=True)]
+        user_ids = [uid for uid, in db.session.query(User.id).filter_by(role='employee', is_active=True)]
+    print(f"generated {', '.join(f'{count:,} {table}' for table, count in counts.items())} "
+          f"in {time.perf_counter() - started:.1f} s")
+
+    def login(username, password='password'):
+        client = app.test_client()
+        client.post('/login', data={'username': username, 'password': password})
+        return client
+
+    admin = login('admin', 'Raushan@1234!')
+    rng = random.Random(7)
+
+    if 'checkin' in phases:
+        clients = [login(username) for username in usernames]
+        run_phase('checkin', lambda client: client.post('/mark_attendance', json={
+            'action': 'check_in', 'latitude': '28.6139', 'longitude': '77.2090'
+        }).status_code == 200, clients, args.concurrency)
+
+    if 'dashboard' in phases:
+        from utils.dashboard import PANELS
+        # The shell renders no data; each view then loads every panel from its own endpoint
+        run_phase('dashboard', lambda _: admin.get('/admin/dashboard').status_code == 200,
+                  range(args.dashboard_views), args.concurrency)
+        for panel in PANELS:
+            url = f'/admin/api/dashboard/{panel}'
+            run_phase(f'  {panel}', lambda _, url=url: admin.get(url).status_code == 200,
+                      range(args.dashboard_views), args.concurrency)
+
+    if 'chat' in phases:
+        chatters = [socketio.test_client(app, flask_test_client=login(username))
+                    for username in usernames[:args.chatters]]
+        sends = [(sio, rng.choice(user_ids)) for sio in chatters for _ in range(args.messages)]
+        rng.shuffle(sends)
+        run_phase('chat', lambda item: (item[0].emit('send_message', {
+            'receiver_id': item[1], 'message': 'load test'
+        }, callback=True) or {}).get('success', False), sends, args.concurrency)
+        for sio in chatters:
+            sio.disconnect()
+
+    if 'reports' in phases:
+        today = date.today()
+        queries = [f"/admin/reports?start_date={(today - timedelta(days=30)).isoformat()}"
+                   f"&end_date={today.isoformat()}&report_type={('attendance', 'leave')[i % 2]}"
+                   for i in range(args.reports)]
+        run_phase('reports', lambda url: admin.get(url).status_code == 200, queries, args.concurrency)
+
+    stub.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+# blueprints - One blueprint per subsystem, registered by create_app()
+
+def register_blueprints(app):
+    from blueprints.main import main_bp
+    from blueprints.auth import auth_bp
+    from blueprints.admin import admin_bp
+    from blueprints.employee import employee_bp
+    from blueprints.attendance import attendance_bp
+    from blueprints.leaves import leaves_bp
+    from blueprints.chat import chat_bp
+    from blueprints.notifications import notifications_bp
+    from blueprints.metrics import metrics_bp
+    import blueprints.sockets  # noqa: F401 - registers SocketIO handlers
+
+    for blueprint in (main_bp, auth_bp, admin_bp, employee_bp, attendance_bp,
+                      leaves_bp, chat_bp, notifications_bp, metrics_bp):
+        app.register_blueprint(blueprint)
@@ -0,0 +1,530 @@
+# blueprints/admin.py - Admin dashboard, user management, reports, analytics, map data and geofences
+import io
+import json
+from flask import Blueprint, Response, current_app, render_template, redirect, url_for, request, session, flash, jsonify, stream_with_context
+from sqlalchemy.orm import joinedload
+from werkzeug.security import generate_password_hash
+from datetime import datetime, date, timedelta
+from extensions import db
+from models import User, Attendance, Leave, Notification, Geofence
+from helpers import login_required, admin_required
+from realtime import send_notification
+from utils.geolocation import geocoder
+from instrumentation import slow_queries
+from utils.provisioning import provision_users
+from utils.analytics import attendance_analytics
+from utils.shifts import recompute_attendance
+from utils.leave_stats import DIMENSIONS, leave_cube, month_range
+from utils.location_map import geojson_chunks, location_features, parse_bbox
+from utils.geofence import invalidate_geofences, parse_polygon, reclassify_attendance
+from utils.dashboard import PANELS as DASHBOARD_PANELS, panel_data
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/admin/dashboard')
+@login_required
+@admin_required
+def admin_dashboard():
+    """The page shell; its cards and charts fetch their panels from /admin/api/dashboard/<name> in parallel"""
+    user = db.session.get(User, session['user_id'])
+    unread_notifications = Notification.query.filter_by(
+        user_id=user.id, is_read=False
+    ).order_by(Notification.created_at.desc()).limit(5).all()
+    return render_template('admin_dashboard.html',
+                         panel_urls={name: url_for(f'admin.dashboard_{name}') for name in DASHBOARD_PANELS},
+                         unread_notifications=unread_notifications,
+                         today=date.today())
+
+def _dashboard_panel(name):
+    def view():
+        response = jsonify({'success': True, **panel_data(name)})
+        # Revalidated on every load, since a copy the browser kept could predate
+        # a delta it missed; an unchanged panel answers 304
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.add_etag()
+        return response.make_conditional(request)
+    view.__doc__ = DASHBOARD_PANELS[name].__doc__
+    return view
+
+# One endpoint per panel (admin.dashboard_<name>), so each is cached and timed on its own
+for _name in DASHBOARD_PANELS:
+    admin_bp.add_url_rule(f'/admin/api/dashboard/{_name}', f'dashboard_{_name}',
+                          login_required(admin_required(_dashboard_panel(_name))))
+
+@admin_bp.route('/admin/users', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def users_management():
+    if request.method == 'POST':
+        name = request.form['name'].strip()
+        username = request.form['username'].strip()
+        password = request.form['password']
+        email = request.form['email'].strip()
+        phone = request.form.get('phone','').strip()
+        role = request.form.get('role', 'employee')
+        gender = request.form.get('gender', 'Other')
+        dob = request.form.get('date_of_birth')
+        week_off = request.form.get('week_off', 'Sunday')
+        department = request.form.get('department', 'General')
+        designation = request.form.get('designation', 'Employee')
+        login_time = request.form.get('login_time', '09:00')
+        logout_time = request.form.get('logout_time', '19:00')
+        
+        date_of_birth = datetime.strptime(dob, '%Y-%m-%d').date() if dob else None
+        login_time_obj = datetime.strptime(login_time, '%H:%M').time()
+        logout_time_obj = datetime.strptime(logout_time, '%H:%M').time()
+        
+        if User.query.filter((User.username==username)|(User.email==email)).first():
+            flash('Username or email already exists', 'danger')
+        else:
+            hashed = generate_password_hash(password, current_app.config['PASSWORD_HASH_METHOD'])
+            new_user = User(
+                username=username, 
+                password=hashed, 
+                role=role, 
+                name=name, 
+                email=email, 
+                phone=phone,
+                gender=gender,
+                date_of_birth=date_of_birth,
+                week_off=week_off,
+                department=department,
+                designation=designation,
+                login_time=login_time_obj,
+                logout_time=logout_time_obj
+            )
+            db.session.add(new_user)
+            db.session.commit()
+            
+            send_notification(new_user.id, "Welcome!", f"Welcome to AttendancePro, {name}!", 'welcome', 'high')
+            
+            current_app.logger.info(f"New user created: {username} by {session['user_name']}")
+            flash(f'{role.capitalize()} user added successfully', 'success')
+            return redirect(url_for('admin.users_management'))
+    
+    all_users = User.query.order_by(User.is_active.desc(), User.name.asc()).all()
+    
+    # Get unread notifications for dropdown
+    user = db.session.get(User, session['user_id'])
+    unread_notifications = Notification.query.filter_by(
+        user_id=user.id, is_read=False
+    ).order_by(Notification.created_at.desc()).limit(5).all()
+    
+    return render_template('users_management.html', users=all_users, unread_notifications=unread_notifications)
+
+@admin_bp.route('/admin/users/import', methods=['POST'])
+@login_required
+@admin_required
+def import_users():
+    """Bulk provisioning from a CSV upload with the Add User form fields as columns"""
+    wants_json = request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        if wants_json:
+            return jsonify({'success': False, 'message': 'No CSV file uploaded'}), 400
+        flash('Choose a CSV file to import', 'danger')
+        return redirect(url_for('admin.users_management'))
+    
+    summary = provision_users(io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline=''))
+    current_app.logger.info(f"Bulk provisioning by {session['user_name']}: {summary['created']} created, "
+                            f"{summary['skipped']} skipped, {summary['rejected']} rejected")
+    
+    if wants_json:
+        return jsonify({'success': True, **summary})
+    flash(f"{summary['created']} users created, {summary['skipped']} skipped, {summary['rejected']} rejected",
+          'success' if summary['created'] else 'warning')
+    for message in summary['errors'][:10]:
+        flash(message, 'warning')
+    return redirect(url_for('admin.users_management'))
+
+@admin_bp.route('/admin/user/<int:user_id>/edit', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def edit_user(user_id):
+    edit_user = db.session.get(User, user_id)
+    if not edit_user:
+        flash('User not found', 'danger')
+        return redirect(url_for('admin.users_management'))
+    
+    if request.method == 'POST':
+        old_shift = (edit_user.login_time, edit_user.logout_time)
+        edit_user.name = request.form['name'].strip()
+        edit_user.email = request.form['email'].strip()
+        edit_user.phone = request.form.get('phone','').strip()
+        edit_user.gender = request.form.get('gender', 'Other')
+        edit_user.role = request.form.get('role', 'employee')
+        edit_user.week_off = request.form.get('week_off', 'Sunday')
+        edit_user.department = request.form.get('department', 'General')
+        edit_user.designation = request.form.get('designation', 'Employee')
+        edit_user.current_status = request.form.get('current_status', 'Available')
+        
+        # Update login/logout times
+        login_time = request.form.get('login_time')
+        logout_time = request.form.get('logout_time')
+        if login_time:
+            edit_user.login_time = datetime.strptime(login_time, '%H:%M').time()
+        if logout_time:
+            edit_user.logout_time = datetime.strptime(logout_time, '%H:%M').time()
+        
+        dob = request.form.get('date_of_birth')
+        if dob:
+            edit_user.date_of_birth = datetime.strptime(dob, '%Y-%m-%d').date()
+        
+        new_password = request.form.get('new_password')
+        if new_password:
+            edit_user.password = generate_password_hash(new_password, current_app.config['PASSWORD_HASH_METHOD'])
+        
+        db.session.commit()
+        current_app.logger.info(f"User {edit_user.username} updated by {session['user_name']}")
+        
+        # Lateness and overtime of recent days follow the new shift
+        if (edit_user.login_time, edit_user.logout_time) != old_shift:
+            since = date.today() - timedelta(days=current_app.config['SHIFT_RECOMPUTE_DAYS'])
+            result = recompute_attendance(user_ids=[edit_user.id], start=since)
+            current_app.logger.info(f"Shift change for {edit_user.username}: "
+                                    f"{result['updated']} of {result['scanned']} attendance records recomputed")
+        flash('User updated successfully', 'success')
+        return redirect(url_for('admin.users_management'))
+    
+    # Get unread notifications for dropdown
+    user = db.session.get(User, session['user_id'])
+    unread_notifications = Notification.query.filter_by(
+        user_id=user.id, is_read=False
+    ).order_by(Notification.created_at.desc()).limit(5).all()
+    
+    return render_template('edit_user.html', edit_user=edit_user, unread_notifications=unread_notifications)
+
+@admin_bp.route('/admin/user/<int:user_id>/toggle_status')
+@login_required
+@admin_required
+def toggle_user_status(user_id):
+    user = db.session.get(User, user_id)
+    if not user:
+        flash('User not found', 'danger')
+        return redirect(url_for('admin.users_management'))
+        
+    user.is_active = not user.is_active
+    db.session.commit()
+    
+    status = "activated" if user.is_active else "deactivated"
+    current_app.logger.info(f"User {user.username} {status} by {session['user_name']}")
+    flash(f'User {status} successfully', 'success')
+    return redirect(url_for('admin.users_management'))
+
+@admin_bp.route('/admin/reports')
+@login_required
+@admin_required
+def reports():
+    start = request.args.get('start_date')
+    end = request.args.get('end_date')
+    employee_id = request.args.get('employee_id')
+    report_type = request.args.get('report_type', 'attendance')
+    site_status = request.args.get('site_status', '')
+    site_id = request.args.get('site_id', '')
+    
+    if start and end:
+        start_date = datetime.strptime(start, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end, '%Y-%m-%d').date()
+    else:
+        today = date.today()
+        start_date = today.replace(day=1)
+        end_date = today
+    
+    if report_type == 'attendance':
+        query = Attendance.query.filter(Attendance.date >= start_date, Attendance.date <= end_date)
+        
+        if employee_id and employee_id != 'all':
+            query = query.filter(Attendance.user_id == employee_id)
+        # Geofence classification; site_id is the site the check-in was at, or nearest to
+        if site_status == 'on':
+            query = query.filter(Attendance.on_site == True)
+        elif site_status == 'off':
+            query = query.filter(Attendance.on_site == False)
+        elif site_status == 'unknown':
+            query = query.filter(Attendance.on_site.is_(None))
+        if site_id.isdigit():
+            query = query.filter(Attendance.site_id == int(site_id))
+        
+        report_data = query.order_by(Attendance.date.desc()).all()
+        
+        total_days = (end_date - start_date).days + 1
+        present_days = len([att for att in report_data if att.status == 'present'])
+        absent_days = len([att for att in report_data if att.status == 'absent'])
+        half_days = len([att for att in report_data if att.status == 'half-day'])
+        late_days = len([att for att in report_data if att.is_late])
+        on_site_days = len([att for att in report_data if att.on_site])
+        off_site_days = len([att for att in report_data if att.on_site is False])
+        total_overtime = sum([att.overtime_hours for att in report_data if att.overtime_hours])
+        attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
+        
+        analytics = {
+            'total_days': total_days,
+            'present_days': present_days,
+            'absent_days': absent_days,
+            'half_days': half_days,
+            'late_days': late_days,
+            'on_site_days': on_site_days,
+            'off_site_days': off_site_days,
+            'total_overtime': round(total_overtime, 2),
+            'attendance_percentage': round(attendance_percentage, 2)
+        }
+    else:
+        query = Leave.query.filter(Leave.applied_date >= start_date, Leave.applied_date <= end_date)
+        
+        if employee_id and employee_id != 'all':
+            query = query.filter(Leave.user_id == employee_id)
+        
+        report_data = query.order_by(Leave.applied_date.desc()).all()
+        
+        approved_leaves = len([leave for leave in report_data if leave.status == 'approved'])
+        pending_leaves = len([leave for leave in report_data if leave.status == 'pending'])
+        rejected_leaves = len([leave for leave in report_data if leave.status == 'rejected'])
+        
+        analytics = {
+            'approved_leaves': approved_leaves,
+            'pending_leaves': pending_leaves,
+            'rejected_leaves': rejected_leaves,
+            'total_leaves': len(report_data),
+            'total_leave_days': sum((leave.end_date - leave.start_date).days + 1 for leave in report_data)
+        }
+    
+    employees = User.query.filter_by(role='employee', is_active=True).all()
+    sites = Geofence.query.order_by(Geofence.name).all() if report_type == 'attendance' else []
+    
+    leave_departments = []
+    if report_type != 'attendance':
+        # Approved leave days per department in the months of the range, from the leave cube
+        headcount = {}
+        for employee in employees:
+            headcount[employee.department or 'General'] = headcount.get(employee.department or 'General', 0) + 1
+        days = leave_cube().rollup('department', status='approved', month=month_range(start_date, end_date))
+        for dept in sorted(set(headcount) | set(days)):
+            leave_days = days.get(dept, {'days': 0})['days']
+            leave_departments.append({'department': dept, 'employees': headcount.get(dept, 0), 'days': leave_days,
+                                      'per_employee': leave_days / headcount[dept] if headcount.get(dept) else 0})
+    
+    # Get unread notifications for dropdown
+    user = db.session.get(User, session['user_id'])
+    unread_notifications = Notification.query.filter_by(
+        user_id=user.id, is_read=False
+    ).order_by(Notification.created_at.desc()).limit(5).all()
+    
+    return render_template('reports.html', 
+                         report_data=report_data,
+                         start_date=start_date,
+                         end_date=end_date,
+                         employees=employees,
+                         selected_employee=employee_id,
+                         report_type=report_type,
+                         sites=sites,
+                         site_names={site.id: site.name for site in sites},
+                         site_status=site_status,
+                         selected_site=site_id,
+                         analytics=analytics,
+                         leave_departments=leave_departments,
+                         unread_notifications=unread_notifications)
+
+@admin_bp.route('/admin/api/leave_stats')
+@login_required
+@admin_required
+def leave_stats_api():
+    """
+    Leave counts and days from the cached cube, grouped by `group` (comma
+    separated: leave_type, status, month, department) and filtered by any
+    of those dimensions plus a start_month/end_month (YYYY-MM) range. By
+    month, count is the leaves starting in it and days the leave days
+    falling in it.
+    """
+    group = [dimension for dimension in request.args.get('group', 'month').split(',') if dimension]
+    if not group or any(dimension not in DIMENSIONS for dimension in group):
+        return jsonify({'success': False, 'message': f"group must be made of {', '.join(DIMENSIONS)}"}), 400
+    filters = {dimension: request.args[dimension] for dimension in DIMENSIONS if request.args.get(dimension)}
+    try:
+        start_month = datetime.strptime(request.args['start_month'], '%Y-%m').date() \
+            if request.args.get('start_month') else None
+        end_month = datetime.strptime(request.args['end_month'], '%Y-%m').date() \
+            if request.args.get('end_month') else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid month'}), 400
+    
+    cube = leave_cube()
+    if start_month or end_month:
+        months = cube.values('month')
+        first = start_month.strftime('%Y-%m') if start_month else ''
+        last = end_month.strftime('%Y-%m') if end_month else '9999-12'
+        in_range = [month for month in months if first <= month <= last]
+        if 'month' in filters:
+            in_range = [month for month in in_range if month == filters['month']]
+        filters['month'] = in_range
+    totals = cube.rollup(*group, **filters)
+    rows = []
+    for key, total in sorted(totals.items()):
+        values = key if len(group) > 1 else (key,)
+        rows.append({**dict(zip(group, values)), **total})
+    return jsonify({'success': True, 'group': group, 'rows': rows})
+
+@admin_bp.route('/admin/api/analytics')
+@login_required
+@admin_required
+def analytics_api():
+    """
+    Vectorized attendance analytics for reports.html: department aggregates
+    and percentiles, a daily trend with a rolling window and the overtime
+    distribution. Same filters as /admin/reports.
+    """
+    today = date.today()
+    try:
+        start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() \
+            if request.args.get('start_date') else today.replace(day=1)
+        end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() \
+            if request.args.get('end_date') else today
+        window = max(1, min(int(request.args.get('window', 7)), 90))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid date or window'}), 400
+    if end_date < start_date or (end_date - start_date).days > 3660:
+        return jsonify({'success': False, 'message': 'Invalid date range'}), 400
+    
+    employee_id = request.args.get('employee_id')
+    user_id = int(employee_id) if employee_id and employee_id.isdigit() else None
+    return jsonify({'success': True, **attendance_analytics(start_date, end_date, user_id, window)})
+
+@admin_bp.route('/admin/user_locations')
+@login_required
+@admin_required
+def user_locations():
+    today = date.today()
+    locations = Attendance.query.options(joinedload(Attendance.user)).filter(
+        Attendance.date == today,
+        Attendance.latitude.isnot(None),
+        Attendance.longitude.isnot(None)
+    ).all()
+    
+    location_data = []
+    for att in locations:
+        location_data.append({
+            'user_id': att.user_id,
+            'user_name': att.user.name,
+            'username': att.user.username,
+            'latitude': att.latitude,
+            'longitude': att.longitude,
+            'location': att.location,
+            'city': att.city,
+            'check_in_time': att.check_in.strftime('%H:%M') if att.check_in else 'Not checked in',
+            'status': att.user.current_status,
+            'department': att.user.department,
+            'is_late': att.is_late
+        })
+    
+    return jsonify({'success': True, 'locations': location_data})
+
+@admin_bp.route('/admin/api/user_locations.geojson')
+@login_required
+@admin_required
+def user_locations_geojson():
+    """
+    Attendance locations for a day (default today) as a GeoJSON
+    FeatureCollection, limited to `bbox` (min_lng,min_lat,max_lng,max_lat).
+    Below CLUSTER_MAX_ZOOM points are merged into grid clusters for the
+    given `zoom`; at and above it, or without a zoom, points are streamed.
+    """
+    try:
+        day = datetime.strptime(request.args['date'], '%Y-%m-%d').date() \
+            if request.args.get('date') else date.today()
+        zoom = max(0, min(int(request.args['zoom']), 22)) if request.args.get('zoom') else None
+        bbox = parse_bbox(request.args['bbox']) if request.args.get('bbox') else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid date, zoom or bbox (min_lng,min_lat,max_lng,max_lat)'}), 400
+    return Response(stream_with_context(geojson_chunks(location_features(day, zoom, bbox))),
+                    mimetype='application/geo+json')
+
+@admin_bp.route('/admin/geofences', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def geofences():
+    """Office sites check-ins are classified against: a radius around a point or a polygon"""
+    if request.method == 'POST':
+        name = request.form.get('name', '').strip()
+        kind = request.form.get('kind', 'radius')
+        try:
+            if not name:
+                raise ValueError('Name is required')
+            if kind == 'polygon':
+                ring = parse_polygon(request.form.get('polygon', ''))
+                site = Geofence(name=name, kind='polygon', latitude=ring[0][0], longitude=ring[0][1],
+                                polygon=json.dumps(ring))
+            else:
+                latitude, longitude = float(request.form['latitude']), float(request.form['longitude'])
+                radius_m = float(request.form['radius_m'])
+                if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or radius_m <= 0:
+                    raise ValueError('Coordinates out of range or radius not positive')
+                site = Geofence(name=name, kind='radius', latitude=latitude, longitude=longitude, radius_m=radius_m)
+        except (KeyError, ValueError) as e:
+            flash(f'Invalid geofence: {e}', 'danger')
+            return redirect(url_for('admin.geofences'))
+        if Geofence.query.filter_by(name=name).first():
+            flash('A geofence with that name already exists', 'danger')
+            return redirect(url_for('admin.geofences'))
+        db.session.add(site)
+        db.session.commit()
+        invalidate_geofences()
+        current_app.logger.info(f"Geofence {name} added by {session['user_name']}")
+        flash(f'Geofence {name} added; reclassify past check-ins to apply it to them', 'success')
+        return redirect(url_for('admin.geofences'))
+    
+    sites = Geofence.query.order_by(Geofence.name).all()
+    counts = dict(db.session.query(Attendance.site_id, db.func.count(Attendance.id)).filter(
+        Attendance.date == date.today(), Attendance.on_site == True
+    ).group_by(Attendance.site_id).all())
+    return render_template('geofences.html', sites=sites, on_site_today=counts,
+                         tolerance_m=current_app.config['GEOFENCE_TOLERANCE_M'])
+
+@admin_bp.route('/admin/geofences/<int:site_id>/toggle', methods=['POST'])
+@login_required
+@admin_required
+def toggle_geofence(site_id):
+    site = db.session.get(Geofence, site_id)
+    if not site:
+        flash('Geofence not found', 'danger')
+        return redirect(url_for('admin.geofences'))
+    site.is_active = not site.is_active
+    db.session.commit()
+    invalidate_geofences()
+    flash(f"Geofence {site.name} {'activated' if site.is_active else 'deactivated'}", 'success')
+    return redirect(url_for('admin.geofences'))
+
+@admin_bp.route('/admin/geofences/reclassify', methods=['POST'])
+@login_required
+@admin_required
+def reclassify_geofences():
+    """Re-run the on-site/off-site classification of check-ins from `start_date` on"""
+    try:
+        start_date = datetime.strptime(request.form['start_date'], '%Y-%m-%d').date()
+    except (KeyError, ValueError):
+        flash('Invalid start date', 'danger')
+        return redirect(url_for('admin.geofences'))
+    summary = reclassify_attendance(start_date)
+    current_app.logger.info(f"Check-ins since {start_date} reclassified by {session['user_name']}: {summary}")
+    flash(f"{summary['rows']} check-ins reclassified: {summary['on_site']} on-site, "
+          f"{summary['off_site']} off-site, {summary['updated']} changed", 'success')
+    return redirect(url_for('admin.geofences'))
+
+@admin_bp.route('/admin/geocoder_metrics')
+@login_required
+@admin_required
+def geocoder_metrics():
+    """Geocoding gateway counters: cache hits, coalesced and queued calls, queue wait"""
+    return jsonify({'success': True, 'metrics': geocoder.metrics()})
+
+@admin_bp.route('/admin/slow_queries', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def slow_query_log():
+    """Recent statements over SLOW_QUERY_MS with their origin and query plan"""
+    if request.method == 'POST':
+        slow_queries.clear()
+        flash('Slow query log cleared', 'success')
+        return redirect(url_for('admin.slow_query_log'))
+    
+    return render_template('slow_queries.html',
+                         records=slow_queries.records(),
+                         threshold_ms=current_app.config.get('SLOW_QUERY_MS'))
@@ -0,0 +1,278 @@
+# blueprints/attendance.py - Punching in/out, status updates, attendance edits, bulk punch import and kiosks
+import hmac
+import io
+from flask import Blueprint, current_app, render_template, redirect, url_for, request, session, flash, jsonify
+from datetime import datetime, date
+from extensions import db
+from models import User, Attendance, Notification
+from helpers import login_required, admin_required, get_client_ip
+from realtime import send_notification, attendance_counters, emit_attendance_deltas
+from utils.geolocation import get_city_from_coords, get_location_details
+from utils.punch_import import import_punches, detect_format
+from utils.kiosk import MAX_EVENTS, authenticate_kiosk, record_badges
+from utils.shifts import apply_shift
+from utils.geofence import apply_site, geofence_index
+from utils.geohash import encode, parse_coordinates
+from utils.location_map import known_address
+
+attendance_bp = Blueprint('attendance', __name__)
+
+@attendance_bp.route('/mark_attendance', methods=['POST'])
+@login_required
+def mark_attendance():
+    user_id = session['user_id']
+    user = db.session.get(User, user_id)
+    payload = request.get_json() or {}
+    action = payload.get('action')
+    latitude, longitude = parse_coordinates(payload.get('latitude'), payload.get('longitude'))
+    location = payload.get('location', '')
+    notes = payload.get('notes', '')
+    
+    today = date.today()
+    attendance = Attendance.query.filter_by(user_id=user_id, date=today).first()
+    before = attendance_counters(attendance) if attendance else \
+        {'present': False, 'late': False, 'overtime': False, 'city': None}
+    
+    if not attendance:
+        attendance = Attendance(
+            user_id=user_id, 
+            date=today, 
+            location=location, 
+            latitude=latitude, 
+            longitude=longitude,
+            status='present',
+            ip_address=get_client_ip(),
+            device_info=request.headers.get('User-Agent', 'Unknown'),
+            notes=notes
+        )
+        db.session.add(attendance)
+    
+    now = datetime.now().time()
+    current_datetime = datetime.now()
+    
+    # Get location details including city, reusing the address of an earlier punch nearby
+    if latitude is not None:
+        location_details = known_address(encode(latitude, longitude)) or get_location_details(latitude, longitude)
+        attendance.city = location_details['city']
+        attendance.state = location_details['state']
+        attendance.country = location_details['country']
+        
+        if not location:
+            attendance.location = f"{location_details['city']}, {location_details['state']}, {location_details['country']}"
+    
+    # On-site or off-site, judged on the row's (first) check-in coordinates
+    geofences = geofence_index()
+    if attendance.latitude is not None and attendance.on_site is None:
+        apply_site(attendance, geofences)
+    
+    if action == 'check_in':
+        attendance.check_in = now
+        apply_shift(attendance, user)
+        
+        # Late is judged against the user's own shift start
+        if attendance.is_late:
+            # Notify admin about late arrival
+            admin = User.query.filter_by(role='admin').first()
+            if admin:
+                location_str = f" in {attendance.city}" if attendance.city else ""
+                send_notification(admin.id, "Late Arrival", 
+                                f"{user.name} checked in late at {now.strftime('%H:%M')}{location_str}",
+                                'attendance', 'normal')
+            
+        attendance.status = 'present'
+        user.current_status = 'Working'
+        log_msg = f"Check-in recorded for {user.username}"
+        
+    elif action == 'lunch_start':
+        attendance.lunch_start = now
+        user.current_status = 'On Lunch Break'
+        log_msg = f"Lunch start recorded for {user.username}"
+        
+    elif action == 'lunch_end':
+        attendance.lunch_end = now
+        user.current_status = 'Working'
+        log_msg = f"Lunch end recorded for {user.username}"
+        
+    elif action == 'check_out':
+        attendance.check_out = now
+        
+        # Total, overtime (past the user's shift end) and extra work hours
+        if attendance.check_in:
+            apply_shift(attendance, user)
+            
+            if attendance.overtime_hours > 0:
+                # Notify admin about overtime
+                admin = User.query.filter_by(role='admin').first()
+                if admin:
+                    location_str = f" in {attendance.city}" if attendance.city else ""
+                    send_notification(admin.id, "Overtime Worked", 
+                                    f"{user.name} worked overtime today ({attendance.overtime_hours:.2f} hours){location_str}",
+                                    'attendance', 'normal')
+        
+        user.current_status = 'Available'
+        log_msg = f"Check-out recorded for {user.username}"
+    else:
+        return jsonify({'success': False, 'message': 'Invalid action'}), 400
+    
+    db.session.commit()
+    current_app.logger.info(log_msg)
+    
+    dashboard_events = {'check_in': 'punch_in', 'check_out': 'punch_out'}
+    emit_attendance_deltas(dashboard_events.get(action, action), attendance, user, before)
+    
+    # Return location info in response
+    response_data = {
+        'success': True, 
+        'message': f'{action.replace("_", " ").title()} recorded successfully',
+        'city': attendance.city,
+        'location': attendance.location,
+        'on_site': attendance.on_site,
+        'site': geofences.names.get(attendance.site_id)
+    }
+    
+    return jsonify(response_data)
+
+@attendance_bp.route('/set_status', methods=['POST'])
+@login_required
+def set_status():
+    user = db.session.get(User, session['user_id'])
+    payload = request.get_json() or {}
+    new_status = payload.get('status','').strip()
+    latitude, longitude = parse_coordinates(payload.get('latitude'), payload.get('longitude'))
+    location = payload.get('location', '')
+    
+    user.current_status = new_status
+    
+    today = date.today()
+    attendance_today = Attendance.query.filter_by(user_id=user.id, date=today).first()
+    if attendance_today and latitude is not None:
+        attendance_today.latitude = latitude
+        attendance_today.longitude = longitude
+        address = None if location else known_address(encode(latitude, longitude))
+        if location:
+            attendance_today.location = location
+        elif address:
+            attendance_today.location = f"{address['city']}, {address['state']}, {address['country']}"
+        else:
+            attendance_today.location = get_city_from_coords(latitude, longitude)
+        apply_site(attendance_today)
+    
+    db.session.commit()
+    current_app.logger.info(f"Status updated to '{new_status}' by {user.username}")
+    return jsonify({'success':True, 'message':'Status updated successfully'})
+
+@attendance_bp.route('/admin/edit_attendance/<int:attendance_id>', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def edit_attendance(attendance_id):
+    attendance = db.session.get(Attendance, attendance_id)
+    if not attendance:
+        flash('Attendance record not found', 'danger')
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    if request.method == 'POST':
+        before = attendance_counters(attendance)
+        employee = attendance.user  # loaded before the edits so it does not autoflush them
+        try:
+            # Update check-in time
+            check_in_str = request.form.get('check_in')
+            if check_in_str:
+                attendance.check_in = datetime.strptime(check_in_str, '%H:%M').time()
+            
+            # Update check-out time
+            check_out_str = request.form.get('check_out')
+            if check_out_str:
+                attendance.check_out = datetime.strptime(check_out_str, '%H:%M').time()
+            
+            # Update lunch times
+            lunch_start_str = request.form.get('lunch_start')
+            if lunch_start_str:
+                attendance.lunch_start = datetime.strptime(lunch_start_str, '%H:%M').time()
+            
+            lunch_end_str = request.form.get('lunch_end')
+            if lunch_end_str:
+                attendance.lunch_end = datetime.strptime(lunch_end_str, '%H:%M').time()
+            
+            # Update status
+            attendance.status = request.form.get('status', attendance.status)
+            
+            # Update notes
+            attendance.notes = request.form.get('notes', attendance.notes)
+            
+            # Recalculate hours and lateness under the user's shift
+            apply_shift(attendance, employee)
+            
+            db.session.commit()
+            emit_attendance_deltas('attendance_edit', attendance, employee, before)
+            
+            # Log the edit action
+            current_app.logger.info(f"Attendance record {attendance_id} edited by {session['user_name']}")
+            flash('Attendance record updated successfully', 'success')
+            return redirect(url_for('admin.admin_dashboard'))
+            
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error editing attendance: {str(e)}")
+            flash('Error updating attendance record', 'danger')
+    
+    # Get unread notifications for dropdown
+    user = db.session.get(User, session['user_id'])
+    unread_notifications = Notification.query.filter_by(
+        user_id=user.id, is_read=False
+    ).order_by(Notification.created_at.desc()).limit(5).all()
+    
+    return render_template('edit_attendance.html', 
+                         attendance=attendance,
+                         unread_notifications=unread_notifications)
+
+@attendance_bp.route('/api/punches/import', methods=['POST'])
+def import_punch_batch():
+    """
+    Bulk punches from biometric / door-access terminals as CSV or NDJSON,
+    either as the request body or a multipart `file`. Re-uploading a batch
+    is a no-op.
+    """
+    token = current_app.config.get('PUNCH_IMPORT_TOKEN')
+    auth = request.headers.get('Authorization', '')
+    if not (token and auth.startswith('Bearer ') and hmac.compare_digest(auth[7:], token)):
+        user = db.session.get(User, session['user_id']) if 'user_id' in session else None
+        if not user or not user.is_active or user.role != 'admin':
+            return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    
+    upload = request.files.get('file')
+    if upload:
+        stream = upload.stream
+        fmt = request.args.get('format') or detect_format(upload.filename, upload.mimetype)
+    else:
+        stream = request.stream
+        fmt = request.args.get('format') or detect_format(content_type=request.content_type)
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'success': False, 'message': f'Unsupported format: {fmt}'}), 400
+    
+    summary = import_punches(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''), fmt)
+    current_app.logger.info(f"Punch import: {summary['accepted']} accepted, {summary['rejected']} rejected, "
+                            f"{summary['inserted']} inserted, {summary['updated']} updated")
+    return jsonify({'success': True, **summary})
+
+@attendance_bp.route('/api/kiosk/badges', methods=['POST'])
+def kiosk_badges():
+    """
+    Badge events from a shared gate kiosk, authenticated by its device token.
+    Body: {"events": [{"employee": ..., "timestamp": ..., "action": ...}]}
+    or a bare list. The kiosk's stored location is used for every punch.
+    """
+    device = authenticate_kiosk(request.headers.get('Authorization'))
+    if not device:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    
+    payload = request.get_json(silent=True)
+    events = payload.get('events') if isinstance(payload, dict) else payload
+    if not isinstance(events, list):
+        return jsonify({'success': False, 'message': 'Expected a list of events'}), 400
+    if len(events) > MAX_EVENTS:
+        return jsonify({'success': False, 'message': f'At most {MAX_EVENTS} events per request'}), 413
+    
+    kiosk_name = device.name  # read before the batch commits expire it
+    summary = record_badges(device, events, current_app.config['KIOSK_BATCH_SIZE'])
+    current_app.logger.info(f"Kiosk {kiosk_name}: {summary['accepted']} badges accepted, {summary['rejected']} rejected")
+    return jsonify({'success': True, 'kiosk': kiosk_name, **summary})
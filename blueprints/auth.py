@@ -0,0 +1,60 @@
+# blueprints/auth.py - Login and logout
+from flask import Blueprint, current_app, render_template, redirect, url_for, request, session, flash
+from extensions import db, presence
+from models import User
+from helpers import get_client_ip
+from utils.hashing import login_pool, verify_password, HashPoolBusy
+
+auth_bp = Blueprint('auth', __name__)
+
+@auth_bp.record_once
+def configure_login_pool(state):
+    login_pool.configure(state.app.config['LOGIN_HASH_WORKERS'], state.app.config['LOGIN_MAX_PENDING'])
+
+@auth_bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        u = request.form['username'].strip()
+        p = request.form['password']
+        user = User.query.filter_by(username=u, is_active=True).first()
+        valid = False
+        if user:
+            # CPU-bound hash check runs in the login process pool so request
+            # threads and SocketIO heartbeats keep moving during a login rush
+            try:
+                valid, new_hash = verify_password(user.password, p, current_app.config['PASSWORD_HASH_METHOD'],
+                                                  timeout=current_app.config['LOGIN_VERIFY_TIMEOUT'],
+                                                  use_pool=current_app.config['LOGIN_HASH_POOL'])
+            except HashPoolBusy:
+                retry_after = current_app.config['LOGIN_RETRY_AFTER']
+                current_app.logger.warning(f"Login pool saturated, shedding login for {u}")
+                flash(f'Too many sign-ins right now, please try again in {retry_after} seconds', 'warning')
+                return render_template('login.html'), 503, {'Retry-After': str(retry_after)}
+        if valid:
+            session['user_id'] = user.id
+            session['user_role'] = user.role
+            session['user_name'] = user.name
+            session['username'] = user.username
+            
+            if new_hash:
+                user.password = new_hash
+                db.session.commit()
+                current_app.logger.info(f"Password hash upgraded for {session['username']}")
+            
+            # Update last seen (flushed in batch by flush_presence)
+            presence.touch(user.id)
+            
+            current_app.logger.info(f"User {session['username']} logged in from IP: {get_client_ip()}")
+            
+            flash('Welcome back, ' + session['user_name'], 'success')
+            return redirect(url_for('main.home'))
+        flash('Invalid credentials or account inactive', 'danger')
+    return render_template('login.html')
+
+@auth_bp.route('/logout')
+def logout():
+    if 'user_name' in session:
+        current_app.logger.info(f"User {session['user_name']} logged out")
+    session.clear()
+    flash('Logged out successfully', 'info')
+    return redirect(url_for('auth.login'))
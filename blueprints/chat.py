@@ -0,0 +1,206 @@
+# blueprints/chat.py - Team chat pages and fallback JSON endpoints
+from flask import Blueprint, render_template, request, session, jsonify
+from datetime import datetime
+from extensions import db, socketio, presence
+from models import User, Message, Notification
+from helpers import login_required
+from realtime import get_unread_counts, push_unread_counts, push_conversation_update, mark_conversation_read
+
+chat_bp = Blueprint('chat', __name__)
+
+@chat_bp.route('/chat')
+@login_required
+def chat():
+    user = db.session.get(User, session['user_id'])
+    users = User.query.filter(User.id != user.id, User.is_active == True).all()
+    
+    # Get unread notifications for dropdown
+    unread_notifications = Notification.query.filter_by(
+        user_id=user.id, is_read=False
+    ).order_by(Notification.created_at.desc()).limit(5).all()
+    
+    # Get unread message count
+    unread_message_count = Message.query.filter_by(
+        receiver_id=user.id, 
+        is_read=False
+    ).count()
+    
+    # Get recent conversations
+    recent_conversations = db.session.query(
+        User.id,
+        User.name,
+        User.username,
+        User.current_status,
+        db.func.max(Message.timestamp).label('last_message_time')
+    ).join(
+        Message, 
+        ((Message.sender_id == User.id) & (Message.receiver_id == user.id)) |
+        ((Message.sender_id == user.id) & (Message.receiver_id == User.id))
+    ).filter(
+        User.is_active == True,
+        User.id != user.id
+    ).group_by(User.id).order_by(db.desc('last_message_time')).all()
+    
+    return render_template('chat.html', 
+                         users=users, 
+                         recent_conversations=recent_conversations,
+                         unread_message_count=unread_message_count,
+                         online_user_ids=presence.online_user_ids(),
+                         unread_notifications=unread_notifications)
+
+@chat_bp.route('/get_messages/<int:user_id>')
+@login_required
+def get_messages(user_id):
+    current_user_id = session['user_id']
+    messages = Message.query.filter(
+        ((Message.sender_id == current_user_id) & (Message.receiver_id == user_id)) |
+        ((Message.sender_id == user_id) & (Message.receiver_id == current_user_id))
+    ).order_by(Message.timestamp.asc()).all()
+    
+    # Mark messages as read
+    marked = 0
+    for msg in messages:
+        if msg.receiver_id == current_user_id and not msg.is_read:
+            msg.is_read = True
+            marked += 1
+    db.session.commit()
+    if marked:
+        push_unread_counts(current_user_id)
+    
+    messages_data = []
+    for msg in messages:
+        messages_data.append({
+            'id': msg.id,
+            'sender_id': msg.sender_id,
+            'sender_name': msg.sender.name,
+            'message': msg.message,
+            'timestamp': msg.timestamp.isoformat(),
+            'is_read': msg.is_read
+        })
+    
+    return jsonify({'success': True, 'messages': messages_data})
+
+@chat_bp.route('/get_unread_message_count')
+@login_required
+def get_unread_message_count():
+    """Get unread message counts for the current user (fallback for SocketIO)"""
+    user_id = session['user_id']
+    
+    # Cheap aggregate used as a version tag, any send or read changes it
+    unread_count, latest_id = db.session.query(
+        db.func.count(Message.id), db.func.max(Message.id)
+    ).filter(
+        Message.receiver_id == user_id,
+        Message.is_read == False
+    ).one()
+    etag = f"unread-{user_id}-{unread_count}-{latest_id or 0}"
+    if request.if_none_match.contains_weak(etag):
+        return '', 304
+    
+    counts = get_unread_counts(user_id) if unread_count else {}
+    response = jsonify({
+        'success': True, 
+        'unread_count': unread_count,
+        'unread_counts': {str(sender_id): count for sender_id, count in counts.items()}
+    })
+    response.set_etag(etag, weak=True)
+    return response
+
+@chat_bp.route('/get_chat_users')
+@login_required
+def get_chat_users():
+    """Get list of users for chat"""
+    current_user_id = session['user_id']
+    users = User.query.filter(
+        User.id != current_user_id, 
+        User.is_active == True
+    ).all()
+    
+    users_data = []
+    for user in users:
+        # Get last message and unread count for each user
+        last_message = Message.query.filter(
+            ((Message.sender_id == current_user_id) & (Message.receiver_id == user.id)) |
+            ((Message.sender_id == user.id) & (Message.receiver_id == current_user_id))
+        ).order_by(Message.timestamp.desc()).first()
+        
+        unread_count = Message.query.filter_by(
+            sender_id=user.id,
+            receiver_id=current_user_id,
+            is_read=False
+        ).count()
+        
+        last_seen = presence.last_seen(user.id) or user.last_seen
+        users_data.append({
+            'id': user.id,
+            'name': user.name,
+            'username': user.username,
+            'current_status': user.current_status,
+            'is_online': presence.is_online(user.id),
+            'last_seen': last_seen.isoformat() if last_seen else None,
+            'last_message': last_message.message if last_message else None,
+            'last_message_time': last_message.timestamp.isoformat() if last_message else None,
+            'unread_count': unread_count
+        })
+    
+    return jsonify({'success': True, 'users': users_data})
+
+@chat_bp.route('/send_message', methods=['POST'])
+@login_required
+def send_message_api():
+    """Send message via API (fallback for SocketIO)"""
+    user_id = session['user_id']
+    data = request.get_json()
+    
+    if not data or 'receiver_id' not in data or 'message' not in data:
+        return jsonify({'success': False, 'message': 'Invalid request'}), 400
+    
+    receiver_id = data['receiver_id']
+    message_text = data['message'].strip()
+    
+    if not message_text:
+        return jsonify({'success': False, 'message': 'Message cannot be empty'}), 400
+    
+    # Check if receiver exists and is active
+    receiver = User.query.filter_by(id=receiver_id, is_active=True).first()
+    if not receiver:
+        return jsonify({'success': False, 'message': 'User not found'}), 404
+    
+    # Create message
+    message = Message(
+        sender_id=user_id,
+        receiver_id=receiver_id,
+        message=message_text
+    )
+    
+    db.session.add(message)
+    db.session.commit()
+    
+    # Emit via SocketIO if possible
+    socketio.emit('receive_message', {
+        'id': message.id,
+        'message': message_text,
+        'sender_id': user_id,
+        'sender_name': session.get('user_name'),
+        'timestamp': datetime.utcnow().isoformat()
+    }, room=f"user_{receiver_id}")
+    push_unread_counts(receiver_id)
+    push_conversation_update(message)
+    
+    return jsonify({
+        'success': True, 
+        'message': 'Message sent successfully',
+        'message_id': message.id
+    })
+
+@chat_bp.route('/mark_messages_read/<int:sender_id>', methods=['POST'])
+@login_required
+def mark_messages_read(sender_id):
+    """Mark all messages from a sender as read"""
+    user_id = session['user_id']
+    updated = mark_conversation_read(user_id, sender_id)
+    
+    return jsonify({
+        'success': True, 
+        'message': f'Marked {updated} messages as read'
+    })
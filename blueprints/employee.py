@@ -0,0 +1,94 @@
+# blueprints/employee.py - Employee dashboard
+from flask import Blueprint, render_template, redirect, url_for, session, flash
+from datetime import datetime, date
+from extensions import db
+from models import User, Attendance, Leave, Notification
+from helpers import login_required, get_week_dates, get_month_dates
+
+employee_bp = Blueprint('employee', __name__)
+
+@employee_bp.route('/employee/dashboard')
+@login_required
+def employee_dashboard():
+    user = db.session.get(User, session['user_id'])
+    if user.role != 'employee':
+        flash('Access denied', 'danger')
+        return redirect(url_for('main.home'))
+    
+    today = date.today()
+    attendance_today = Attendance.query.filter_by(user_id=user.id, date=today).first()
+    
+    # Check if user is working late
+    is_working_late = False
+    if attendance_today and attendance_today.check_out is None and datetime.now().time() > user.logout_time:
+        is_working_late = True
+    
+    # Get unread notifications for dropdown
+    unread_notifications = Notification.query.filter_by(
+        user_id=user.id, is_read=False
+    ).order_by(Notification.created_at.desc()).limit(5).all()
+    
+    recent_att = Attendance.query.filter_by(user_id=user.id)\
+        .order_by(Attendance.date.desc()).limit(7).all()
+    
+    leaves = Leave.query.filter_by(user_id=user.id)\
+        .order_by(Leave.start_date.desc()).limit(5).all()
+    
+    month_start = today.replace(day=1)
+    month_attendance = Attendance.query.filter(
+        Attendance.user_id == user.id,
+        Attendance.date >= month_start,
+        Attendance.date <= today
+    ).all()
+    
+    present_count = len([att for att in month_attendance if att.status == 'present'])
+    absent_count = len([att for att in month_attendance if att.status == 'absent'])
+    half_day_count = len([att for att in month_attendance if att.status == 'half-day'])
+    total_hours = sum([att.total_hours for att in month_attendance if att.total_hours])
+    late_count = len([att for att in month_attendance if att.is_late])
+    extra_work_hours = sum([att.extra_work_hours for att in month_attendance if att.extra_work_hours])
+    
+    week_dates = get_week_dates()
+    weekly_hours = []
+    for day in week_dates:
+        att = Attendance.query.filter_by(user_id=user.id, date=day).first()
+        weekly_hours.append(att.total_hours if att and att.total_hours else 0)
+    
+    month_dates = get_month_dates()
+    monthly_status = []
+    for day in month_dates:
+        if day > today:
+            monthly_status.append(None)
+            continue
+        att = Attendance.query.filter_by(user_id=user.id, date=day).first()
+        if att:
+            if att.status == 'present':
+                monthly_status.append(1)
+            elif att.status == 'half-day':
+                monthly_status.append(0.5)
+            else:
+                monthly_status.append(0)
+        else:
+            monthly_status.append(0)
+    
+    week_labels = [d.strftime('%a') for d in week_dates]
+    month_labels = [d.strftime('%d') for d in month_dates if d <= today]
+    
+    return render_template('employee_dashboard.html', 
+                         user=user, 
+                         attendance_today=attendance_today,
+                         recent_att=recent_att,
+                         leaves=leaves,
+                         present_count=present_count,
+                         absent_count=absent_count,
+                         half_day_count=half_day_count,
+                         total_hours=total_hours,
+                         late_count=late_count,
+                         extra_work_hours=extra_work_hours,
+                         week_labels=week_labels,
+                         weekly_hours=weekly_hours,
+                         month_labels=month_labels[:len(monthly_status)],
+                         monthly_status=monthly_status,
+                         unread_notifications=unread_notifications,
+                         is_working_late=is_working_late,
+                         today=today)
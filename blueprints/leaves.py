@@ -0,0 +1,180 @@
+# blueprints/leaves.py - Leave applications and approvals
+from flask import Blueprint, current_app, render_template, redirect, url_for, request, session, flash, jsonify
+from datetime import datetime, date, timedelta
+from extensions import db
+from models import User, Leave, Notification
+from helpers import login_required, admin_required
+from realtime import send_notification, emit_leave_status
+from utils.leave_calendar import MAX_CALENDAR_DAYS, find_conflict, leave_calendar
+from utils.leave_ledger import available_for, record_decision, shortfall, user_balances
+from utils.leave_stats import invalidate_leave_stats
+
+leaves_bp = Blueprint('leaves', __name__)
+
+@leaves_bp.route('/leaves')
+@login_required
+def leaves():
+    user = db.session.get(User, session['user_id'])
+    
+    # Get unread notifications for dropdown
+    unread_notifications = Notification.query.filter_by(
+        user_id=user.id, is_read=False
+    ).order_by(Notification.created_at.desc()).limit(5).all()
+    
+    if user.role == 'admin':
+        all_leaves = Leave.query.order_by(Leave.applied_date.desc()).all()
+        # Balances beside pending requests, read from the snapshots
+        available = available_for([leave for leave in all_leaves if leave.status == 'pending'])
+        return render_template('leaves.html', leaves=all_leaves, is_admin=True, User=User, available=available,
+                               unread_notifications=unread_notifications)
+    else:
+        user_leaves = Leave.query.filter_by(user_id=user.id)\
+            .order_by(Leave.applied_date.desc()).all()
+        balances = user_balances(user.id, date.today().year)
+        return render_template('leaves.html', leaves=user_leaves, is_admin=False, User=User, balances=balances,
+                               balance_year=date.today().year,
+                               remaining_leaves=f"{sum(balance['available'] for balance in balances):g}",
+                               unread_notifications=unread_notifications)
+
+@leaves_bp.route('/apply_leave', methods=['POST'])
+@login_required
+def apply_leave():
+    uid = session['user_id']
+    start = datetime.strptime(request.form['start_date'], '%Y-%m-%d').date()
+    end = datetime.strptime(request.form['end_date'], '%Y-%m-%d').date()
+    ltype = request.form['leave_type']
+    reason = request.form.get('reason','')
+    emergency_contact = request.form.get('emergency_contact', '')
+    
+    if start > end:
+        flash('End date should be after start date', 'danger')
+        return redirect(url_for('leaves.leaves'))
+    
+    if start < date.today():
+        flash('Cannot apply leave for past dates', 'danger')
+        return redirect(url_for('leaves.leaves'))
+    
+    if find_conflict(uid, start, end):
+        flash('You already have approved leaves for the selected dates', 'danger')
+        return redirect(url_for('leaves.leaves'))
+    
+    new_leave = Leave(
+        user_id=uid, 
+        start_date=start, 
+        end_date=end, 
+        leave_type=ltype, 
+        reason=reason, 
+        emergency_contact=emergency_contact,
+        status='pending'
+    )
+    db.session.add(new_leave)
+    db.session.commit()
+    invalidate_leave_stats()
+    emit_leave_status(new_leave, None)
+    
+    # Notify admin about new leave application
+    admin = User.query.filter_by(role='admin').first()
+    if admin:
+        send_notification(admin.id, "New Leave Application", 
+                         f"{session['user_name']} has applied for {ltype} leave from {start} to {end}", 
+                         'leave', 'normal')
+    
+    current_app.logger.info(f"Leave applied by user {session['user_name']} from {start} to {end}")
+    flash('Leave applied successfully (pending approval)', 'success')
+    return redirect(url_for('leaves.leaves'))
+
+@leaves_bp.route('/admin/leave_action', methods=['POST'])
+@login_required
+@admin_required
+def leave_action():
+    lid = int(request.form['leave_id'])
+    action = request.form['action']
+    reject_reason = request.form.get('reject_reason', '')
+    
+    leave = db.session.get(Leave, lid)
+    
+    if not leave: 
+        return jsonify({'success':False, 'message':'Leave not found'}), 404
+    
+    old_status = leave.status
+    if action == 'approve' and old_status != 'approved':
+        missing = shortfall(leave)
+        if missing:
+            return jsonify({'success': False,
+                            'message': f'Leave exceeds the available {leave.leave_type} balance by {missing:g} days'}), 400
+    if action == 'approve': 
+        leave.status = 'approved'
+        leave.approved_by = session['user_id']
+        leave.approved_date = datetime.utcnow()
+        message = 'Leave approved successfully'
+    elif action == 'reject': 
+        leave.status = 'rejected'
+        leave.approved_by = session['user_id']
+        leave.approved_date = datetime.utcnow()
+        leave.reject_reason = reject_reason
+        message = 'Leave rejected successfully'
+    else:
+        return jsonify({'success':False, 'message':'Invalid action'}), 400
+    
+    # Ledger entries and balance snapshots commit with the decision; the
+    # notification commits on its own afterwards
+    balances = record_decision(leave, old_status, session['user_id'])
+    db.session.commit()
+    invalidate_leave_stats()
+    emit_leave_status(leave, old_status)
+    
+    approver = db.session.get(User, session['user_id'])
+    current_app.logger.info(f"Leave {action}ed by {session['user_name']} for user {leave.user.username}")
+    result = {
+        'success': True, 
+        'message': message,
+        'approver_name': approver.name,
+        'approval_date': leave.approved_date.strftime('%Y-%m-%d %H:%M:%S'),
+        'reject_reason': leave.reject_reason if action == 'reject' else '',
+        'balance': [{'year': balance.year, 'available': balance.available} for balance in balances]
+    }
+    
+    # Notify employee
+    send_notification(leave.user_id, f"Leave {leave.status.capitalize()}",
+                     f"Your {leave.leave_type} leave from {leave.start_date} to {leave.end_date} has been {leave.status} by {session['user_name']}",
+                     'leave', 'normal')
+    return jsonify(result)
+
+@leaves_bp.route('/team_calendar')
+@login_required
+def team_calendar():
+    user = db.session.get(User, session['user_id'])
+    unread_notifications = Notification.query.filter_by(
+        user_id=user.id, is_read=False
+    ).order_by(Notification.created_at.desc()).limit(5).all()
+    departments = [dept for dept, in db.session.query(User.department).filter(
+        User.is_active == True, User.department.isnot(None)
+    ).distinct().order_by(User.department)] if user.role == 'admin' else []
+    return render_template('team_calendar.html', is_admin=user.role == 'admin', departments=departments,
+                           department=user.department, unread_notifications=unread_notifications)
+
+@leaves_bp.route('/api/team_calendar')
+@login_required
+def team_calendar_api():
+    """
+    Leaves, per-day headcounts (overall and per department) and days over
+    `limit` people off for a range. Employees only see their own department.
+    """
+    today = date.today()
+    try:
+        start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() \
+            if request.args.get('start_date') else today.replace(day=1)
+        end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() \
+            if request.args.get('end_date') else start_date + timedelta(days=30)
+        limit = int(request.args['limit']) if request.args.get('limit') else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid date or limit'}), 400
+    if end_date < start_date or (end_date - start_date).days >= MAX_CALENDAR_DAYS:
+        return jsonify({'success': False, 'message': 'Invalid date range'}), 400
+    
+    if session.get('user_role') == 'admin':
+        department = request.args.get('department') or None
+    else:
+        department = db.session.query(User.department).filter_by(id=session['user_id']).scalar() or 'General'
+    include_pending = request.args.get('include_pending', '1') != '0'
+    return jsonify({'success': True, **leave_calendar(start_date, end_date, department, include_pending, limit)})
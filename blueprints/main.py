@@ -0,0 +1,53 @@
+# blueprints/main.py - Home redirect, shared JSON data and static helpers
+import os
+from flask import Blueprint, current_app, redirect, url_for, session, flash, jsonify, send_from_directory
+from datetime import date
+from extensions import db
+from models import User, Attendance
+from helpers import login_required, get_week_dates, get_user_activity_stats
+
+main_bp = Blueprint('main', __name__)
+
+@main_bp.route('/')
+def home():
+    if 'user_id' in session:
+        user = db.session.get(User, session['user_id'])
+        if user and user.is_active:
+            if user.role == 'admin':
+                return redirect(url_for('admin.admin_dashboard'))
+            else:
+                return redirect(url_for('employee.employee_dashboard'))
+        else:
+            session.clear()
+            flash('Your session is invalid or account is inactive. Please log in again.', 'danger')
+            return redirect(url_for('auth.login'))
+    return redirect(url_for('auth.login'))
+
+@main_bp.route('/api/dashboard_data')
+@login_required
+def dashboard_data():
+    user = db.session.get(User, session['user_id'])
+    
+    if user.role == 'admin':
+        stats = get_user_activity_stats()
+        return jsonify({
+            'weekly_data': stats['weekly_data'],
+            'monthly_data': stats['monthly_data'],
+            'department_data': stats['department_data'],
+            'leave_data': stats['leave_data']
+        })
+    else:
+        today = date.today()
+        week_dates = get_week_dates()
+        weekly_hours = []
+        for day in week_dates:
+            att = Attendance.query.filter_by(user_id=user.id, date=day).first()
+            weekly_hours.append(att.total_hours if att and att.total_hours else 0)
+        
+        return jsonify({
+            'weekly_hours': weekly_hours
+        })
+
+@main_bp.route('/favicon.ico')
+def favicon():
+    return send_from_directory(os.path.join(current_app.root_path, 'static'), 'favicon.ico', mimetype='image/vnd.microsoft.icon')
@@ -0,0 +1,41 @@
+# blueprints/metrics.py - Prometheus scrape endpoint
+import hmac
+from flask import Blueprint, current_app, request, session, abort, Response
+from extensions import db, presence
+from models import User
+from instrumentation import metrics
+from utils.geolocation import geocoder
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# Geocoder readings that go up and down; every other one only grows
+GEOCODER_GAUGES = ('queue_depth', 'in_flight', 'cache_entries', 'queue_wait_seconds_max')
+
+def _authorized():
+    """Admin session, or the configured bearer token for scrapers"""
+    token = current_app.config.get('METRICS_TOKEN')
+    auth = request.headers.get('Authorization', '')
+    if token and auth.startswith('Bearer ') and hmac.compare_digest(auth[7:], token):
+        return True
+    if 'user_id' in session:
+        user = db.session.get(User, session['user_id'])
+        return bool(user and user.is_active and user.role == 'admin')
+    return False
+
+@metrics_bp.route('/metrics')
+def prometheus_metrics():
+    if not metrics.enabled:
+        abort(404)
+    if not _authorized():
+        abort(403)
+    
+    gauges = [('presence_online_users', 'Users with a live SocketIO connection', len(presence.online_user_ids()))]
+    counters = []
+    for name, value in geocoder.metrics().items():
+        help_text = f'Geocoding gateway {name.replace("_", " ")}'
+        if name in GEOCODER_GAUGES:
+            gauges.append((f'geocoder_{name}', help_text, value))
+        else:
+            counters.append((f"geocoder_{name.removesuffix('_total')}_total", help_text, value))
+    
+    return Response(metrics.render(gauges, counters), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,104 @@
+# blueprints/notifications.py - Notification list and read/delete actions
+from flask import Blueprint, render_template, request, session, jsonify
+from extensions import db
+from models import User, Notification
+from helpers import login_required
+
+notifications_bp = Blueprint('notifications', __name__)
+
+@notifications_bp.route('/notifications')
+@login_required
+def notifications():
+    user = db.session.get(User, session['user_id'])
+    notifications = Notification.query.filter_by(user_id=user.id)\
+        .order_by(Notification.created_at.desc()).all()
+    
+    # Get unread notifications for dropdown
+    unread_notifications = Notification.query.filter_by(
+        user_id=user.id, is_read=False
+    ).order_by(Notification.created_at.desc()).limit(5).all()
+    
+    return render_template('notifications.html', notifications=notifications, unread_notifications=unread_notifications)
+
+@notifications_bp.route('/mark_notification_read/<int:notification_id>', methods=['POST'])
+@login_required
+def mark_notification_read(notification_id):
+    """Mark a single notification as read"""
+    notification = db.session.get(Notification, notification_id)
+    if notification and notification.user_id == session['user_id']:
+        notification.is_read = True
+        db.session.commit()
+        return jsonify({'success': True})
+    return jsonify({'success': False, 'message': 'Notification not found'}), 404
+
+@notifications_bp.route('/mark_notifications_read', methods=['POST'])
+@login_required
+def mark_notifications_read():
+    """Mark multiple notifications as read"""
+    data = request.get_json()
+    if not data or 'notification_ids' not in data:
+        return jsonify({'success': False, 'message': 'Invalid request'}), 400
+    
+    notification_ids = data['notification_ids']
+    user_id = session['user_id']
+    
+    # Mark notifications as read
+    notifications = Notification.query.filter(
+        Notification.id.in_(notification_ids),
+        Notification.user_id == user_id
+    ).all()
+    
+    for notification in notifications:
+        notification.is_read = True
+    
+    db.session.commit()
+    return jsonify({'success': True, 'message': f'{len(notifications)} notifications marked as read'})
+
+@notifications_bp.route('/mark_all_notifications_read', methods=['POST'])
+@login_required
+def mark_all_notifications_read():
+    """Mark all notifications as read for the current user"""
+    user_id = session['user_id']
+    updated_count = Notification.query.filter_by(
+        user_id=user_id, 
+        is_read=False
+    ).update({'is_read': True})
+    
+    db.session.commit()
+    return jsonify({'success': True, 'message': f'All notifications marked as read', 'updated_count': updated_count})
+
+@notifications_bp.route('/delete_notification/<int:notification_id>', methods=['POST'])
+@login_required
+def delete_notification(notification_id):
+    """Delete a single notification"""
+    notification = db.session.get(Notification, notification_id)
+    if notification and notification.user_id == session['user_id']:
+        db.session.delete(notification)
+        db.session.commit()
+        return jsonify({'success': True, 'message': 'Notification deleted successfully'})
+    return jsonify({'success': False, 'message': 'Notification not found'}), 404
+
+@notifications_bp.route('/delete_notifications', methods=['POST'])
+@login_required
+def delete_notifications():
+    """Delete multiple notifications"""
+    data = request.get_json()
+    if not data or 'notification_ids' not in data:
+        return jsonify({'success': False, 'message': 'Invalid request'}), 400
+    
+    notification_ids = data['notification_ids']
+    user_id = session['user_id']
+    
+    # Delete notifications
+    notifications = Notification.query.filter(
+        Notification.id.in_(notification_ids),
+        Notification.user_id == user_id
+    ).all()
+    
+    deleted_count = 0
+    for notification in notifications:
+        db.session.delete(notification)
+        deleted_count += 1
+    
+    db.session.commit()
+    return jsonify({'success': True, 'message': f'{deleted_count} notifications deleted successfully'})
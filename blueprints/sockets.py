@@ -0,0 +1,108 @@
+# blueprints/sockets.py - SocketIO event handlers
+from flask import current_app, session
+from flask_socketio import emit, join_room
+from datetime import datetime
+from extensions import db, socketio, presence
+from models import User, Message, Notification
+from realtime import ADMIN_DASHBOARD_ROOM, push_unread_counts, push_conversation_update, mark_conversation_read
+
+@socketio.on('connect')
+def handle_connect():
+    user_id = session.get('user_id')
+    if user_id:
+        join_room(f"user_{user_id}")
+        if session.get('user_role') == 'admin':
+            join_room(ADMIN_DASHBOARD_ROOM)
+        if presence.connect(user_id):
+            emit('user_online', {'user_id': user_id}, broadcast=True, include_self=False)
+        emit('connection_status', {'status': 'connected'})
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    user_id = session.get('user_id')
+    if user_id and presence.disconnect(user_id):
+        emit('user_offline', {
+            'user_id': user_id,
+            'last_seen': datetime.utcnow().isoformat()
+        }, broadcast=True, include_self=False)
+
+@socketio.on('send_message')
+def handle_send_message(data):
+    user_id = session.get('user_id')
+    if not user_id:
+        emit('error', {'message': 'Not authenticated'})
+        return {'success': False, 'error': 'Not authenticated'}
+    
+    try:
+        receiver_id = data.get('receiver_id')
+        message_text = data.get('message', '').strip()
+        
+        if not receiver_id or not message_text:
+            emit('error', {'message': 'Invalid message data'})
+            return {'success': False, 'error': 'Invalid message data'}
+        
+        # Check if receiver exists
+        receiver = User.query.filter_by(id=receiver_id, is_active=True).first()
+        if not receiver:
+            emit('error', {'message': 'Receiver not found'})
+            return {'success': False, 'error': 'Receiver not found'}
+        
+        message = Message(
+            sender_id=user_id,
+            receiver_id=receiver_id,
+            message=message_text
+        )
+        db.session.add(message)
+        db.session.commit()
+        
+        # Prepare response data
+        response_data = {
+            'id': message.id,
+            'message': message_text,
+            'sender_id': user_id,
+            'sender_name': session.get('user_name'),
+            'timestamp': datetime.utcnow().isoformat(),
+            'is_read': False
+        }
+        
+        # Emit to receiver
+        emit('receive_message', response_data, room=f"user_{receiver_id}")
+        push_unread_counts(receiver_id)
+        push_conversation_update(message)
+        
+        # Emit confirmation to sender
+        emit('message_sent', {
+            'status': 'success',
+            'message_id': message.id,
+            'timestamp': response_data['timestamp']
+        })
+        return {'success': True, 'message_id': message.id}
+        
+    except Exception as e:
+        current_app.logger.error(f"Error sending message: {str(e)}")
+        emit('error', {'message': 'Failed to send message'})
+        return {'success': False, 'error': 'Failed to send message'}
+
+@socketio.on('mark_messages_read')
+def handle_mark_messages_read(data):
+    user_id = session.get('user_id')
+    if user_id and data and data.get('user_id'):
+        mark_conversation_read(user_id, data['user_id'])
+
+@socketio.on('mark_message_read')
+def handle_mark_message_read(data):
+    user_id = session.get('user_id')
+    if not user_id or not data or not data.get('message_id'):
+        return
+    message = db.session.get(Message, data['message_id'])
+    if message and message.receiver_id == user_id and not message.is_read:
+        message.is_read = True
+        db.session.commit()
+        push_unread_counts(user_id)
+
+@socketio.on('mark_notification_read')
+def handle_mark_notification_read(data):
+    notification = db.session.get(Notification, data['notification_id'])
+    if notification and notification.user_id == session.get('user_id'):
+        notification.is_read = True
+        db.session.commit()
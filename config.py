@@ -0,0 +1,89 @@
+# config.py - Configuration classes for create_app()
+import os
+
+class Config:
+    SECRET_KEY = os.environ.get("FLASK_SECRET", "supersecretkey")
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///attendance.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    UPLOAD_FOLDER = 'static/uploads'
+    BACKUP_FOLDER = 'backups'
+
+    # None lets Flask-SocketIO auto-detect (gevent when wsgi.py has patched the process)
+    SOCKETIO_ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE')
+
+    # JSON log file written by a background listener thread
+    LOG_TO_FILE = True
+
+    # Per-route latency/SQL metrics at /metrics; scrapers may send METRICS_TOKEN
+    # as a bearer token instead of an admin session
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Statements slower than this (0 disables) are kept with their EXPLAIN
+    # output in a ring buffer shown at /admin/slow_queries
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+    SLOW_QUERY_LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE', 100))
+
+    # Bearer token for /api/punches/import uploads from biometric terminals;
+    # admins can upload with their session
+    PUNCH_IMPORT_TOKEN = os.environ.get('PUNCH_IMPORT_TOKEN')
+
+    # Badges per commit on /api/kiosk/badges
+    KIOSK_BATCH_SIZE = int(os.environ.get('KIOSK_BATCH_SIZE', 500))
+    # Days of attendance recomputed when a user's shift is edited; older days via recompute-attendance
+    SHIFT_RECOMPUTE_DAYS = int(os.environ.get('SHIFT_RECOMPUTE_DAYS', 31))
+
+    # Password hashing: werkzeug method for new hashes (existing hashes made
+    # with other parameters are replaced on the next successful login) and
+    # the bounded process pool /login verifies passwords in. When
+    # LOGIN_MAX_PENDING checks are queued, or one takes longer than
+    # LOGIN_VERIFY_TIMEOUT, /login answers 503 with Retry-After.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    LOGIN_HASH_POOL = os.environ.get('LOGIN_HASH_POOL', '1') == '1'
+    LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS') or os.cpu_count() or 1)
+    LOGIN_MAX_PENDING = int(os.environ.get('LOGIN_MAX_PENDING') or LOGIN_HASH_WORKERS * 8)
+    LOGIN_VERIFY_TIMEOUT = float(os.environ.get('LOGIN_VERIFY_TIMEOUT', 5))
+    LOGIN_RETRY_AFTER = int(os.environ.get('LOGIN_RETRY_AFTER', 2))
+
+    # Seconds between batched last_seen flushes
+    PRESENCE_FLUSH_INTERVAL = 60
+
+    # Nightly absent/week-off/on-leave marking; each run also re-checks the
+    # previous ABSENCE_CATCHUP_DAYS days in case a night was missed
+    ABSENCE_JOB_TIME = os.environ.get('ABSENCE_JOB_TIME', '00:15')
+    ABSENCE_CATCHUP_DAYS = int(os.environ.get('ABSENCE_CATCHUP_DAYS', 7))
+
+    # Days granted per leave type each year, e.g.
+    # LEAVE_ENTITLEMENTS="Sick Leave=12,Vacation=15"; other types accrue nothing
+    LEAVE_ENTITLEMENTS = {
+        leave_type.strip(): float(days)
+        for leave_type, days in (item.split('=') for item in os.environ.get(
+            'LEAVE_ENTITLEMENTS',
+            'Sick Leave=12,Vacation=15,Personal Leave=5,Emergency Leave=3,Maternity/Paternity=90'
+        ).split(',') if item.strip())
+    }
+
+    # Seconds the leave statistics cube is reused; leave changes rebuild it
+    LEAVE_STATS_TTL = int(os.environ.get('LEAVE_STATS_TTL', 300))
+
+    # Check-ins within GEOFENCE_TOLERANCE_M metres of an office geofence count
+    # as on-site (GPS error); each process reloads the sites this often
+    GEOFENCE_TOLERANCE_M = float(os.environ.get('GEOFENCE_TOLERANCE_M', 50))
+    GEOFENCE_RELOAD_SECONDS = int(os.environ.get('GEOFENCE_RELOAD_SECONDS', 60))
+
+    # Seconds each admin dashboard panel is shared between requests; every live
+    # dashboard delta drops the cached panels
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 30))
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SOCKETIO_ASYNC_MODE = 'threading'
+    LOG_TO_FILE = False
+    METRICS_ENABLED = False
+    SLOW_QUERY_MS = 0
+    LOGIN_HASH_POOL = False
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1'
+    LEAVE_STATS_TTL = 0  # query budgets measure the uncached cube
+    GEOFENCE_RELOAD_SECONDS = 0
+    DASHBOARD_CACHE_TTL = 0
@@ -0,0 +1,10 @@
+# extensions.py - Extension instances, bound to an app in create_app()
+from flask_sqlalchemy import SQLAlchemy
+from flask_socketio import SocketIO
+from utils.presence import PresenceTracker
+
+db = SQLAlchemy()
+socketio = SocketIO()
+
+# Live connection registry, last_seen is flushed to the DB in batches
+presence = PresenceTracker()
@@ -0,0 +1,8 @@
+# gunicorn.conf.py - Read by gunicorn from the working directory
+#
+# wsgi.py only builds the app when imported; the serving-process startup work
+# runs here, once per worker, after the worker has loaded wsgi:app.
+
+def post_worker_init(worker):
+    from app import bootstrap
+    bootstrap(worker.wsgi)
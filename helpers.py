@@ -0,0 +1,205 @@
+# helpers.py - Access decorators, date helpers, statistics and template helpers
+from functools import wraps
+from datetime import datetime, date, timedelta
+from flask import redirect, url_for, request, session, flash
+from extensions import db
+from models import User, Attendance, Leave, Notification
+from utils.leave_stats import leave_cube
+
+# ---------------- Helpers ----------------
+def login_required(f):
+    @wraps(f)
+    def wrapper(*args, **kw):
+        if 'user_id' not in session:
+            return redirect(url_for('auth.login'))
+        
+        user = db.session.get(User, session['user_id'])
+        if not user or not user.is_active:
+            session.clear()
+            flash('Your session is invalid or account is inactive. Please log in again.', 'danger')
+            return redirect(url_for('auth.login'))
+            
+        return f(*args, **kw)
+    return wrapper
+
+def admin_required(f):
+    @wraps(f)
+    def wrapper(*args, **kw):
+        if 'user_id' not in session:
+            return redirect(url_for('auth.login'))
+            
+        user = db.session.get(User, session['user_id'])
+        if not user or not user.is_active:
+            session.clear()
+            flash('Your session is invalid or account is inactive. Please log in again.', 'danger')
+            return redirect(url_for('auth.login'))
+            
+        if user.role != 'admin':
+            flash('Access denied. Admin privileges required.', 'danger')
+            return redirect(url_for('employee.employee_dashboard'))
+        return f(*args, **kw)
+    return wrapper
+
+def get_week_dates():
+    today = date.today()
+    start_of_week = today - timedelta(days=today.weekday())
+    dates = [start_of_week + timedelta(days=i) for i in range(7)]
+    return dates
+
+def get_month_dates():
+    today = date.today()
+    first_day = today.replace(day=1)
+    next_month = first_day.replace(month=first_day.month+1) if first_day.month < 12 else first_day.replace(year=first_day.year+1, month=1)
+    last_day = next_month - timedelta(days=1)
+    
+    dates = []
+    current = first_day
+    while current <= last_day:
+        dates.append(current)
+        current += timedelta(days=1)
+    return dates
+
+def get_client_ip():
+    if request.headers.getlist("X-Forwarded-For"):
+        return request.headers.getlist("X-Forwarded-For")[0]
+    return request.remote_addr
+
+def get_user_activity_stats():
+    today = date.today()
+    week_dates = get_week_dates()
+    month_dates = get_month_dates()
+    
+    total_users = User.query.filter_by(is_active=True).count()
+    present_today = Attendance.query.filter_by(date=today, status='present').count()
+    
+    on_leave_today = Leave.query.filter(
+        Leave.start_date <= today,
+        Leave.end_date >= today,
+        Leave.status == 'approved'
+    ).count()
+    
+    leave_data = {status: total['count'] for status, total in leave_cube().rollup('status').items()}
+    pending_leaves = leave_data.get('pending', 0)
+    
+    # Late arrivals and overtime, as judged against each user's shift
+    late_arrivals = db.session.query(Attendance).filter(
+        Attendance.date == today,
+        Attendance.is_late == True
+    ).count()
+    
+    extra_work_today = db.session.query(Attendance).filter(
+        Attendance.date == today,
+        Attendance.overtime_hours > 0
+    ).count()
+    
+    weekly_data = []
+    for day in week_dates:
+        day_att = Attendance.query.filter_by(date=day, status='present').count()
+        weekly_data.append(day_att)
+    
+    monthly_data = []
+    for day in month_dates:
+        day_att = Attendance.query.filter_by(date=day, status='present').count()
+        monthly_data.append(day_att)
+    
+    departments = db.session.query(User.department, db.func.count(User.id))\
+        .filter(User.is_active == True, User.role == 'employee')\
+        .group_by(User.department).all()
+    
+    department_data = [{'name': dept[0], 'count': dept[1]} for dept in departments]
+    
+    return {
+        'total_users': total_users,
+        'present_today': present_today,
+        'on_leave_today': on_leave_today,
+        'pending_leaves': pending_leaves,
+        'late_arrivals': late_arrivals,
+        'extra_work_today': extra_work_today,
+        'weekly_data': weekly_data,
+        'monthly_data': monthly_data,
+        'department_data': department_data,
+        'leave_data': leave_data
+    }
+
+def calculate_productivity(user_id, start_date, end_date):
+    attendances = Attendance.query.filter(
+        Attendance.user_id == user_id,
+        Attendance.date >= start_date,
+        Attendance.date <= end_date
+    ).all()
+    
+    total_days = (end_date - start_date).days + 1
+    present_days = len([att for att in attendances if att.status == 'present'])
+    absent_days = len([att for att in attendances if att.status == 'absent'])
+    half_days = len([att for att in attendances if att.status == 'half-day'])
+    
+    total_hours = sum([att.total_hours for att in attendances if att.total_hours])
+    avg_hours_per_day = total_hours / present_days if present_days > 0 else 0
+    
+    # Calculate late arrivals and extra work
+    late_count = len([att for att in attendances if att.is_late])
+    extra_work_hours = sum([att.extra_work_hours for att in attendances if att.extra_work_hours])
+    
+    return {
+        'total_days': total_days,
+        'present_days': present_days,
+        'absent_days': absent_days,
+        'half_days': half_days,
+        'attendance_percentage': (present_days / total_days * 100) if total_days > 0 else 0,
+        'total_hours': total_hours,
+        'avg_hours_per_day': avg_hours_per_day,
+        'late_count': late_count,
+        'extra_work_hours': extra_work_hours
+    }
+
+# ---------------- Template Helpers ----------------
+def register_template_helpers(app):
+    """Register context processors and Jinja2 filters on the app"""
+    @app.context_processor
+    def inject_now():
+        return {'date': date, 'datetime': datetime, 'today': date.today()}
+
+    @app.context_processor
+    def inject_notification_count():
+        """Inject unread notification count into all templates"""
+        if 'user_id' in session:
+            user_id = session['user_id']
+            unread_count = Notification.query.filter_by(
+                user_id=user_id, 
+                is_read=False
+            ).count()
+            return {'unread_notifications_count': unread_count}
+        return {'unread_notifications_count': 0}
+
+    @app.template_filter('date')
+    def format_date(value, format='%Y-%m-%d'):
+        if value is None:
+            return ""
+        if isinstance(value, str):
+            try:
+                value = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                return value
+        return value.strftime(format)
+
+    @app.template_filter('datetime')
+    def format_datetime(value, format='%Y-%m-%d %H:%M:%S'):
+        if value is None:
+            return ""
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                return value
+        return value.strftime(format)
+
+    @app.template_filter('time')
+    def format_time(value, format='%H:%M'):
+        if value is None:
+            return ""
+        if isinstance(value, str):
+            try:
+                value = datetime.strptime(value, '%H:%M:%S').time()
+            except ValueError:
+                return value
+        return value.strftime(format)
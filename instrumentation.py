@@ -0,0 +1,262 @@
+# instrumentation.py - Per-route latency, SQL and SocketIO metrics in Prometheus format,
+# plus a slow-query recorder with EXPLAIN capture
+#
+# Nothing is hooked in unless METRICS_ENABLED or SLOW_QUERY_MS is set, so a
+# disabled app pays no per-request or per-query cost.
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from extensions import db, socketio
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# [query count, seconds] for the request or event running in this context
+_sql_stats = ContextVar('sql_stats', default=None)
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, label_values, value):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in sorted(self._series.items()):
+            labels = _format_labels(self.labels, label_values)
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._series = {}
+
+    def inc(self, label_values, amount=1):
+        self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._series.items()):
+            lines.append(f"{self.name}{{{_format_labels(self.labels, label_values)}}} {value}")
+        return lines
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+class MetricsRegistry:
+    """
+    Process-wide metric store guarded by one lock
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.request_latency = Histogram('http_request_duration_seconds',
+                                         'Request latency by endpoint', ('endpoint', 'method'), LATENCY_BUCKETS)
+        self.request_queries = Histogram('http_request_sql_queries',
+                                         'SQL statements per request', ('endpoint',), QUERY_COUNT_BUCKETS)
+        self.request_sql_time = Histogram('http_request_sql_duration_seconds',
+                                          'Time spent in SQL per request', ('endpoint',), LATENCY_BUCKETS)
+        self.requests_total = Counter('http_requests_total',
+                                      'Requests by endpoint and status', ('endpoint', 'method', 'status'))
+        self.event_latency = Histogram('socketio_event_duration_seconds',
+                                       'SocketIO handler latency by event', ('event',), LATENCY_BUCKETS)
+        self.event_queries = Histogram('socketio_event_sql_queries',
+                                       'SQL statements per SocketIO event', ('event',), QUERY_COUNT_BUCKETS)
+
+    def observe_request(self, endpoint, method, status, seconds, queries, sql_seconds):
+        with self._lock:
+            self.request_latency.observe((endpoint, method), seconds)
+            self.request_queries.observe((endpoint,), queries)
+            self.request_sql_time.observe((endpoint,), sql_seconds)
+            self.requests_total.inc((endpoint, method, status))
+
+    def observe_event(self, event_name, seconds, queries):
+        with self._lock:
+            self.event_latency.observe((event_name,), seconds)
+            self.event_queries.observe((event_name,), queries)
+
+    def render(self, extra_gauges=None, extra_counters=None):
+        """Exposition text; extra_* are (name, help, value) read from elsewhere, counters named *_total"""
+        with self._lock:
+            lines = []
+            for metric in (self.request_latency, self.request_queries, self.request_sql_time,
+                           self.requests_total, self.event_latency, self.event_queries):
+                lines.extend(metric.render())
+        for kind, extra in (('gauge', extra_gauges), ('counter', extra_counters)):
+            for name, help_text, value in extra or ():
+                lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"])
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def _query_origin():
+    """Innermost application frame (file:line function) that issued the query"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_ROOT) and filename != __file__ and 'site-packages' not in filename:
+            return f"{os.path.relpath(filename, APP_ROOT)}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+def _explain(cursor, dialect_name, statement, parameters):
+    """Query plan rows for a SELECT, run on a fresh DBAPI cursor of the same connection"""
+    if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return []
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect_name == 'sqlite' else 'EXPLAIN '
+    try:
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            rows = explain_cursor.fetchall()
+        finally:
+            explain_cursor.close()
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+    if dialect_name == 'sqlite':
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [' '.join(str(col) for col in row) for row in rows]
+
+class SlowQueryLog:
+    """
+    Ring buffer of statements slower than a threshold
+    """
+
+    def __init__(self, size=100):
+        self.threshold = None  # seconds, None when disabled
+        self.logger = None
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=size)
+
+    def configure(self, threshold_ms, size, logger=None):
+        self.threshold = threshold_ms / 1000.0 if threshold_ms else None
+        self.logger = logger
+        with self._lock:
+            self._records = deque(self._records, maxlen=size)
+
+    def record(self, conn, cursor, statement, parameters, executemany, seconds):
+        entry = {
+            'time': datetime.now(),
+            'duration_ms': round(seconds * 1000, 2),
+            'statement': statement,
+            'parameters': repr(parameters)[:500],
+            'endpoint': request.endpoint if has_request_context() else None,
+            'origin': _query_origin(),
+            'plan': [] if executemany else _explain(cursor, conn.dialect.name, statement, parameters)
+        }
+        with self._lock:
+            self._records.append(entry)
+        if self.logger is not None:
+            self.logger.warning("Slow query %.1f ms from %s: %s",
+                                entry['duration_ms'], entry['origin'] or entry['endpoint'], ' '.join(statement.split())[:200])
+
+    def records(self):
+        """Newest first"""
+        with self._lock:
+            return list(reversed(self._records))
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+slow_queries = SlowQueryLog()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    stats = _sql_stats.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+    threshold = slow_queries.threshold
+    if threshold is not None and elapsed >= threshold:
+        slow_queries.record(conn, cursor, statement, parameters, executemany, elapsed)
+
+def _timed_event(event_name, handler):
+    def wrapper(*args, **kwargs):
+        stats = [0, 0.0]
+        token = _sql_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            metrics.observe_event(event_name, time.perf_counter() - started, stats[0])
+            _sql_stats.reset(token)
+    return wrapper
+
+def init_instrumentation(app):
+    """Hook request, SQL and SocketIO timing into the app when METRICS_ENABLED,
+    and the slow-query recorder when SLOW_QUERY_MS is non-zero"""
+    slow_query_ms = app.config.get('SLOW_QUERY_MS')
+    if slow_query_ms:
+        slow_queries.configure(slow_query_ms, app.config.get('SLOW_QUERY_LOG_SIZE', 100), app.logger)
+    if not app.config.get('METRICS_ENABLED') and not slow_query_ms:
+        return
+
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    metrics.enabled = True
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_sql = [0, 0.0]
+        _sql_stats.set(g.metrics_sql)
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            stats = g.metrics_sql
+            metrics.observe_request(request.endpoint or 'unknown', request.method, response.status_code,
+                                    time.perf_counter() - started, stats[0], stats[1])
+            _sql_stats.set(None)
+        return response
+
+    # Wrap the handlers python-socketio dispatches to
+    for namespace_handlers in socketio.server.handlers.values():
+        for event_name, handler in list(namespace_handlers.items()):
+            if not getattr(handler, '_metrics_wrapped', False):
+                wrapped = _timed_event(event_name, handler)
+                wrapped._metrics_wrapped = True
+                namespace_handlers[event_name] = wrapped
@@ -0,0 +1,188 @@
+# models.py - Database models
+import json
+from datetime import datetime
+from extensions import db
+from utils.geohash import encode_or_none
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    password = db.Column(db.String(200), nullable=False)
+    role = db.Column(db.String(20), nullable=False)
+    name = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    phone = db.Column(db.String(20))
+    gender = db.Column(db.String(10))
+    date_of_birth = db.Column(db.Date)
+    week_off = db.Column(db.String(20), default='Sunday')
+    current_status = db.Column(db.String(200), default='Available')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    is_active = db.Column(db.Boolean, default=True)
+    department = db.Column(db.String(100), default='General')
+    designation = db.Column(db.String(100), default='Employee')
+    profile_picture = db.Column(db.String(200))
+    last_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    login_time = db.Column(db.Time, default=datetime.strptime('09:00', '%H:%M').time())
+    logout_time = db.Column(db.Time, default=datetime.strptime('19:00', '%H:%M').time())
+
+    attendances = db.relationship('Attendance', back_populates='user', cascade="all, delete-orphan")
+    leaves = db.relationship('Leave', back_populates='user', foreign_keys='Leave.user_id', cascade="all, delete-orphan")
+    approved_leaves = db.relationship('Leave', back_populates='approver', foreign_keys='Leave.approved_by')
+    sent_messages = db.relationship('Message', foreign_keys='Message.sender_id', back_populates='sender')
+    received_messages = db.relationship('Message', foreign_keys='Message.receiver_id', back_populates='receiver')
+    notifications = db.relationship('Notification', back_populates='user')
+
+class Attendance(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    check_in = db.Column(db.Time)
+    lunch_start = db.Column(db.Time)
+    lunch_end = db.Column(db.Time)
+    check_out = db.Column(db.Time)
+    location = db.Column(db.String(300))
+    # Numeric columns replacing the old latitude/longitude strings; see migrate_coordinates()
+    latitude = db.Column('lat', db.Float)
+    longitude = db.Column('lng', db.Float)
+    geohash = db.Column(db.String(12))  # utils.geohash.PRECISION characters, set whenever the coordinates are
+    city = db.Column(db.String(100))
+    state = db.Column(db.String(100))
+    country = db.Column(db.String(100))
+    status = db.Column(db.String(30), default='absent')
+    total_hours = db.Column(db.Float, default=0.0)
+    ip_address = db.Column(db.String(50))
+    device_info = db.Column(db.String(200))
+    notes = db.Column(db.Text)
+    is_late = db.Column(db.Boolean, default=False)
+    overtime_hours = db.Column(db.Float, default=0.0)
+    extra_work_hours = db.Column(db.Float, default=0.0)
+    # Geofence classification of the check-in location; NULL when it had no coordinates
+    site_id = db.Column(db.Integer, db.ForeignKey('geofence.id'), nullable=True)  # nearest site
+    on_site = db.Column(db.Boolean)
+    site_distance_m = db.Column(db.Float)  # 0 inside the site
+
+    user = db.relationship('User', back_populates='attendances')
+    site = db.relationship('Geofence')
+
+    # One row per user and day is looked up by every punch, dashboard and the absence job
+    __table_args__ = (
+        db.Index('ix_attendance_user_date', 'user_id', 'date'),
+        db.Index('ix_attendance_date_site', 'date', 'on_site', 'site_id'),
+        # A day's points by cell for map clusters, and geohash prefix lookups
+        db.Index('ix_attendance_date_geohash', 'date', 'geohash'),
+        db.Index('ix_attendance_geohash', 'geohash'),
+    )
+
+@db.event.listens_for(Attendance, 'before_insert')
+@db.event.listens_for(Attendance, 'before_update')
+def _set_geohash(mapper, connection, attendance):
+    """Keep the grid key in step with coordinates written through the ORM; bulk writers set it themselves"""
+    geohash = encode_or_none(attendance.latitude, attendance.longitude)
+    if attendance.geohash != geohash:
+        attendance.geohash = geohash
+
+class Leave(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    leave_type = db.Column(db.String(80), nullable=False)
+    reason = db.Column(db.Text)
+    status = db.Column(db.String(30), default='pending')
+    applied_date = db.Column(db.DateTime, default=datetime.utcnow)
+    approved_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    approved_date = db.Column(db.DateTime, nullable=True)
+    emergency_contact = db.Column(db.String(100))
+    attachment = db.Column(db.String(200))
+    reject_reason = db.Column(db.Text)
+
+    user = db.relationship('User', back_populates='leaves', foreign_keys=[user_id])
+    approver = db.relationship('User', back_populates='approved_leaves', foreign_keys=[approved_by])
+
+    __table_args__ = (db.Index('ix_leave_user_dates', 'user_id', 'start_date', 'end_date'),)
+
+class LeaveLedgerEntry(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    leave_type = db.Column(db.String(80), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # accrual, consumption, adjustment
+    days = db.Column(db.Float, nullable=False)  # signed change to the balance
+    leave_id = db.Column(db.Integer, db.ForeignKey('leave.id'), nullable=True)
+    note = db.Column(db.String(200))
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_leave_ledger_user_year', 'user_id', 'year'),)
+
+class LeaveBalance(db.Model):
+    """Running totals of a user's ledger entries for one leave type and year"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    leave_type = db.Column(db.String(80), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    accrued = db.Column(db.Float, nullable=False, default=0.0)
+    used = db.Column(db.Float, nullable=False, default=0.0)
+    adjusted = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'leave_type', 'year', name='uq_leave_balance'),)
+
+    @property
+    def available(self):
+        return self.accrued + self.adjusted - self.used
+
+class Message(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    receiver_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    is_read = db.Column(db.Boolean, default=False)
+    attachment = db.Column(db.String(200))
+
+    sender = db.relationship('User', foreign_keys=[sender_id], back_populates='sent_messages')
+    receiver = db.relationship('User', foreign_keys=[receiver_id], back_populates='received_messages')
+
+class Notification(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    is_read = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    type = db.Column(db.String(50))
+    priority = db.Column(db.String(20), default='normal')  # low, normal, high, urgent
+
+    user = db.relationship('User', back_populates='notifications')
+
+class KioskDevice(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), unique=True, nullable=False)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)  # sha256 hex of the bearer token
+    location = db.Column(db.String(300))
+    # Numeric like Attendance's; see migrate_coordinates()
+    latitude = db.Column('lat', db.Float)
+    longitude = db.Column('lng', db.Float)
+    city = db.Column(db.String(100))
+    state = db.Column(db.String(100))
+    country = db.Column(db.String(100))
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen = db.Column(db.DateTime)
+
+class Geofence(db.Model):
+    """An approved work site: a circle around (latitude, longitude) or a polygon"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), unique=True, nullable=False)
+    kind = db.Column(db.String(20), nullable=False, default='radius')  # radius, polygon
+    latitude = db.Column(db.Float, nullable=False)  # centre, or first vertex of a polygon
+    longitude = db.Column(db.Float, nullable=False)
+    radius_m = db.Column(db.Float)
+    polygon = db.Column(db.Text)  # JSON [[lat, lng], ...]
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def ring(self):
+        return json.loads(self.polygon) if self.polygon else []
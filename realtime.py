@@ -0,0 +1,153 @@
+# realtime.py - Notifications and SocketIO push helpers shared by the views
+from datetime import datetime, date
+from extensions import db, socketio, presence
+from models import Message, Notification
+from utils.dashboard import invalidate_dashboard
+
+# ---------------- Notification System ----------------
+def send_notification(user_id, title, message, notif_type='system', priority='normal'):
+    """Send notification to user"""
+    notification = Notification(
+        user_id=user_id,
+        title=title,
+        message=message,
+        type=notif_type,
+        priority=priority
+    )
+    db.session.add(notification)
+    db.session.commit()
+    
+    # Emit real-time notification via SocketIO
+    socketio.emit('new_notification', {
+        'id': notification.id,
+        'title': title,
+        'message': message,
+        'type': notif_type,
+        'priority': priority,
+        'timestamp': datetime.utcnow().isoformat()
+    }, room=f"user_{user_id}")
+
+def send_notifications(items, notif_type='system', priority='normal'):
+    """Bulk send_notification for (user_id, title, message) items with one INSERT;
+    only users that are online get a SocketIO push"""
+    items = list(items)
+    if not items:
+        return
+    created_at = datetime.utcnow()
+    rows = db.session.execute(
+        db.insert(Notification).returning(Notification.id, Notification.user_id, Notification.title, Notification.message),
+        [{'user_id': user_id, 'title': title, 'message': message, 'type': notif_type,
+          'priority': priority, 'created_at': created_at} for user_id, title, message in items]
+    ).all()
+    db.session.commit()
+    
+    for notification_id, user_id, title, message in rows:
+        if presence.is_online(user_id):
+            socketio.emit('new_notification', {
+                'id': notification_id,
+                'title': title,
+                'message': message,
+                'type': notif_type,
+                'priority': priority,
+                'timestamp': created_at.isoformat()
+            }, room=f"user_{user_id}")
+
+# ---------------- Live Admin Dashboard ----------------
+ADMIN_DASHBOARD_ROOM = 'admin_dashboard'
+
+def emit_dashboard_event(event, data):
+    """Push a small delta to admins watching the dashboard"""
+    invalidate_dashboard()
+    payload = dict(data, event=event, timestamp=datetime.utcnow().isoformat())
+    socketio.emit('dashboard_update', payload, room=ADMIN_DASHBOARD_ROOM)
+
+def attendance_counters(attendance):
+    """Snapshot of the dashboard counters an attendance row contributes to"""
+    return {
+        'present': attendance.status == 'present',
+        'late': bool(attendance.is_late),
+        'overtime': (attendance.overtime_hours or 0) > 0,
+        'city': attendance.city
+    }
+
+def emit_attendance_deltas(event, attendance, user, before):
+    """Emit the dashboard deltas caused by an attendance change"""
+    after = attendance_counters(attendance)
+    base = {
+        'user_id': user.id,
+        'user_name': user.name,
+        'department': user.department,
+        'date': attendance.date.isoformat()
+    }
+    
+    emit_dashboard_event(event, dict(base,
+        status=attendance.status,
+        check_in=attendance.check_in.strftime('%H:%M') if attendance.check_in else None,
+        check_out=attendance.check_out.strftime('%H:%M') if attendance.check_out else None,
+        total_hours=round(attendance.total_hours or 0, 2),
+        present_delta=int(after['present']) - int(before['present'])))
+    
+    if after['late'] != before['late']:
+        emit_dashboard_event('late', dict(base, delta=1 if after['late'] else -1))
+    if after['overtime'] != before['overtime']:
+        emit_dashboard_event('overtime', dict(base,
+            delta=1 if after['overtime'] else -1,
+            overtime_hours=round(attendance.overtime_hours or 0, 2)))
+    if after['city'] != before['city']:
+        if before['city']:
+            emit_dashboard_event('city_count', dict(base, city=before['city'], delta=-1))
+        if after['city']:
+            emit_dashboard_event('city_count', dict(base, city=after['city'], delta=1))
+
+def emit_leave_status(leave, old_status):
+    """Emit a leave status transition for the dashboard leave widgets"""
+    today = date.today()
+    covers_today = leave.start_date <= today <= leave.end_date
+    emit_dashboard_event('leave_status', {
+        'leave_id': leave.id,
+        'user_id': leave.user_id,
+        'leave_type': leave.leave_type,
+        'old_status': old_status,
+        'new_status': leave.status,
+        'on_leave_delta': (int(covers_today and leave.status == 'approved') -
+                           int(covers_today and old_status == 'approved'))
+    })
+
+# ---------------- Chat Push Updates ----------------
+def get_unread_counts(user_id):
+    """Unread message counts for a user keyed by sender id"""
+    rows = db.session.query(Message.sender_id, db.func.count(Message.id)).filter(
+        Message.receiver_id == user_id,
+        Message.is_read == False
+    ).group_by(Message.sender_id).all()
+    return {sender_id: count for sender_id, count in rows}
+
+def push_unread_counts(user_id):
+    """Push the current unread counts to all of a user's open tabs"""
+    counts = get_unread_counts(user_id)
+    socketio.emit('unread_counts', {
+        'unread_counts': {str(sender_id): count for sender_id, count in counts.items()},
+        'unread_count': sum(counts.values())
+    }, room=f"user_{user_id}")
+
+def push_conversation_update(message):
+    """Tell both participants to move this conversation to the top"""
+    for owner_id, other_id in ((message.sender_id, message.receiver_id),
+                               (message.receiver_id, message.sender_id)):
+        socketio.emit('conversation_updated', {
+            'user_id': other_id,
+            'last_message': message.message,
+            'last_message_time': message.timestamp.isoformat() if message.timestamp else None
+        }, room=f"user_{owner_id}")
+
+def mark_conversation_read(reader_id, sender_id):
+    """Mark all messages from sender to reader as read, returns the number updated"""
+    updated = Message.query.filter_by(
+        sender_id=sender_id,
+        receiver_id=reader_id,
+        is_read=False
+    ).update({'is_read': True})
+    db.session.commit()
+    if updated:
+        push_unread_counts(reader_id)
+    return updated
@@ -0,0 +1,111 @@
+# tasks.py - Scheduled background jobs (backups, birthdays, presence flush, absences)
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, date, timedelta
+import schedule
+from extensions import db, presence
+from models import User
+from realtime import send_notification
+from utils.absences import backfill_absences
+
+_scheduler_started = False
+_scheduler_lock = threading.Lock()
+
+# ---------------- Database Backup System ----------------
+def backup_database(app):
+    """Create automated database backups"""
+    with app.app_context():
+        try:
+            backup_dir = app.config['BACKUP_FOLDER']
+            os.makedirs(backup_dir, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            backup_file = os.path.join(backup_dir, f"attendance_{timestamp}.db")
+            
+            shutil.copy2(db.engine.url.database, backup_file)
+            
+            # Keep only last 30 backups
+            backups = sorted([f for f in os.listdir(backup_dir) if f.endswith('.db')])
+            if len(backups) > 30:
+                for old_backup in backups[:-30]:
+                    os.remove(os.path.join(backup_dir, old_backup))
+            
+            app.logger.info(f"Database backup created: {backup_file}")
+        except Exception as e:
+            app.logger.error(f"Backup failed: {str(e)}")
+
+# ---------------- Presence Flush ----------------
+def flush_presence(app):
+    """Write buffered last_seen timestamps in a single batch"""
+    pending = presence.drain()
+    if not pending:
+        return
+    with app.app_context():
+        try:
+            db.session.execute(db.update(User), [
+                {'id': user_id, 'last_seen': seen} for user_id, seen in pending.items()
+            ])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            presence.restore(pending)  # retried on the next flush
+            app.logger.error(f"Presence flush failed: {str(e)}")
+
+# ---------------- Absence Marking ----------------
+def mark_absences_job(app):
+    """Write absent/week-off/on-leave rows for yesterday and the catch-up window"""
+    with app.app_context():
+        try:
+            start = date.today() - timedelta(days=max(1, app.config['ABSENCE_CATCHUP_DAYS']))
+            summary = backfill_absences(start)
+            app.logger.info(f"Absence marking: {summary['inserted']} rows added, {summary['updated']} restated "
+                            f"over {summary['days']} days")
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Absence marking failed: {str(e)}")
+
+# ---------------- Birthday Notification System ----------------
+def check_birthdays(app):
+    """Check and send birthday notifications"""
+    with app.app_context():
+        today = date.today()
+        birthday_users = User.query.filter(
+            db.extract('month', User.date_of_birth) == today.month,
+            db.extract('day', User.date_of_birth) == today.day,
+            User.is_active == True
+        ).all()
+        
+        for user in birthday_users:
+            send_notification(user.id, "🎉 Happy Birthday!", 
+                             f"Wishing you a fantastic birthday, {user.name}! Enjoy your special day!", 
+                             'birthday', 'high')
+            
+            # Notify admin about birthdays
+            admin = User.query.filter_by(role='admin').first()
+            if admin:
+                send_notification(admin.id, "Birthday Alert", 
+                                 f"Today is {user.name}'s birthday! 🎂", 
+                                 'birthday', 'normal')
+
+# ---------------- Scheduler ----------------
+def start_schedulers(app):
+    """Register the periodic jobs and start the scheduler thread (once per process)"""
+    global _scheduler_started
+    with _scheduler_lock:
+        if _scheduler_started:
+            return
+        _scheduler_started = True
+    
+    schedule.every().day.at("02:00").do(backup_database, app)
+    schedule.every().day.at("09:00").do(check_birthdays, app)
+    schedule.every().day.at(app.config['ABSENCE_JOB_TIME']).do(mark_absences_job, app)
+    schedule.every(app.config['PRESENCE_FLUSH_INTERVAL']).seconds.do(flush_presence, app)
+    
+    def run_scheduler():
+        while True:
+            schedule.run_pending()
+            time.sleep(1)
+    
+    thread = threading.Thread(target=run_scheduler, daemon=True)
+    thread.start()
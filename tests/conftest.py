@@ -0,0 +1,242 @@
+# tests/conftest.py - Seeded synthetic organisation and SQL statement recording
+#
+# The org is built once per session with bulk INSERTs so the suite stays fast
+# even at production-like sizes. Scale it with QUERY_BUDGET_USERS and
+# QUERY_BUDGET_DAYS.
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, time as dtime, timedelta
+
+import pytest
+from sqlalchemy import event, insert
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, init_db, create_admin_user
+from config import TestingConfig
+from extensions import db
+from models import User, Attendance, Leave, Message, Notification
+from utils.geohash import encode
+
+SEED_USERS = int(os.environ.get('QUERY_BUDGET_USERS', 500))
+SEED_DAYS = int(os.environ.get('QUERY_BUDGET_DAYS', 90))
+PASSWORD = 'password'
+DEPARTMENTS = ['Engineering', 'Sales', 'Support', 'Finance', 'HR', 'Operations']
+CITIES = ['Delhi', 'Mumbai', 'Bengaluru', 'Pune', 'Kolkata']
+LEAVE_TYPES = ['Sick Leave', 'Casual Leave', 'Earned Leave']
+
+class QueryRecorder:
+    """
+    Collects (statement, parameters, seconds) for every cursor execute while active
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self.elapsed = 0.0
+        self._started = None
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('budget_start', []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters, time.perf_counter() - conn.info['budget_start'].pop()))
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._before)
+        event.listen(self.engine, 'after_cursor_execute', self._after)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._started
+        event.remove(self.engine, 'before_cursor_execute', self._before)
+        event.remove(self.engine, 'after_cursor_execute', self._after)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def report(self, limit=40):
+        """Statements grouped by text, most repeated first"""
+        grouped = {}
+        for statement, _, seconds in self.statements:
+            key = ' '.join(statement.split())
+            total = grouped.setdefault(key, [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+        lines = [f"{self.count} statements, {self.elapsed * 1000:.0f} ms wall clock:"]
+        for key, (count, seconds) in sorted(grouped.items(), key=lambda item: -item[1][0])[:limit]:
+            lines.append(f"  {count:>5}x {seconds * 1000:8.1f} ms  {key[:300]}")
+        return '\n'.join(lines)
+
+def seed_org(users, days, seed=42):
+    """Employees across departments with attendance, leaves, chat and notifications"""
+    rng = random.Random(seed)
+    today = date.today()
+    password = generate_password_hash(PASSWORD, method='pbkdf2:sha256:1')
+
+    db.session.execute(insert(User), [{
+        'username': f'emp{i}', 'password': password, 'role': 'employee',
+        'name': f'Employee {i}', 'email': f'emp{i}@example.com',
+        'department': DEPARTMENTS[i % len(DEPARTMENTS)], 'designation': 'Employee',
+        'gender': rng.choice(['Male', 'Female']), 'is_active': True,
+        'date_of_birth': date(1985 + i % 15, 1 + i % 12, 1 + i % 28),
+        'week_off': 'Sunday', 'current_status': 'Available',
+        'created_at': datetime.combine(today - timedelta(days=days), dtime(9, 0))
+    } for i in range(users)])
+    user_ids = [row[0] for row in db.session.query(User.id).filter(User.role == 'employee').order_by(User.id)]
+
+    attendance = []
+    for offset in range(days, -1, -1):
+        day = today - timedelta(days=offset)
+        if day.weekday() == 6:
+            continue
+        for index, uid in enumerate(user_ids):
+            # emp0 has no punch today so check-in routes can run against it
+            if (offset == 0 and index == 0) or rng.random() < 0.08:
+                continue
+            check_in = dtime(9 if rng.random() < 0.8 else 10, rng.randrange(60))
+            check_out = None if offset == 0 else dtime(18 + rng.randrange(3), rng.randrange(60))
+            hours = 0.0 if check_out is None else round(check_out.hour - check_in.hour + (check_out.minute - check_in.minute) / 60 - 1, 2)
+            city = rng.choice(CITIES)
+            lat, lng = round(28 + rng.random(), 4), round(77 + rng.random(), 4)
+            attendance.append({
+                'user_id': uid, 'date': day, 'check_in': check_in,
+                'lunch_start': dtime(13, 0), 'lunch_end': dtime(14, 0), 'check_out': check_out,
+                'status': 'present', 'total_hours': hours, 'is_late': check_in >= dtime(10, 0),
+                'city': city, 'state': 'State', 'country': 'India',
+                'latitude': lat, 'longitude': lng, 'geohash': encode(lat, lng),
+                'extra_work_hours': max(0.0, hours - 9)
+            })
+    db.session.execute(insert(Attendance), attendance)
+
+    leaves = []
+    for uid in user_ids:
+        for _ in range(3):
+            start = today + timedelta(days=rng.randrange(-days, 30))
+            leaves.append({
+                'user_id': uid, 'start_date': start, 'end_date': start + timedelta(days=rng.randrange(3)),
+                'leave_type': rng.choice(LEAVE_TYPES), 'reason': 'Seeded',
+                'status': rng.choice(['pending', 'approved', 'approved', 'rejected']),
+                'applied_date': datetime.combine(start - timedelta(days=7), dtime(10, 0))
+            })
+    db.session.execute(insert(Leave), leaves)
+
+    now = datetime.now()
+    messages = []
+    for uid in user_ids:
+        for _ in range(10):
+            messages.append({
+                'sender_id': uid, 'receiver_id': rng.choice(user_ids), 'message': 'Seeded message',
+                'timestamp': now - timedelta(minutes=rng.randrange(days * 1440)), 'is_read': rng.random() < 0.7
+            })
+    db.session.execute(insert(Message), messages)
+
+    db.session.execute(insert(Notification), [{
+        'user_id': uid, 'title': 'Seeded', 'message': 'Seeded notification', 'type': 'info',
+        'is_read': rng.random() < 0.5, 'created_at': now - timedelta(hours=rng.randrange(days * 24))
+    } for uid in user_ids for _ in range(5)])
+    db.session.commit()
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app(TestingConfig)
+    init_db(app)
+    with app.app_context():
+        create_admin_user()
+        seed_org(SEED_USERS, SEED_DAYS)
+    return app
+
+@pytest.fixture(autouse=True)
+def offline_geocoder(monkeypatch):
+    """Punch routes must not reach Nominatim from the test suite"""
+    details = {'city': 'Delhi', 'state': 'Delhi', 'country': 'India', 'full_address': 'Delhi, India'}
+    monkeypatch.setattr('blueprints.attendance.get_location_details', lambda lat, lng: details)
+
+def _login(app, username, password):
+    client = app.test_client()
+    response = client.post('/login', data={'username': username, 'password': password})
+    assert response.status_code == 302, f"login failed for {username}"
+    return client
+
+@pytest.fixture
+def admin_client(app):
+    return _login(app, 'admin', 'Raushan@1234!')
+
+@pytest.fixture
+def employee_client(app):
+    return _login(app, 'emp0', PASSWORD)
+
+@pytest.fixture
+def new_employee(app):
+    """
+    Factory for an employee without history: (user id, logged-in client).
+    The users and every row referencing them are deleted afterwards, so the
+    seeded org the budgets are sized for stays unchanged.
+    """
+    created = []
+
+    def make(**fields):
+        username = f"fresh{len(created)}_{time.perf_counter_ns()}"
+        with app.app_context():
+            user = User(username=username, password=generate_password_hash(PASSWORD, 'pbkdf2:sha256:1'),
+                        role='employee', name=f'Fresh {username}', email=f'{username}@example.com', **fields)
+            db.session.add(user)
+            db.session.commit()
+            created.append(user.id)
+        return created[-1], _login(app, username, PASSWORD)
+    yield make
+    with app.app_context():
+        delete_users(created)
+
+def delete_users(user_ids):
+    """Delete users and every row referencing them, inside an app context"""
+    if not user_ids:
+        return
+    users = User.__table__
+    for table in reversed(db.metadata.sorted_tables):
+        for column in table.columns:
+            if table is not users and any(fk.references(users) for fk in column.foreign_keys):
+                db.session.execute(table.delete().where(column.in_(user_ids)))
+    db.session.execute(users.delete().where(users.c.id.in_(user_ids)))
+    db.session.commit()
+
+@pytest.fixture
+def restore_org(app):
+    """
+    Put the seeded database back as it was before the test, through
+    SQLite's backup API, and drop the app's caches built from it. For tests
+    that write to the shared org.
+    """
+    import sqlite3
+    with app.app_context():
+        db.session.remove()
+        raw = db.engine.raw_connection()
+        snapshot = sqlite3.connect(':memory:')
+        try:
+            raw.driver_connection.backup(snapshot)
+        finally:
+            raw.close()
+    yield
+    with app.app_context():
+        db.session.remove()
+        raw = db.engine.raw_connection()
+        try:
+            snapshot.backup(raw.driver_connection)
+        finally:
+            raw.close()
+            snapshot.close()
+    for cache in ('geofences', 'leave_stats', 'dashboard_panels'):
+        app.extensions.pop(cache, None)
+
+@pytest.fixture
+def record_queries(app):
+    """Context manager recording SQL issued inside it"""
+    with app.app_context():
+        engine = db.engine
+    return lambda: QueryRecorder(engine)
@@ -0,0 +1,42 @@
+# tests/test_absences.py - No-punch rows written by the absence job
+from datetime import date, datetime, timedelta, timezone
+
+from extensions import db
+from models import Attendance, Leave
+from utils.absences import mark_absences
+
+DAY = date.today() - timedelta(days=3)
+
+def _status(uid):
+    return db.session.query(Attendance.status).filter_by(user_id=uid, date=DAY).scalar()
+
+def test_absence_becomes_leave_once_approved(app, new_employee):
+    uid, _ = new_employee(week_off=(DAY + timedelta(days=1)).strftime('%A'),
+                          created_at=datetime.utcnow() - timedelta(days=10))
+    with app.app_context():
+        mark_absences(DAY)
+        assert _status(uid) == 'absent'
+
+        leave = Leave(user_id=uid, start_date=DAY, end_date=DAY, leave_type='Sick Leave', reason='late approval',
+                      status='approved')
+        db.session.add(leave)
+        db.session.commit()
+        assert mark_absences(DAY) == {'inserted': 0, 'updated': 1}
+        assert _status(uid) == 'on-leave'
+
+        # Reversing the approval restates the day again; punched days are never touched
+        leave.status = 'rejected'
+        db.session.commit()
+        assert mark_absences(DAY) == {'inserted': 0, 'updated': 1}
+        assert _status(uid) == 'absent'
+
+def test_creation_time_is_compared_in_utc(app, new_employee):
+    # Created in the last local minute of DAY, stored as UTC like every created_at
+    local = datetime.combine(DAY + timedelta(days=1), datetime.min.time()) - timedelta(minutes=1)
+    created = local.astimezone(timezone.utc).replace(tzinfo=None)
+    uid, _ = new_employee(created_at=created)
+    late_uid, _ = new_employee(created_at=created + timedelta(minutes=2))
+    with app.app_context():
+        mark_absences(DAY)
+        assert _status(uid) == 'absent'
+        assert _status(late_uid) is None
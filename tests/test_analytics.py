@@ -0,0 +1,38 @@
+# tests/test_analytics.py - Vectorised helpers of the attendance analytics against plain NumPy
+import numpy as np
+
+from utils.analytics import grouped_percentiles, rolling_sum, time_seconds
+
+def test_grouped_percentiles_match_np_percentile_per_group():
+    rng = np.random.default_rng(3)
+    groups = rng.integers(0, 6, 400)
+    values = rng.normal(32400, 1800, 400)
+    values[rng.random(400) < 0.1] = np.nan
+    groups[groups == 4] = 5  # group 4 is empty
+    percentiles = (10, 50, 90, 100)
+
+    result = grouped_percentiles(groups, values, 7, percentiles)
+    assert result.shape == (4, 7)
+    for group in range(7):
+        members = values[(groups == group) & ~np.isnan(values)]
+        if members.size:
+            np.testing.assert_allclose(result[:, group], np.percentile(members, percentiles))
+        else:
+            assert np.isnan(result[:, group]).all()
+
+def test_grouped_percentiles_single_value_group():
+    result = grouped_percentiles(np.array([0, 1, 1]), np.array([5.0, 1.0, 3.0]), 2, (0, 50, 100))
+    np.testing.assert_allclose(result, [[5.0, 1.0], [5.0, 2.0], [5.0, 3.0]])
+
+def test_rolling_sum_matches_a_trailing_window():
+    values = np.arange(1, 11, dtype=float)
+    expected = [values[max(0, i - 2):i + 1].sum() for i in range(10)]
+    np.testing.assert_allclose(rolling_sum(values, 3), expected)
+    np.testing.assert_allclose(rolling_sum(values, 1), values)
+    np.testing.assert_allclose(rolling_sum(values, 50), np.cumsum(values))
+
+def test_time_seconds_parses_fixed_width_text():
+    parsed = time_seconds(['09:30:15', None, '23:59:59.500000'], dtype=np.float64, fractions=True)
+    assert parsed[0] == 9 * 3600 + 30 * 60 + 15
+    assert np.isnan(parsed[1])
+    assert parsed[2] == 86399.5
@@ -0,0 +1,37 @@
+# tests/test_dashboard.py - Admin dashboard panel cache and HTTP revalidation
+import pytest
+
+@pytest.fixture
+def cached_panels(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'DASHBOARD_CACHE_TTL', 300)
+    yield
+    app.extensions.pop('dashboard_panels', None)
+
+def _summary(client):
+    return client.get('/admin/api/dashboard/summary').get_json()
+
+def test_punch_drops_cached_panels(cached_panels, admin_client, new_employee):
+    before = _summary(admin_client)
+    _, employee = new_employee()
+    assert _summary(admin_client) == before  # a new user alone sends no delta: still cached
+
+    response = employee.post('/mark_attendance', json={'action': 'check_in', 'latitude': '28.6', 'longitude': '77.2'})
+    assert response.get_json()['success']
+    after = _summary(admin_client)
+    assert after['present_today'] == before['present_today'] + 1
+    assert after['total_users'] == before['total_users'] + 1
+
+def test_leave_application_drops_cached_panels(app, cached_panels, admin_client, new_employee):
+    before = _summary(admin_client)
+    _, employee = new_employee()
+    response = employee.post('/apply_leave', data={
+        'leave_type': 'Sick Leave', 'start_date': '2031-03-03', 'end_date': '2031-03-04', 'reason': 'test'
+    })
+    assert response.status_code < 400
+    assert _summary(admin_client)['pending_leaves'] == before['pending_leaves'] + 1
+
+def test_panel_revalidates_by_etag(admin_client):
+    response = admin_client.get('/admin/api/dashboard/departments')
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    again = admin_client.get('/admin/api/dashboard/departments', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
@@ -0,0 +1,44 @@
+# tests/test_entry_point.py - Serving entry point together with the spawned login hashing pool
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs wsgi.py as __main__, the way `python wsgi.py` does, with socketio.run
+# replaced by a login hash through the pool. Pool processes re-import wsgi.py.
+SCRIPT = f"""
+import json, runpy, sys
+from gevent import monkey
+monkey.patch_all()
+sys.path[:0] = [{REPO_ROOT!r}, {os.path.join(REPO_ROOT, 'tests')!r}]
+from extensions import socketio
+
+def run(app, **kwargs):
+    from werkzeug.security import generate_password_hash
+    from utils.hashing import login_pool, verify_password
+    from test_entry_point import loaded_modules
+    method = 'pbkdf2:sha256:1'
+    matches, _ = verify_password(generate_password_hash('secret', method), 'secret', method, timeout=60)
+    modules = login_pool.submit(loaded_modules, ['app', 'apscheduler', 'gevent', 'flask']).result(60)
+    print(json.dumps({{'matches': matches, 'worker_modules': modules}}), flush=True)
+
+socketio.run = run
+runpy.run_path({os.path.join(REPO_ROOT, 'wsgi.py')!r}, run_name='__main__')
+"""
+
+def loaded_modules(names):
+    """Run inside a pool process: which of `names` it has imported"""
+    return [name for name in names if name in sys.modules]
+
+def test_wsgi_main_with_login_pool(tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'app.db'}", LOGIN_HASH_POOL='1',
+               LOGIN_HASH_WORKERS='1', LOG_DIR=str(tmp_path / 'logs'))
+    result = subprocess.run([sys.executable, '-c', SCRIPT], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-3000:]
+    outcome = json.loads(result.stdout.strip().splitlines()[-1])
+    assert outcome['matches'] is True
+    # The pool process re-imported wsgi.py without building or bootstrapping the app
+    assert outcome['worker_modules'] == []
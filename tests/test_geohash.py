@@ -0,0 +1,53 @@
+# tests/test_geohash.py - Geohash encoding, prefix ranges and the text coordinate migration
+from flask import Flask
+from sqlalchemy import text
+
+from app import init_db
+from extensions import db
+from models import KioskDevice
+from utils.geohash import BASE32, encode, encode_or_none, prefix_bounds
+
+def test_encode_known_vectors():
+    assert encode(57.64911, 10.40744, 9) == 'u4pruydqq'
+    assert encode(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+    assert encode(42.6, -5.6, 5) == 'ezs42'
+    assert encode(-25.382708, -49.265506, 8) == '6gkzwgjz'
+    assert encode_or_none('57.64911', '10.40744', 9) == 'u4pruydqq'
+    assert encode_or_none('91', '0') is None
+
+def test_prefix_bounds_cover_exactly_the_prefix():
+    assert prefix_bounds('u4pru') == ('u4pru', 'u4prv')
+    assert prefix_bounds('u4pz') == ('u4pz', 'u4q')
+    assert prefix_bounds('zz') == ('zz', None)
+    low, high = prefix_bounds('u4pr')
+    inside, outside = encode(57.64911, 10.40744), encode(57.7, 10.6)
+    assert low <= inside < high and inside.startswith('u4pr')
+    assert not outside.startswith('u4pr') and not low <= outside < high
+    for char in BASE32:
+        assert low <= 'u4pr' + char < high
+
+def test_migrate_coordinates_of_a_legacy_database(tmp_path):
+    legacy = Flask(__name__)
+    legacy.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'legacy.db'}")
+    db.init_app(legacy)
+    with legacy.app_context():
+        # Tables as they were when coordinates were stored as text
+        with db.engine.begin() as connection:
+            connection.execute(text("CREATE TABLE attendance (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+                                    "date DATE NOT NULL, latitude VARCHAR(50), longitude VARCHAR(50))"))
+            connection.execute(text("INSERT INTO attendance (user_id, date, latitude, longitude) VALUES "
+                                    "(1, '2024-01-02', '57.64911', '10.40744'), (1, '2024-01-03', 'abc', '1'), "
+                                    "(1, '2024-01-04', NULL, NULL)"))
+            connection.execute(text("CREATE TABLE kiosk_device (id INTEGER PRIMARY KEY, name VARCHAR(120) NOT NULL, "
+                                    "token_hash VARCHAR(64) NOT NULL, latitude VARCHAR(50), longitude VARCHAR(50))"))
+            connection.execute(text("INSERT INTO kiosk_device (name, token_hash, latitude, longitude) VALUES "
+                                    "('Gate', 'digest', ' 28.61 ', '77.2')"))
+    init_db(legacy)
+    with legacy.app_context():
+        rows = db.session.execute(text("SELECT lat, lng, geohash FROM attendance ORDER BY id")).all()
+        assert [tuple(row) for row in rows] == [(57.64911, 10.40744, 'u4pruydqq'), (None, None, None),
+                                                (None, None, None)]
+        device = KioskDevice.query.filter_by(name='Gate').one()
+        assert (device.latitude, device.longitude) == (28.61, 77.2)
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,88 @@
+# tests/test_geolocation.py - Rate limiting, caching and single-flight in the geocoding gateway
+import threading
+import time
+
+import pytest
+
+from utils.geolocation import GeocodingGateway, TokenBucket
+
+ADDRESS = {'city': 'Delhi', 'state': 'Delhi', 'country': 'India'}
+
+class FakeUpstream:
+    """Records calls; blocks each one until `release` is set"""
+
+    def __init__(self, result=ADDRESS, error=None):
+        self.result, self.error = result, error
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, lat, lng, timeout):
+        self.calls.append((lat, lng))
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return self.result
+
+def test_token_bucket_spaces_reservations_in_order():
+    bucket = TokenBucket(rate=10.0, capacity=2)
+    deadline = time.monotonic() + 10
+    waits = [bucket.reserve(deadline) for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.02)
+    assert waits[3] == pytest.approx(0.2, abs=0.02)
+
+def test_token_bucket_refuses_a_reservation_past_the_deadline():
+    bucket = TokenBucket(rate=1.0, capacity=1)
+    assert bucket.reserve(time.monotonic() + 10) == 0.0
+    assert bucket.reserve(time.monotonic() + 0.5) is None  # next token is a second away
+    assert bucket.reserve(time.monotonic() + 10) == pytest.approx(1.0, abs=0.05)  # the refusal used nothing
+
+def test_nearby_points_snap_to_one_cached_lookup():
+    upstream = FakeUpstream()
+    gateway = GeocodingGateway(upstream, rate=100, burst=10, snap_decimals=3)
+    assert gateway.lookup(28.61391, 77.20902) == ADDRESS
+    assert gateway.lookup(28.61412, 77.20948) == ADDRESS  # same 0.001 degree cell
+    assert upstream.calls == [(28.614, 77.209)]
+    assert gateway.metrics()['cache_hits'] == 1
+
+def test_concurrent_lookups_share_one_upstream_call():
+    upstream = FakeUpstream()
+    upstream.release.clear()
+    gateway = GeocodingGateway(upstream, rate=100, burst=10)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gateway.lookup(28.6139, 77.2090))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while gateway.metrics()['coalesced'] < 4:
+        time.sleep(0.01)
+    upstream.release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [ADDRESS] * 5
+    assert len(upstream.calls) == 1
+    assert gateway.metrics()['upstream_calls'] == 1
+
+def test_full_queue_rejects_instead_of_waiting():
+    upstream = FakeUpstream()
+    gateway = GeocodingGateway(upstream, rate=5, burst=1, max_queue=1)
+    assert gateway.lookup(10.0, 10.0) == ADDRESS  # spends the only token
+    waiting = threading.Thread(target=gateway.lookup, args=(20.0, 20.0))
+    waiting.start()  # queued for the next token, about 0.2 s
+    while gateway.metrics()['queue_depth'] < 1:
+        time.sleep(0.005)
+    assert gateway.lookup(30.0, 30.0) is None
+    waiting.join()
+    metrics = gateway.metrics()
+    assert metrics['rejected'] == 1
+    assert metrics['upstream_calls'] == 2
+
+def test_upstream_failures_are_counted():
+    failing = GeocodingGateway(FakeUpstream(error=ConnectionError('refused')), rate=100, burst=10)
+    with pytest.raises(ConnectionError):
+        failing.lookup(28.6, 77.2)
+    empty = GeocodingGateway(FakeUpstream(result=None), rate=100, burst=10)
+    assert empty.lookup(28.6, 77.2) is None
+    assert failing.metrics()['upstream_errors'] == 1
+    assert empty.metrics()['upstream_errors'] == 1
+    assert failing.metrics()['in_flight'] == 0  # the failed flight was cleared
@@ -0,0 +1,58 @@
+# tests/test_leave_calendar.py - Leave calendar headcounts and overlapping leave applications
+from datetime import date, timedelta
+
+from extensions import db
+from models import Leave
+from utils.leave_calendar import LeaveCalendar, find_conflict
+
+START = date(2031, 3, 1)
+
+def _calendar(*leaves, days=10):
+    """A calendar over START and the next `days` - 1 days from (user, department, first, last, status) tuples"""
+    rows = [{'id': i, 'user_id': user, 'name': f'User {user}', 'department': dept, 'leave_type': 'Casual Leave',
+             'status': status, 'start_date': (START + timedelta(days=first)).isoformat(),
+             'end_date': (START + timedelta(days=last)).isoformat(), 'first': first, 'last': last}
+            for i, (user, dept, first, last, status) in enumerate(sorted(leaves, key=lambda leave: leave[:3]))]
+    return LeaveCalendar(START, START + timedelta(days=days - 1), rows, sorted({row['department'] for row in rows}))
+
+def test_same_day_leave_counts_one_day():
+    assert _calendar((1, 'Sales', 3, 3, 'approved'), days=5).headcount()['total'] == [0, 0, 0, 1, 0]
+
+def test_adjacent_and_overlapping_leaves_of_different_users():
+    calendar = _calendar((1, 'Sales', 0, 2, 'approved'), (2, 'Sales', 3, 4, 'approved'),
+                         (3, 'Sales', 2, 3, 'pending'), days=6)
+    assert calendar.headcount() == {'approved': [1, 1, 1, 1, 1, 0], 'pending': [0, 0, 1, 1, 0, 0],
+                                    'total': [1, 1, 2, 2, 1, 0]}
+
+def test_one_user_with_overlapping_leaves_counts_once():
+    calendar = _calendar((1, 'Sales', 0, 3, 'approved'), (1, 'Sales', 2, 5, 'pending'),
+                         (1, 'Sales', 6, 6, 'approved'), days=8)
+    assert calendar.headcount()['total'] == [1, 1, 1, 1, 1, 1, 1, 0]
+    assert calendar.by_department()['Sales']['approved'] == [1, 1, 1, 1, 0, 0, 1, 0]
+
+def test_over_limit_only_above_the_threshold():
+    calendar = _calendar((1, 'Sales', 0, 1, 'approved'), (2, 'Sales', 1, 2, 'approved'),
+                         (3, 'Sales', 1, 1, 'pending'), (4, 'Support', 1, 1, 'approved'), days=3)
+    assert calendar.over_limit(3) == []
+    assert calendar.over_limit(2) == [{'date': '2031-03-02', 'department': 'Sales', 'off': 3}]
+    assert calendar.over_limit(2, ('approved',)) == []
+
+def _apply(client, start, end):
+    return client.post('/apply_leave', data={'leave_type': 'Casual Leave', 'start_date': start.isoformat(),
+                                             'end_date': end.isoformat(), 'reason': 'test'}, follow_redirects=True)
+
+def test_apply_leave_rejects_overlap_with_approved_leave(app, new_employee):
+    uid, client = new_employee()
+    with app.app_context():
+        db.session.add(Leave(user_id=uid, start_date=START, end_date=START + timedelta(days=2),
+                             leave_type='Casual Leave', reason='approved', status='approved'))
+        db.session.commit()
+
+    response = _apply(client, START + timedelta(days=2), START + timedelta(days=4))
+    assert b'You already have approved leaves for the selected dates' in response.data
+    response = _apply(client, START + timedelta(days=3), START + timedelta(days=4))
+    assert b'Leave applied successfully' in response.data
+    with app.app_context():
+        assert Leave.query.filter_by(user_id=uid).count() == 2
+        assert find_conflict(uid, START - timedelta(days=1), START).reason == 'approved'
+        assert find_conflict(uid, START + timedelta(days=3), START + timedelta(days=3)) is None  # still pending
@@ -0,0 +1,125 @@
+# tests/test_leave_ledger.py - Leave ledger entries, balance snapshots and their rebuild
+from datetime import date
+
+import pytest
+
+import utils.leave_ledger as leave_ledger
+from extensions import db
+from models import Leave, LeaveBalance, LeaveLedgerEntry, Notification
+from utils.leave_ledger import ACCRUAL, ADJUSTMENT, CONSUMPTION, post_entry, rebuild_balances
+
+YEAR = 2031
+
+@pytest.fixture
+def ledger_years(app):
+    """The test years' ledger and snapshots are dropped afterwards, including rebuilt ones of seeded users"""
+    yield
+    with app.app_context():
+        for model in (LeaveLedgerEntry, LeaveBalance):
+            model.query.filter(model.year >= YEAR).delete()
+        db.session.commit()
+
+@pytest.fixture
+def employee_leave(app, new_employee, ledger_years):
+    """Factory for a pending leave of a fresh employee: (user id, leave id)"""
+    def make(start, end, leave_type='Sick Leave'):
+        uid, _ = new_employee()
+        with app.app_context():
+            leave = Leave(user_id=uid, start_date=start, end_date=end, leave_type=leave_type, reason='test',
+                          status='pending')
+            db.session.add(leave)
+            db.session.commit()
+            return uid, leave.id
+    return make
+
+def _decide(client, leave_id, action):
+    return client.post('/admin/leave_action', data={'leave_id': leave_id, 'action': action})
+
+def _balances(app, uid):
+    """{(type, year): (accrued, used, adjusted)} from the snapshots"""
+    with app.app_context():
+        return {(balance.leave_type, balance.year): (balance.accrued, balance.used, balance.adjusted)
+                for balance in LeaveBalance.query.filter_by(user_id=uid)}
+
+def test_rejecting_an_approved_leave_gives_the_days_back(app, admin_client, employee_leave):
+    uid, leave_id = employee_leave(date(YEAR, 3, 3), date(YEAR, 3, 5))
+    response = _decide(admin_client, leave_id, 'approve')
+    assert response.json['balance'] == [{'year': YEAR, 'available': 9.0}]
+    response = _decide(admin_client, leave_id, 'reject')
+    assert response.json['balance'] == [{'year': YEAR, 'available': 12.0}]
+    assert _balances(app, uid) == {('Sick Leave', YEAR): (12.0, 0.0, 0.0)}
+    with app.app_context():
+        assert sorted(days for days, in db.session.query(LeaveLedgerEntry.days).filter_by(
+            user_id=uid, leave_id=leave_id)) == [-3.0, 3.0]
+
+def test_leave_across_new_year_is_split_per_year(app, admin_client, employee_leave):
+    uid, leave_id = employee_leave(date(YEAR, 12, 30), date(YEAR + 1, 1, 2))
+    response = _decide(admin_client, leave_id, 'approve')
+    assert response.json['balance'] == [{'year': YEAR, 'available': 10.0}, {'year': YEAR + 1, 'available': 10.0}]
+    assert _balances(app, uid) == {('Sick Leave', YEAR): (12.0, 2.0, 0.0), ('Sick Leave', YEAR + 1): (12.0, 2.0, 0.0)}
+
+def test_rebuild_matches_incremental_snapshots(app, admin_client, employee_leave):
+    uid, first = employee_leave(date(YEAR, 2, 2), date(YEAR, 2, 6))
+    _, second = employee_leave(date(YEAR, 12, 31), date(YEAR + 1, 1, 1), 'Vacation')
+    for leave_id in (first, second):
+        assert _decide(admin_client, leave_id, 'approve').json['success']
+    with app.app_context():
+        post_entry(uid, 'Sick Leave', YEAR, ADJUSTMENT, 1.5, note='Carried over')
+        db.session.commit()
+    incremental = _balances(app, uid)
+    assert incremental[('Sick Leave', YEAR)] == (12.0, 5.0, 1.5)
+
+    with app.app_context():
+        rebuild_balances(YEAR)
+    rebuilt = _balances(app, uid)
+    # Entitlements the user never drew on gain a snapshot; the others match
+    assert {key: rebuilt[key] for key in incremental} == incremental
+    assert rebuilt[('Personal Leave', YEAR)] == (5.0, 0.0, 0.0)
+
+def test_approval_over_the_balance_is_refused(app, admin_client, employee_leave):
+    _, leave_id = employee_leave(date(YEAR, 5, 1), date(YEAR, 5, 13))
+    response = _decide(admin_client, leave_id, 'approve')
+    assert response.status_code == 400
+    assert response.json['message'] == 'Leave exceeds the available Sick Leave balance by 1 days'
+    with app.app_context():
+        assert db.session.get(Leave, leave_id).status == 'pending'
+        assert LeaveLedgerEntry.query.filter_by(leave_id=leave_id).count() == 0
+
+    # Types without an entitlement are not limited
+    _, leave_id = employee_leave(date(YEAR, 5, 1), date(YEAR, 5, 13), 'Casual Leave')
+    assert _decide(admin_client, leave_id, 'approve').json['success']
+
+def test_approval_over_next_years_balance_is_refused(app, admin_client, employee_leave):
+    _, leave_id = employee_leave(date(YEAR, 12, 31), date(YEAR + 1, 1, 13))
+    response = _decide(admin_client, leave_id, 'approve')
+    assert response.status_code == 400
+    assert response.json['message'] == 'Leave exceeds the available Sick Leave balance by 1 days'
+
+def test_failed_ledger_posting_leaves_the_decision_uncommitted(app, admin_client, employee_leave, monkeypatch):
+    uid, leave_id = employee_leave(date(YEAR, 3, 3), date(YEAR, 3, 5))
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('ledger unavailable')
+    monkeypatch.setattr('blueprints.leaves.record_decision', fail)
+    with pytest.raises(RuntimeError):
+        _decide(admin_client, leave_id, 'approve')
+    with app.app_context():
+        assert db.session.get(Leave, leave_id).status == 'pending'
+        assert Notification.query.filter_by(user_id=uid).count() == 0
+
+def test_snapshot_opened_concurrently_is_reused(app, new_employee, ledger_years, monkeypatch):
+    uid, _ = new_employee()
+    entitlements = leave_ledger.entitlements
+
+    def open_elsewhere():
+        # Runs between the snapshot lookup and its insert, like a decision committed in between
+        db.session.execute(LeaveBalance.__table__.insert().values(
+            user_id=uid, leave_type='Sick Leave', year=YEAR, accrued=12.0, used=2.0, adjusted=0.0))
+        monkeypatch.setattr(leave_ledger, 'entitlements', entitlements)
+        return entitlements()
+    monkeypatch.setattr(leave_ledger, 'entitlements', open_elsewhere)
+    with app.app_context():
+        post_entry(uid, 'Sick Leave', YEAR, CONSUMPTION, -3.0)
+        db.session.commit()
+        assert LeaveLedgerEntry.query.filter_by(user_id=uid, kind=ACCRUAL).count() == 0
+    assert _balances(app, uid) == {('Sick Leave', YEAR): (12.0, 5.0, 0.0)}
@@ -0,0 +1,65 @@
+# tests/test_leave_stats.py - Leave cube month split, rollups and cache invalidation
+from datetime import date
+
+import pytest
+
+from extensions import db
+from models import Leave
+from utils.leave_stats import LeaveCube, leave_cube
+
+DEPARTMENT = 'Cube Test'
+
+@pytest.fixture
+def cube_leaves(app, new_employee):
+    """Leaves of a fresh employee in their own department, from (start, end, type, status) tuples"""
+    def make(*leaves):
+        uid, client = new_employee(department=DEPARTMENT)
+        with app.app_context():
+            db.session.add_all(Leave(user_id=uid, start_date=start, end_date=end, leave_type=leave_type,
+                                     reason='test', status=status) for start, end, leave_type, status in leaves)
+            db.session.commit()
+        return client
+    yield make
+    app.extensions.pop('leave_stats', None)
+
+def test_days_are_split_over_the_months_they_fall_in(app, cube_leaves):
+    cube_leaves((date(2031, 1, 30), date(2031, 3, 2), 'Sick Leave', 'approved'),
+                (date(2031, 2, 10), date(2031, 2, 12), 'Sick Leave', 'approved'),
+                (date(2031, 12, 31), date(2032, 1, 1), 'Vacation', 'approved'),
+                (date(2032, 2, 28), date(2032, 3, 1), 'Vacation', 'pending'))
+    with app.app_context():
+        cube = LeaveCube.load()
+    assert cube.rollup('month', department=DEPARTMENT) == {
+        '2031-01': {'count': 1, 'days': 2}, '2031-02': {'count': 1, 'days': 31}, '2031-03': {'count': 0, 'days': 2},
+        '2031-12': {'count': 1, 'days': 1}, '2032-01': {'count': 0, 'days': 1},
+        '2032-02': {'count': 1, 'days': 2}, '2032-03': {'count': 0, 'days': 1},
+    }
+    assert cube.rollup('status', department=DEPARTMENT) == {'approved': {'count': 3, 'days': 37},
+                                                            'pending': {'count': 1, 'days': 3}}
+
+def test_rollup_groups_and_filters():
+    cube = LeaveCube([('Sick Leave', 'approved', '2031-01', 'Sales', 2, 5),
+                      ('Sick Leave', 'pending', '2031-01', 'Sales', 1, 1),
+                      ('Vacation', 'approved', '2031-02', 'Support', 1, 4),
+                      ('Vacation', 'approved', '2031-01', 'Sales', 1, 2)])
+    assert cube.rollup('leave_type', 'month', status='approved') == {
+        ('Sick Leave', '2031-01'): {'count': 2, 'days': 5}, ('Vacation', '2031-01'): {'count': 1, 'days': 2},
+        ('Vacation', '2031-02'): {'count': 1, 'days': 4}}
+    assert cube.rollup('department', month=['2031-01'], status=None) == {'Sales': {'count': 4, 'days': 8}}
+    assert cube.rollup('status', leave_type='Holiday') == {}
+    assert cube.values('month') == ['2031-01', '2031-02']
+
+def test_leave_changes_rebuild_the_cached_cube(app, monkeypatch, admin_client, cube_leaves):
+    monkeypatch.setitem(app.config, 'LEAVE_STATS_TTL', 3600)
+    employee = cube_leaves()
+    stats = lambda: admin_client.get(f'/admin/api/leave_stats?group=status&department={DEPARTMENT}').json['rows']
+    assert stats() == []
+    with app.test_request_context():
+        cached = leave_cube()
+
+    response = employee.post('/apply_leave', data={'leave_type': 'Vacation', 'start_date': '2031-04-29',
+                                                   'end_date': '2031-05-02', 'reason': 'test'})
+    assert response.status_code == 302
+    assert stats() == [{'status': 'pending', 'count': 1, 'days': 4}]
+    with app.test_request_context():
+        assert leave_cube() is not cached
@@ -0,0 +1,56 @@
+# tests/test_location_map.py - Geohash clusters of the attendance map against a plain grouping
+from datetime import date, time
+
+import pytest
+
+from extensions import db
+from models import Attendance
+from utils.geohash import encode, precision_for_zoom
+from utils.location_map import location_clusters, location_features
+
+DAY = date(2031, 6, 2)
+# Two groups about 1 km apart in Delhi, one point in Mumbai, and whether each punch was late
+PUNCHES = [(28.6139, 77.2090, False), (28.6141, 77.2093, True), (28.6150, 77.2101, False),
+           (28.6239, 77.2190, True), (28.6241, 77.2188, False), (19.0760, 72.8777, True)]
+
+@pytest.fixture
+def punches(app, new_employee):
+    with app.app_context():
+        for latitude, longitude, late in PUNCHES:
+            uid, _ = new_employee()
+            db.session.add(Attendance(user_id=uid, date=DAY, check_in=time(10, 30) if late else time(9),
+                                      status='present', is_late=late, latitude=latitude, longitude=longitude,
+                                      geohash=encode(latitude, longitude)))
+        db.session.commit()
+    return PUNCHES
+
+def _expected(points, zoom):
+    """The clusters computed directly from the points"""
+    cells = {}
+    for latitude, longitude, late in points:
+        cells.setdefault(encode(latitude, longitude)[:precision_for_zoom(zoom)], []).append((latitude, longitude, late))
+    return {cell: (len(members), sum(late for _, _, late in members),
+                   pytest.approx([sum(lng for _, lng, _ in members) / len(members),
+                                  sum(lat for lat, _, _ in members) / len(members)], abs=1e-6))
+            for cell, members in cells.items()}
+
+@pytest.mark.parametrize('zoom', [3, 9, 13])
+def test_clusters_match_plain_grouping(app, punches, zoom):
+    with app.app_context():
+        clusters = location_clusters(DAY, zoom)
+    assert all(feature['properties']['cluster'] for feature in clusters)
+    assert {feature['properties']['cell']: (feature['properties']['point_count'], feature['properties']['late_count'],
+                                            feature['geometry']['coordinates']) for feature in clusters} == \
+        _expected(punches, zoom)
+
+def test_clusters_within_bbox(app, punches):
+    with app.app_context():
+        clusters = location_clusters(DAY, 13, bbox=(77.0, 28.0, 78.0, 29.0))
+    assert sum(feature['properties']['point_count'] for feature in clusters) == 5
+    assert len(clusters) == len(_expected(punches[:5], 13)) == 2
+
+def test_points_from_cluster_max_zoom(app, punches):
+    with app.app_context():
+        points = list(location_features(DAY, 14, bbox=(72.0, 18.0, 73.0, 20.0)))
+    assert [point['geometry']['coordinates'] for point in points] == [[72.8777, 19.0760]]
+    assert points[0]['properties']['is_late'] is True
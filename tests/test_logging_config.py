@@ -0,0 +1,37 @@
+# tests/test_logging_config.py - JSON log lines written through the queue listener
+import atexit
+import json
+
+from flask import Flask
+
+import utils.logging_config as logging_config
+
+def _log_lines(tmp_path, monkeypatch, emit):
+    monkeypatch.setattr(logging_config, 'LOG_DIR', str(tmp_path))
+    app = Flask('logging_test')
+    listener = logging_config.setup_logging(app)
+    with app.test_request_context('/punch', method='POST'):
+        emit(app.logger)
+    listener.stop()  # drains the queue
+    atexit.unregister(listener.stop)
+    with open(tmp_path / 'attendance.log') as stream:
+        return [json.loads(line) for line in stream]
+
+def test_exception_is_a_separate_field(tmp_path, monkeypatch):
+    def emit(logger):
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception("Punch failed for %s", 'emp1')
+
+    [entry] = _log_lines(tmp_path, monkeypatch, emit)
+    assert entry['message'] == 'Punch failed for emp1'
+    assert entry['level'] == 'ERROR'
+    assert entry['exception'].startswith('Traceback (most recent call last)')
+    assert entry['exception'].rstrip().endswith('ZeroDivisionError: division by zero')
+    assert (entry['method'], entry['path']) == ('POST', '/punch')
+
+def test_plain_records_have_no_exception(tmp_path, monkeypatch):
+    [entry] = _log_lines(tmp_path, monkeypatch, lambda logger: logger.info("Attendance system startup"))
+    assert entry['message'] == 'Attendance system startup'
+    assert 'exception' not in entry
@@ -0,0 +1,16 @@
+# tests/test_metrics.py - Prometheus exposition of the /metrics endpoint
+from instrumentation import metrics
+
+def _types(text):
+    return dict(line.split()[2:4] for line in text.splitlines() if line.startswith('# TYPE'))
+
+def test_geocoder_totals_are_counters(admin_client, monkeypatch):
+    monkeypatch.setattr(metrics, 'enabled', True)
+    types = _types(admin_client.get('/metrics').get_data(as_text=True))
+    for name in ('requests', 'cache_hits', 'upstream_calls', 'upstream_errors', 'rejected', 'queue_wait_seconds'):
+        assert types[f'geocoder_{name}_total'] == 'counter'
+    for name in ('queue_depth', 'in_flight', 'cache_entries', 'queue_wait_seconds_max'):
+        assert types[f'geocoder_{name}'] == 'gauge'
+    assert types['presence_online_users'] == 'gauge'
+    assert not any(name.startswith('geocoder_') and name.endswith('_total') and kind != 'counter'
+                   for name, kind in types.items())
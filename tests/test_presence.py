@@ -0,0 +1,57 @@
+# tests/test_presence.py - Connection counting and last_seen buffering in PresenceTracker
+import tasks
+from extensions import db, presence
+from utils.presence import PresenceTracker
+
+def test_online_until_last_connection_closes():
+    tracker = PresenceTracker()
+    assert tracker.connect(1) is True
+    assert tracker.connect(1) is False  # second tab
+    assert tracker.disconnect(1) is False
+    assert tracker.is_online(1)
+    assert tracker.disconnect(1) is True
+    assert not tracker.is_online(1)
+    assert tracker.online_user_ids() == set()
+
+def test_untracked_disconnect_is_not_an_offline_transition():
+    tracker = PresenceTracker()
+    assert tracker.disconnect(7) is False  # e.g. a socket opened before a restart
+    tracker.connect(7)
+    assert tracker.disconnect(7) is True
+    assert tracker.disconnect(7) is False  # duplicate disconnect
+    tracker.connect(7)
+    assert tracker.is_online(7)  # the count did not go negative
+
+def test_last_seen_is_buffered_until_drained():
+    tracker = PresenceTracker()
+    tracker.connect(1)
+    tracker.touch(2)
+    tracker.disconnect(3)
+    assert tracker.last_seen(1) is not None
+    assert set(tracker.drain()) == {1, 2, 3}
+    assert tracker.drain() == {}
+    assert tracker.last_seen(1) is None
+    assert tracker.is_online(1)
+
+def test_restored_updates_keep_the_newer_timestamp():
+    tracker = PresenceTracker()
+    tracker.connect(1)
+    tracker.connect(2)
+    pending = tracker.drain()
+    tracker.touch(2)  # activity while the failed write was running
+    newer = tracker.last_seen(2)
+    tracker.restore(pending)
+    assert tracker.drain() == {1: pending[1], 2: newer}
+
+def test_failed_flush_puts_updates_back(app, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('database is locked')
+    presence.drain()
+    presence.touch(1)
+    seen = presence.last_seen(1)
+    with monkeypatch.context() as patch:
+        patch.setattr(db.session, 'execute', fail)
+        tasks.flush_presence(app)
+    assert presence.last_seen(1) == seen
+    tasks.flush_presence(app)
+    assert presence.last_seen(1) is None
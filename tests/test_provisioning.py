@@ -0,0 +1,56 @@
+# tests/test_provisioning.py - Duplicate handling in CSV user provisioning
+import io
+
+import pytest
+
+import utils.provisioning as provisioning
+from conftest import delete_users
+from extensions import db
+from models import User
+
+HEADER = 'name,username,email,password,department\n'
+
+@pytest.fixture
+def provision(app):
+    """provision_users on CSV lines, inside an app context; created users are removed afterwards"""
+    with app.app_context():
+        yield lambda *lines: provisioning.provision_users(io.StringIO(HEADER + ''.join(lines)))
+        delete_users([uid for uid, in db.session.query(User.id).filter(User.username.like('prov%'))])
+
+def test_existing_users_match_exactly(provision):
+    summary = provision('Same Name,emp1,new1@example.com,pw,Sales\n',
+                        'Same Email,prov_a,emp2@example.com,pw,Sales\n',
+                        'Fresh,prov_b,prov_b@example.com,pw,Sales\n')
+    assert (summary['created'], summary['skipped']) == (1, 2)
+    assert 'line 2: username or email already exists (emp1)' in summary['errors']
+    assert User.query.filter_by(username='prov_b').count() == 1
+
+def test_case_differences_are_separate_accounts(provision):
+    # Login and the unique constraints are case-sensitive, so the importer is too
+    summary = provision('Upper,PROV_G,PROV_G@example.com,pw,Sales\n', 'Lower,prov_g,prov_g@example.com,pw,Sales\n')
+    assert (summary['created'], summary['skipped']) == (2, 0)
+
+def test_duplicates_within_the_file_keep_the_first(provision):
+    summary = provision('First,prov_c,prov_c@example.com,pw,Sales\n',
+                        'Second,prov_c,other@example.com,pw,Sales\n')
+    assert (summary['created'], summary['skipped']) == (1, 1)
+    assert summary['errors'] == ['line 3: duplicate username or email in file (prov_c)']
+
+def test_concurrent_insert_is_reported_per_row(provision, monkeypatch):
+    hash_passwords = provisioning.hash_passwords
+
+    def hash_while_someone_else_inserts(passwords, method):
+        # Runs between the duplicate lookup and the INSERT
+        db.session.add(User(username='prov_e', password='x', role='employee', name='Concurrent',
+                            email='concurrent@example.com'))
+        db.session.commit()
+        return hash_passwords(passwords, method)
+
+    monkeypatch.setattr(provisioning, 'hash_passwords', hash_while_someone_else_inserts)
+    summary = provision('Kept,prov_d,prov_d@example.com,pw,Sales\n',
+                        'Raced,prov_e,prov_e@example.com,pw,Sales\n',
+                        'Kept too,prov_f,prov_f@example.com,pw,Sales\n')
+    assert (summary['created'], summary['skipped']) == (2, 1)
+    assert summary['errors'] == ['line 3: username or email already exists (prov_e)']
+    assert {name for name, in db.session.query(User.username).filter(User.username.like('prov%'))} == \
+        {'prov_d', 'prov_e', 'prov_f'}
@@ -0,0 +1,396 @@
+# tests/test_query_budgets.py - SQL statement and wall-clock budgets per route and SocketIO event
+#
+# Each budget is (fixed statements, statements per seeded employee), so a
+# route that is set-based has a per-employee cost of 0 and one that still
+# loops over users says so explicitly. Lower a budget when a route gets
+# cheaper; a failure prints the statements grouped by text.
+#
+#   python -m pytest tests -q
+#   QUERY_BUDGET_USERS=2000 QUERY_BUDGET_TIME_FACTOR=3 python -m pytest tests -q
+import io
+import os
+from datetime import date, timedelta
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from conftest import SEED_USERS
+from extensions import db, socketio
+from models import User, Attendance, Leave, Message, Notification, KioskDevice, Geofence
+from utils.absences import mark_absences
+from utils.dashboard import PANELS
+from utils.kiosk import token_digest
+
+TIME_FACTOR = float(os.environ.get('QUERY_BUDGET_TIME_FACTOR', 1.0))
+# Every budget starts from the same seeded org, whatever ran before it
+pytestmark = pytest.mark.usefixtures('restore_org')
+
+def assert_within_budget(recorder, queries, seconds):
+    fixed, per_user = queries if isinstance(queries, tuple) else (queries, 0)
+    max_queries = fixed + per_user * SEED_USERS
+    max_seconds = seconds * TIME_FACTOR
+    if recorder.count > max_queries:
+        pytest.fail(f"{recorder.count} SQL statements, budget {max_queries}\n{recorder.report()}", pytrace=False)
+    if recorder.elapsed > max_seconds:
+        pytest.fail(f"{recorder.elapsed:.2f} s, budget {max_seconds:.2f} s\n{recorder.report()}", pytrace=False)
+
+def _lookup(app, query):
+    with app.app_context():
+        return query()
+
+def _employee_id(app, username='emp0'):
+    return _lookup(app, lambda: db.session.query(User.id).filter_by(username=username).scalar())
+
+# role, url, queries, seconds
+READ_ROUTES = [
+    ('admin', '/', 1, 0.5),
+    ('admin', '/admin/dashboard', 3, 0.5),
+    ('admin', '/api/dashboard_data', 48, 1.0),
+    ('admin', '/admin/users', 5, 1.0),
+    ('admin', '/admin/reports', 6, 2.0),
+    ('admin', '/admin/reports?report_type=leaves', 6, 1.0),
+    ('admin', '/admin/api/leave_stats?group=department,month&status=approved', 2, 0.5),
+    ('admin', f'/admin/api/analytics?start_date={date.today() - timedelta(days=90)}', 4, 1.5),
+    ('admin', '/admin/user_locations', 3, 1.5),
+    ('admin', '/admin/geocoder_metrics', 2, 0.5),
+    ('admin', '/admin/slow_queries', 3, 0.5),
+    ('admin', '/leaves', (5, 1), 2.0),
+    ('admin', '/team_calendar', 4, 0.5),
+    ('admin', f'/api/team_calendar?start_date={date.today() - timedelta(days=90)}&end_date={date.today()}&limit=2', 2, 0.5),
+    ('employee', '/employee/dashboard', 35, 1.0),
+    ('employee', '/leaves', 5, 0.5),
+    ('employee', '/team_calendar', 3, 0.5),
+    ('employee', '/api/team_calendar', 3, 0.5),
+    ('employee', '/chat', 7, 0.5),
+    ('employee', '/get_chat_users', (3, 2), 3.0),
+    ('employee', '/get_unread_message_count', 3, 0.5),
+    ('employee', '/notifications', 5, 0.5),
+]
+
+@pytest.mark.parametrize('role,url,queries,seconds', READ_ROUTES,
+                         ids=[f"{role}:{url}" for role, url, _, _ in READ_ROUTES])
+def test_read_route_budget(request, record_queries, role, url, queries, seconds):
+    client = request.getfixturevalue(f'{role}_client')
+    with record_queries() as recorder:
+        response = client.get(url)
+    assert response.status_code < 400
+    assert_within_budget(recorder, queries, seconds)
+
+# Statements per admin dashboard panel, each from its own endpoint
+DASHBOARD_PANEL_BUDGETS = {
+    'summary': 5, 'weekly': 2, 'monthly': 2, 'departments': 2, 'departments_today': 2, 'cities': 2,
+    'leave_types': 2, 'roster': 2, 'recent_attendance': 2, 'birthdays': 2, 'late_today': 2,
+}
+
+@pytest.mark.parametrize('panel', list(PANELS))
+def test_dashboard_panel_budget(admin_client, record_queries, panel):
+    with record_queries() as recorder:
+        response = admin_client.get(f'/admin/api/dashboard/{panel}')
+    assert response.status_code == 200
+    assert response.get_json()['success']
+    assert_within_budget(recorder, DASHBOARD_PANEL_BUDGETS[panel], 0.5)
+
+@pytest.mark.parametrize('query', ['zoom=5&bbox=60,5,100,40', 'zoom=16', ''])
+def test_user_locations_geojson_budget(admin_client, record_queries, query):
+    with record_queries() as recorder:
+        response = admin_client.get(f'/admin/api/user_locations.geojson?{query}')
+        body = response.get_json(force=True)  # reads the streamed body inside the recorder
+        response.close()
+    assert response.status_code == 200
+    assert body['type'] == 'FeatureCollection'
+    assert_within_budget(recorder, 2, 1.0)
+
+def test_get_messages_budget(app, employee_client, record_queries):
+    other = _employee_id(app, 'emp1')
+    with record_queries() as recorder:
+        response = employee_client.get(f'/get_messages/{other}')
+    assert response.status_code == 200
+    assert_within_budget(recorder, 3, 0.5)
+
+def test_edit_user_page_budget(app, admin_client, record_queries):
+    uid = _employee_id(app, 'emp1')
+    with record_queries() as recorder:
+        response = admin_client.get(f'/admin/user/{uid}/edit')
+    assert response.status_code == 200
+    assert_within_budget(recorder, 7, 0.5)
+
+def test_edit_attendance_page_budget(app, admin_client, record_queries):
+    att_id = _lookup(app, lambda: db.session.query(Attendance.id).order_by(Attendance.id.desc()).limit(1).scalar())
+    with record_queries() as recorder:
+        response = admin_client.get(f'/admin/edit_attendance/{att_id}')
+    assert response.status_code == 200
+    assert_within_budget(recorder, 6, 0.5)
+
+def test_login_budget(app, record_queries):
+    client = app.test_client()
+    with record_queries() as recorder:
+        response = client.post('/login', data={'username': 'emp2', 'password': 'password'})
+    assert response.status_code == 302
+    assert_within_budget(recorder, 2, 1.0)
+
+def test_login_rehash_budget(app, record_queries):
+    uid = _employee_id(app, 'emp3')
+    with app.app_context():
+        db.session.get(User, uid).password = generate_password_hash('password', 'pbkdf2:sha256:2')
+        db.session.commit()
+    client = app.test_client()
+    with record_queries() as recorder:
+        response = client.post('/login', data={'username': 'emp3', 'password': 'password'})
+    assert response.status_code == 302
+    assert _lookup(app, lambda: db.session.get(User, uid).password).startswith('pbkdf2:sha256:1$')
+    assert_within_budget(recorder, 3, 1.0)
+
+def test_check_in_and_status_budget(app, employee_client, record_queries):
+    with record_queries() as recorder:
+        response = employee_client.post('/mark_attendance', json={
+            'action': 'check_in', 'latitude': '28.6139', 'longitude': '77.2090'
+        })
+    assert response.status_code == 200
+    assert response.get_json()['success']
+    assert_within_budget(recorder, 8, 1.0)
+
+    with record_queries() as recorder:
+        response = employee_client.post('/set_status', json={'status': 'In a meeting'})
+    assert response.status_code == 200
+    assert_within_budget(recorder, 5, 0.5)
+
+def test_apply_leave_budget(employee_client, record_queries):
+    start = date.today() + timedelta(days=200)
+    with record_queries() as recorder:
+        response = employee_client.post('/apply_leave', data={
+            'start_date': start.isoformat(), 'end_date': (start + timedelta(days=1)).isoformat(),
+            'leave_type': 'Casual Leave', 'reason': 'Budget test'
+        })
+    assert response.status_code == 302
+    assert_within_budget(recorder, 8, 1.0)
+
+def test_leave_action_budget(app, admin_client, record_queries):
+    leave_id = _lookup(app, lambda: db.session.query(Leave.id).filter_by(status='pending').limit(1).scalar())
+    with record_queries() as recorder:
+        response = admin_client.post('/admin/leave_action', data={'leave_id': leave_id, 'action': 'approve'})
+    assert response.status_code == 200
+    # Includes the balance check and the first ledger entry of the year: balance snapshot and accrual,
+    # opened in a savepoint
+    assert_within_budget(recorder, 17, 1.0)
+    assert response.json['balance']
+
+def test_edit_attendance_budget(app, admin_client, record_queries):
+    att_id = _lookup(app, lambda: db.session.query(Attendance.id).order_by(Attendance.id).limit(1).scalar())
+    with record_queries() as recorder:
+        response = admin_client.post(f'/admin/edit_attendance/{att_id}', data={
+            'check_in': '09:05', 'check_out': '18:30', 'status': 'present', 'notes': 'Budget test'
+        })
+    assert response.status_code == 302
+    assert_within_budget(recorder, 6, 1.0)
+
+def test_user_admin_budget(app, admin_client, record_queries):
+    with record_queries() as recorder:
+        response = admin_client.post('/admin/users', data={
+            'name': 'Budget User', 'username': 'budget_user', 'password': 'password',
+            'email': 'budget_user@example.com', 'department': 'Engineering'
+        })
+    assert response.status_code == 302
+    assert_within_budget(recorder, 8, 1.0)
+
+    uid = _employee_id(app, 'budget_user')
+    with record_queries() as recorder:
+        response = admin_client.post(f'/admin/user/{uid}/edit', data={
+            'name': 'Budget User', 'email': 'budget_user@example.com', 'department': 'Sales'
+        })
+    assert response.status_code == 302
+    assert_within_budget(recorder, 5, 1.0)
+
+    with record_queries() as recorder:
+        response = admin_client.get(f'/admin/user/{uid}/toggle_status')
+    assert response.status_code == 302
+    assert_within_budget(recorder, 5, 0.5)
+
+def test_shift_change_recompute_budget(app, admin_client, record_queries):
+    uid = _employee_id(app, 'emp2')
+    with record_queries() as recorder:
+        response = admin_client.post(f'/admin/user/{uid}/edit', data={
+            'name': 'Employee 2', 'email': 'emp2@example.com', 'login_time': '10:00', 'logout_time': '18:00'
+        })
+    assert response.status_code == 302
+    # The edit itself, then one user SELECT, one attendance SELECT and one executemany UPDATE
+    assert_within_budget(recorder, 8, 1.0)
+
+    since = date.today() - timedelta(days=app.config['SHIFT_RECOMPUTE_DAYS'])
+    late, overtime = _lookup(app, lambda: db.session.query(
+        db.func.sum(db.cast(Attendance.is_late, db.Integer)),
+        db.func.sum(db.case((Attendance.overtime_hours > 0, 1), else_=0))
+    ).filter(Attendance.user_id == uid, Attendance.check_out.isnot(None), Attendance.date >= since).one())
+    assert not late and overtime
+
+def test_chat_http_budget(app, employee_client, record_queries):
+    other = _employee_id(app, 'emp1')
+    with record_queries() as recorder:
+        response = employee_client.post('/send_message', json={'receiver_id': other, 'message': 'Budget test'})
+    assert response.status_code == 200
+    assert_within_budget(recorder, 6, 0.5)
+
+    with record_queries() as recorder:
+        response = employee_client.post(f'/mark_messages_read/{other}')
+    assert response.status_code == 200
+    assert_within_budget(recorder, 3, 0.5)
+
+def test_notification_routes_budget(app, employee_client, record_queries):
+    uid = _employee_id(app)
+    ids = _lookup(app, lambda: [row[0] for row in db.session.query(Notification.id).filter_by(user_id=uid).limit(3)])
+    cases = [
+        (f'/mark_notification_read/{ids[0]}', None, 4),
+        ('/mark_notifications_read', {'notification_ids': ids[1:]}, 4),
+        ('/mark_all_notifications_read', None, 4),
+        (f'/delete_notification/{ids[0]}', None, 4),
+        ('/delete_notifications', {'notification_ids': ids[1:]}, 5),
+    ]
+    for url, payload, queries in cases:
+        with record_queries() as recorder:
+            response = employee_client.post(url, json=payload) if payload else employee_client.post(url)
+        assert response.status_code == 200, url
+        assert_within_budget(recorder, queries, 0.5)
+
+def test_socket_event_budgets(app, employee_client, record_queries):
+    other = _employee_id(app, 'emp1')
+    with record_queries() as recorder:
+        sio = socketio.test_client(app, flask_test_client=employee_client)
+    assert sio.is_connected()
+    assert_within_budget(recorder, 1, 0.5)
+
+    with record_queries() as recorder:
+        ack = sio.emit('send_message', {'receiver_id': other, 'message': 'Budget test'}, callback=True)
+    assert ack['success']
+    assert_within_budget(recorder, 5, 0.5)
+
+    message_id = _lookup(app, lambda: db.session.query(Message.id).filter_by(receiver_id=_employee_id(app)).limit(1).scalar())
+    notification_id = _lookup(app, lambda: db.session.query(Notification.id).filter_by(user_id=_employee_id(app)).limit(1).scalar())
+    for event_name, payload, queries in [
+        ('mark_messages_read', {'user_id': other}, 2),
+        ('mark_message_read', {'message_id': message_id}, 4),
+        ('mark_notification_read', {'notification_id': notification_id}, 2),
+    ]:
+        with record_queries() as recorder:
+            sio.emit(event_name, payload)
+        assert_within_budget(recorder, queries, 0.5)
+
+    with record_queries() as recorder:
+        sio.disconnect()
+    assert_within_budget(recorder, 1, 0.5)
+
+def test_logout_budget(employee_client, record_queries):
+    with record_queries() as recorder:
+        response = employee_client.get('/logout')
+    assert response.status_code == 302
+    assert_within_budget(recorder, 1, 0.5)
+
+def test_punch_import_budget(app, admin_client, record_queries):
+    day = date.today() - timedelta(days=1)
+    lines = ['employee,timestamp,action,device,lat,lng']
+    for i in range(1, 201):
+        lines.append(f"emp{i},{day.isoformat()}T09:{i % 60:02d}:00,in,T1,28.61,77.20")
+        lines.append(f"emp{i},{day.isoformat()}T18:{i % 60:02d}:00,out,T1,28.61,77.20")
+    body = '\n'.join(lines)
+    with record_queries() as recorder:
+        response = admin_client.post('/api/punches/import', data=body, content_type='text/csv')
+    assert response.status_code == 200
+    assert response.get_json()['accepted'] == 400
+    assert_within_budget(recorder, 6, 1.0)
+
+    with record_queries() as recorder:
+        response = admin_client.post('/api/punches/import', data=body, content_type='text/csv')
+    assert response.get_json()['unchanged'] == 200
+    assert_within_budget(recorder, 5, 1.0)
+
+def test_user_import_budget(admin_client, record_queries):
+    lines = ['name,username,email,password,department']
+    lines += [f"Import User {i},import{i},import{i}@example.com,password,Sales" for i in range(3)]
+    lines.append('Existing,emp1,emp1@example.com,password,Sales')
+    with record_queries() as recorder:
+        response = admin_client.post('/admin/users/import', headers={'Accept': 'application/json'},
+                                     data={'file': (io.BytesIO('\n'.join(lines).encode()), 'users.csv')})
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert (summary['created'], summary['skipped']) == (3, 1)
+    assert_within_budget(recorder, 4, 2.0)
+
+def test_kiosk_badges_budget(app, record_queries):
+    with app.app_context():
+        db.session.add(KioskDevice(name='Budget Gate', token_hash=token_digest('kiosk-token'),
+                                   latitude=28.61, longitude=77.20, city='Delhi', state='Delhi',
+                                   country='India', location='Delhi, Delhi, India'))
+        db.session.commit()
+    day = (date.today() + timedelta(days=1)).isoformat()
+    client, headers = app.test_client(), {'Authorization': 'Bearer kiosk-token'}
+    badges = min(300, SEED_USERS - 1)
+    morning = [{'employee': f"emp{i}", 'timestamp': f"{day}T08:{i % 60:02d}:00"} for i in range(1, badges + 1)]
+    with record_queries() as recorder:
+        response = client.post('/api/kiosk/badges', json={'events': morning}, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['inserted'] == badges
+    assert_within_budget(recorder, 6, 1.0)
+
+    evening = [dict(event, timestamp=event['timestamp'].replace('T08', 'T18')) for event in morning]
+    with record_queries() as recorder:
+        response = client.post('/api/kiosk/badges', json=evening, headers=headers)
+    assert response.get_json()['updated'] == badges
+    assert_within_budget(recorder, 6, 1.0)
+
+    row = _lookup(app, lambda: Attendance.query.filter_by(user_id=_employee_id(app, 'emp1'),
+                                                          date=date.today() + timedelta(days=1)).one())
+    assert (row.check_in.hour, row.check_out.hour, row.city) == (8, 18, 'Delhi')
+    assert client.post('/api/kiosk/badges', json=[], headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+def test_mark_absences_budget(app, record_queries):
+    day = date.today() - timedelta(days=2)
+    with app.app_context():
+        with record_queries() as recorder:
+            inserted = mark_absences(day)['inserted']
+        # One INSERT ... SELECT of the missing rows, one UPDATE of the changed ones
+        assert_within_budget(recorder, 2, 1.0)
+        missing = db.session.query(User.id).filter(
+            User.role == 'employee', User.is_active == True, User.created_at < day,
+            ~db.session.query(Attendance.id).filter(Attendance.user_id == User.id, Attendance.date == day).exists()
+        ).count()
+        statuses = dict(db.session.query(Attendance.status, db.func.count()).filter(
+            Attendance.date == day, Attendance.check_in.is_(None)).group_by(Attendance.status).all())
+        assert missing == 0 and inserted == sum(statuses.values())
+        assert mark_absences(day) == {'inserted': 0, 'updated': 0}
+
+def test_geofence_budget(app, admin_client, record_queries):
+    with record_queries() as recorder:
+        response = admin_client.post('/admin/geofences', data={
+            'name': 'Budget Office', 'kind': 'radius', 'latitude': '28.61', 'longitude': '77.20', 'radius_m': '200'
+        })
+    assert response.status_code == 302
+    assert_within_budget(recorder, 4, 0.5)
+    response = admin_client.post('/admin/geofences', data={
+        'name': 'Budget Annex', 'kind': 'polygon', 'polygon': '28.650, 77.250\n28.650, 77.260\n28.660, 77.255'
+    })
+    assert response.status_code == 302
+
+    with record_queries() as recorder:
+        response = admin_client.get('/admin/geofences')
+    assert response.status_code == 200
+    assert_within_budget(recorder, 4, 0.5)
+
+    day = (date.today() + timedelta(days=2)).isoformat()
+    body = '\n'.join(['employee,timestamp,action,device,lat,lng',
+                      f"emp5,{day}T09:00:00,in,T1,28.6105,77.2003",
+                      f"emp6,{day}T09:00:00,in,T1,28.6550,77.2550",
+                      f"emp7,{day}T09:00:00,in,T1,28.6300,77.2000"])
+    assert admin_client.post('/api/punches/import', data=body, content_type='text/csv').get_json()['inserted'] == 3
+    rows = _lookup(app, lambda: {
+        name: (site, on_site, distance) for name, site, on_site, distance in db.session.query(
+            User.username, Geofence.name, Attendance.on_site, Attendance.site_distance_m
+        ).join(Attendance, Attendance.user_id == User.id).join(Geofence, Geofence.id == Attendance.site_id).filter(
+            Attendance.date == date.today() + timedelta(days=2))
+    })
+    assert rows['emp5'] == ('Budget Office', True, 0.0)
+    assert rows['emp6'] == ('Budget Annex', True, 0.0)
+    assert rows['emp7'][:2] == ('Budget Office', False) and 2000 < rows['emp7'][2] < 2100
+
+    with record_queries() as recorder:
+        response = admin_client.get(f'/admin/reports?start_date={day}&end_date={day}&site_status=off')
+    assert response.status_code == 200
+    assert b'Off-site' in response.data
+    assert_within_budget(recorder, 7, 1.0)
@@ -0,0 +1,77 @@
+# tests/test_shifts.py - Shift-derived attendance fields, per punch and recomputed in bulk
+from datetime import date, time, timedelta
+
+import pytest
+
+from extensions import db
+from models import Attendance, User
+from utils.shifts import recompute_attendance, scheduled_hours, shift_metrics
+
+def test_day_shift_metrics():
+    metrics = shift_metrics(time(10, 30), time(13), time(14), time(20), time(9), time(18))
+    assert metrics == {'is_late': True, 'total_hours': 8.5, 'overtime_hours': 2.0, 'extra_work_hours': 0.5}
+
+def test_overnight_shift_wraps_past_midnight():
+    assert scheduled_hours(time(22), time(7)) == 8.0
+    metrics = shift_metrics(time(21, 50), time(2), time(2, 30), time(7, 30), time(22), time(7))
+    assert metrics == {'is_late': False, 'total_hours': pytest.approx(9.1666667),
+                       'overtime_hours': 0.5, 'extra_work_hours': pytest.approx(1.1666667)}
+    # Leaving before midnight is neither negative time nor overtime
+    metrics = shift_metrics(time(22), None, None, time(23, 30), time(22), time(7))
+    assert (metrics['total_hours'], metrics['overtime_hours']) == (1.5, 0.0)
+
+def test_overnight_check_in_after_midnight_is_late():
+    metrics = shift_metrics(time(0, 30), None, None, time(7), time(22), time(6))
+    assert metrics == {'is_late': True, 'total_hours': 6.5, 'overtime_hours': 1.0, 'extra_work_hours': 0.0}
+    assert shift_metrics(time(23, 30), None, None, None, time(22), time(6)) == {'is_late': True}
+    assert shift_metrics(time(21, 30), None, None, None, time(22), time(6)) == {'is_late': False}
+    # The grace period itself runs past midnight
+    assert shift_metrics(time(0, 15), None, None, None, time(23, 30), time(7)) == {'is_late': False}
+    assert shift_metrics(time(0, 45), None, None, None, time(23, 30), time(7)) == {'is_late': True}
+
+def test_lunch_across_midnight():
+    metrics = shift_metrics(time(18), time(23, 30), time(0, 30), time(4), time(18), time(4))
+    assert metrics['total_hours'] == 9.0
+
+def test_recompute_matches_shift_metrics(app, new_employee):
+    punches = [(time(9, 5), time(13), time(14), time(18, 45)), (time(22, 20), time(2), time(2, 30), time(6, 40)),
+               (time(23, 30), None, None, time(5)), (time(0, 30), None, None, time(7)), (time(11), None, None, None)]
+    shifts = {}
+    day_id, _ = new_employee(login_time=time(9), logout_time=time(18))
+    night_id, _ = new_employee(login_time=time(22), logout_time=time(6))
+    with app.app_context():
+        for uid, shift in ((day_id, (time(9), time(18))), (night_id, (time(22), time(6)))):
+            shifts[uid] = shift
+            for offset, (check_in, lunch_start, lunch_end, check_out) in enumerate(punches):
+                db.session.add(Attendance(user_id=uid, date=date.today() - timedelta(days=offset), check_in=check_in,
+                                          lunch_start=lunch_start, lunch_end=lunch_end, check_out=check_out,
+                                          status='present', total_hours=-1.0, overtime_hours=-1.0,
+                                          extra_work_hours=-1.0, is_late=False))
+        db.session.commit()
+
+        summary = recompute_attendance(user_ids=[night_id, day_id], chunk_size=3)
+        # Only the night shift's open 11:00 punch is already right: not late, no hours yet
+        assert summary == {'scanned': 10, 'updated': 9}
+        db.session.expire_all()
+        for row in Attendance.query.filter(Attendance.user_id.in_(shifts)):
+            expected = {'total_hours': -1.0, 'overtime_hours': -1.0, 'extra_work_hours': -1.0}
+            expected.update(shift_metrics(row.check_in, row.lunch_start, row.lunch_end, row.check_out,
+                                          *shifts[row.user_id]))
+            assert {field: getattr(row, field) for field in expected} == pytest.approx(expected)
+        assert recompute_attendance(user_ids=[night_id, day_id]) == {'scanned': 10, 'updated': 0}
+
+def test_shift_edit_recomputes_recent_days_only(app, admin_client, new_employee):
+    uid, _ = new_employee(login_time=time(9), logout_time=time(18))
+    days = app.config['SHIFT_RECOMPUTE_DAYS']
+    with app.app_context():
+        for offset in (0, days, days + 1):
+            db.session.add(Attendance(user_id=uid, date=date.today() - timedelta(days=offset), check_in=time(9, 30),
+                                      status='present', is_late=False))
+        db.session.commit()
+        user = db.session.get(User, uid)
+        form = {'name': user.name, 'email': user.email, 'login_time': '08:00', 'logout_time': '17:00'}
+
+    assert admin_client.post(f'/admin/user/{uid}/edit', data=form).status_code == 302
+    with app.app_context():
+        late = dict(db.session.query(Attendance.date, Attendance.is_late).filter_by(user_id=uid))
+    assert [late[date.today() - timedelta(days=offset)] for offset in (0, days, days + 1)] == [True, True, False]
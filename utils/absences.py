@@ -0,0 +1,76 @@
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import case, insert, literal, select, update
+
+from extensions import db
+from models import User, Attendance, Leave
+
+# Rows written for days without a punch; a later punch turns them into 'present'
+ABSENT, WEEK_OFF, ON_LEAVE = 'absent', 'week-off', 'on-leave'
+NO_PUNCH_STATUSES = (ABSENT, WEEK_OFF, ON_LEAVE)
+COLUMNS = ('user_id', 'date', 'status', 'total_hours', 'is_late', 'overtime_hours', 'extra_work_hours')
+BACKFILL_COMMIT_DAYS = 31
+
+def _status(user_id, week_off, day):
+    """The no-punch status of a user on `day`, as SQL"""
+    on_leave = select(Leave.id).where(
+        Leave.user_id == user_id, Leave.status == 'approved',
+        Leave.start_date <= day, Leave.end_date >= day
+    ).exists()
+    return case((on_leave, ON_LEAVE), (week_off == day.strftime('%A'), WEEK_OFF), else_=ABSENT)
+
+def _insert_absences(day):
+    if day >= date.today():
+        raise ValueError("Only past days can be marked")
+    punched = select(Attendance.id).where(Attendance.user_id == User.id, Attendance.date == day).exists()
+    # created_at is UTC: compare it with the end of the local day in UTC
+    day_end = datetime.combine(day + timedelta(days=1), time()).astimezone(timezone.utc).replace(tzinfo=None)
+    rows = select(
+        User.id, literal(day), _status(User.id, User.week_off, day),
+        literal(0.0), literal(False), literal(0.0), literal(0.0)
+    ).where(
+        User.is_active == True, User.role == 'employee', User.created_at < day_end, ~punched
+    )
+    return db.session.execute(insert(Attendance).from_select(COLUMNS, rows)).rowcount
+
+def _update_absences(day):
+    """Restate rows already marked for `day`, e.g. absent before a leave covering it was approved"""
+    week_off = select(User.week_off).where(User.id == Attendance.user_id).scalar_subquery()
+    status = _status(Attendance.user_id, week_off, day)
+    return db.session.execute(update(Attendance).where(
+        Attendance.date == day, Attendance.check_in.is_(None), Attendance.status.in_(NO_PUNCH_STATUSES),
+        Attendance.status != status
+    ).values(status=status).execution_options(synchronize_session=False)).rowcount
+
+def _mark_day(day):
+    return {'inserted': _insert_absences(day), 'updated': _update_absences(day)}
+
+def mark_absences(day):
+    """
+    Insert an absent, week-off or on-leave row for every active employee with
+    no attendance row on `day`, in one INSERT ... SELECT, and restate the
+    no-punch rows already there whose status changed since, in one UPDATE.
+    Employees created after `day` are skipped. Safe to run again. Returns
+    {'inserted': n, 'updated': n}.
+    """
+    summary = _mark_day(day)
+    db.session.commit()
+    return summary
+
+def backfill_absences(start, end=None):
+    """
+    Mark every day from `start` to `end` (default yesterday): two statements
+    per day, committed every BACKFILL_COMMIT_DAYS days
+    """
+    end = min(end or date.today(), date.today() - timedelta(days=1))
+    summary = {'days': 0, 'inserted': 0, 'updated': 0}
+    day = start
+    while day <= end:
+        for key, count in _mark_day(day).items():
+            summary[key] += count
+        summary['days'] += 1
+        if summary['days'] % BACKFILL_COMMIT_DAYS == 0:
+            db.session.commit()
+        day += timedelta(days=1)
+    db.session.commit()
+    return summary
@@ -0,0 +1,251 @@
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import Integer, String, case, cast, select
+
+from extensions import db
+from models import User, Attendance
+
+# Status codes stored in AttendanceFrame.status; anything else is OTHER
+STATUSES = ('absent', 'present', 'half-day', 'on-leave', 'week-off')
+OTHER = -1
+EPOCH = date(1970, 1, 1)
+
+def time_seconds(texts, dtype=np.float32, fractions=False):
+    """
+    Seconds since midnight for 'HH:MM:SS[.ffffff]' strings (None -> NaN),
+    parsed as fixed-width bytes. Fractional seconds are added with
+    `fractions=True`.
+    """
+    seconds = np.full(len(texts), np.nan, dtype=dtype)
+    present = np.array([text is not None for text in texts], dtype=bool)
+    if present.any():
+        digits = np.array([text[:8] for text in texts if text is not None], dtype='S8')
+        digits = digits.view(np.uint8).reshape(-1, 8).astype(np.int32) - ord('0')
+        whole = (digits[:, 0] * 10 + digits[:, 1]) * 3600 + \
+            (digits[:, 3] * 10 + digits[:, 4]) * 60 + digits[:, 6] * 10 + digits[:, 7]
+        if fractions:
+            whole = whole + np.array([text[8:] or '0' for text in texts if text is not None]).astype(np.float64)
+        seconds[present] = whole
+    return seconds
+
+def _format_seconds(value):
+    if value is None or np.isnan(value):
+        return None
+    value = int(round(float(value)))
+    return f"{value // 3600:02d}:{value % 3600 // 60:02d}"
+
+def _round(value, digits=2):
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+def grouped_percentiles(groups, values, n_groups, percentiles):
+    """
+    Linear-interpolated percentiles of `values` per group, without a Python
+    loop over groups. NaN values are ignored; empty groups give NaN.
+    Returns an array of shape (len(percentiles), n_groups).
+    """
+    keep = ~np.isnan(values)
+    groups, values = groups[keep], values[keep]
+    order = np.lexsort((values, groups))
+    values = values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = np.full((len(percentiles), n_groups), np.nan)
+    filled = counts > 0
+    for row, pct in enumerate(percentiles):
+        position = (counts[filled] - 1) * (pct / 100.0)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, counts[filled] - 1)
+        fraction = position - low
+        base = starts[filled]
+        result[row, filled] = values[base + low] * (1 - fraction) + values[base + high] * fraction
+    return result
+
+def rolling_sum(values, window):
+    """Trailing sum over `window` points (fewer at the start), via cumulative sums"""
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    ends = np.arange(1, len(values) + 1)
+    return sums[ends] - sums[np.maximum(ends - window, 0)]
+
+def _ratio(numerator, denominator, scale=1.0):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(denominator > 0, numerator / denominator * scale, 0.0)
+
+class AttendanceFrame:
+    """
+    Attendance rows as parallel typed arrays: user_id (int32), day (int32
+    days since 1970-01-01), check_in (float32 seconds since midnight, NaN
+    when missing), hours and overtime (float32), status (int8 index into
+    STATUSES), late (bool) and dept (int16 index into `departments`).
+    """
+
+    def __init__(self, user_id, day, check_in, hours, overtime, status, late, dept, departments, start, end):
+        self.user_id = user_id
+        self.day = day
+        self.check_in = check_in
+        self.hours = hours
+        self.overtime = overtime
+        self.status = status
+        self.late = late
+        self.dept = dept
+        self.departments = departments
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return len(self.user_id)
+
+    @classmethod
+    def load(cls, start, end, user_id=None):
+        """
+        One SELECT for the range on the Core connection. Status is coded in
+        SQL and dates/times come back as text parsed in bulk, which skips
+        SQLAlchemy's per-row type conversion; departments are mapped by user.
+        """
+        status_code = case({status: code for code, status in enumerate(STATUSES)},
+                           value=Attendance.status, else_=OTHER)
+        query = select(
+            Attendance.user_id, cast(Attendance.date, String), cast(Attendance.check_in, String),
+            db.func.coalesce(Attendance.total_hours, 0.0), db.func.coalesce(Attendance.overtime_hours, 0.0),
+            status_code, cast(db.func.coalesce(Attendance.is_late, False), Integer)
+        ).where(Attendance.date >= start, Attendance.date <= end)
+        if user_id is not None:
+            query = query.where(Attendance.user_id == user_id)
+        rows = db.session.connection().execute(query).fetchall()
+        user_ids, days, check_ins, hours, overtime, statuses, late = list(zip(*rows)) if rows else [()] * 7
+
+        user_ids = np.array(user_ids, dtype=np.int32)
+        users = db.session.connection().execute(select(User.id, User.department)).fetchall()
+        dept_names = sorted({department or 'General' for _, department in users})
+        lookup = np.zeros(max([uid for uid, _ in users], default=0) + 1, dtype=np.int16)
+        for uid, department in users:
+            lookup[uid] = dept_names.index(department or 'General')
+        return cls(
+            user_id=user_ids,
+            day=np.array(days, dtype='datetime64[D]').astype(np.int64).astype(np.int32),
+            check_in=time_seconds(check_ins),
+            hours=np.array(hours, dtype=np.float32),
+            overtime=np.array(overtime, dtype=np.float32),
+            status=np.array(statuses, dtype=np.int8),
+            late=np.array(late, dtype=bool),
+            dept=lookup[user_ids],
+            departments=dept_names,
+            start=start, end=end
+        )
+
+    def _is(self, status):
+        return self.status == STATUSES.index(status)
+
+    def summary(self):
+        present = self._is('present')
+        return {
+            'records': len(self),
+            'employees': int(np.unique(self.user_id).size),
+            'present_days': int(present.sum()),
+            'absent_days': int(self._is('absent').sum()),
+            'half_days': int(self._is('half-day').sum()),
+            'late_days': int(self.late.sum()),
+            'late_rate': _round(self.late[present].mean() * 100 if present.any() else np.nan, 1),
+            'avg_check_in': _format_seconds(np.nanmean(self.check_in) if np.isfinite(self.check_in).any() else None),
+            'total_overtime': _round(self.overtime.sum()),
+        }
+
+    def by_department(self, percentiles=(50, 90)):
+        """Per-department aggregates with bincount/lexsort instead of per-row Python"""
+        n = len(self.departments)
+        if not n:
+            return []
+        present = self._is('present')
+        records = np.bincount(self.dept, minlength=n)
+        present_days = np.bincount(self.dept, weights=present, minlength=n)
+        late_days = np.bincount(self.dept, weights=self.late & present, minlength=n)
+        worked = self.hours > 0
+        hours_sum = np.bincount(self.dept, weights=np.where(worked, self.hours, 0), minlength=n)
+        worked_days = np.bincount(self.dept, weights=worked, minlength=n)
+        overtime_sum = np.bincount(self.dept, weights=self.overtime, minlength=n)
+        has_check_in = ~np.isnan(self.check_in)
+        check_in_sum = np.bincount(self.dept[has_check_in], weights=self.check_in[has_check_in], minlength=n)
+        check_in_days = np.bincount(self.dept[has_check_in], minlength=n)
+        # Distinct (dept, user) pairs
+        pairs = np.unique(self.dept.astype(np.int64) << 32 | self.user_id.astype(np.int64))
+        employees = np.bincount((pairs >> 32).astype(np.int64), minlength=n)
+        hour_pcts = grouped_percentiles(self.dept, np.where(worked, self.hours, np.nan).astype(np.float64),
+                                        n, percentiles)
+        check_in_pcts = grouped_percentiles(self.dept, self.check_in.astype(np.float64), n, percentiles)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            late_rate = late_days / present_days * 100
+            avg_hours = hours_sum / worked_days
+            avg_check_in = check_in_sum / check_in_days
+        result = []
+        for i, name in enumerate(self.departments):
+            if not records[i]:
+                continue
+            row = {
+                'department': name,
+                'employees': int(employees[i]),
+                'records': int(records[i]),
+                'present_days': int(present_days[i]),
+                'late_rate': _round(late_rate[i], 1),
+                'avg_hours': _round(avg_hours[i]),
+                'avg_check_in': _format_seconds(avg_check_in[i]),
+                'total_overtime': _round(overtime_sum[i]),
+            }
+            for j, pct in enumerate(percentiles):
+                row[f'p{pct}_hours'] = _round(hour_pcts[j, i])
+                row[f'p{pct}_check_in'] = _format_seconds(check_in_pcts[j, i])
+            result.append(row)
+        return result
+
+    def daily(self, window=7):
+        """
+        Per-day present count, late rate and average hours. The rolling
+        series divide `window`-day sums, so days without records (weekends)
+        do not pull them down.
+        """
+        first = (self.start - EPOCH).days
+        n = (self.end - self.start).days + 1
+        offsets = self.day - first
+        present = self._is('present')
+        present_count = np.bincount(offsets, weights=present, minlength=n)[:n]
+        late_count = np.bincount(offsets, weights=self.late & present, minlength=n)[:n]
+        worked = self.hours > 0
+        hours_sum = np.bincount(offsets, weights=np.where(worked, self.hours, 0), minlength=n)[:n]
+        worked_days = np.bincount(offsets, weights=worked, minlength=n)[:n]
+        return {
+            'dates': [(self.start + timedelta(days=i)).isoformat() for i in range(n)],
+            'present': present_count.astype(int).tolist(),
+            'late_rate': np.round(_ratio(late_count, present_count, 100), 1).tolist(),
+            'late_rate_rolling': np.round(_ratio(rolling_sum(late_count, window),
+                                                 rolling_sum(present_count, window), 100), 1).tolist(),
+            'avg_hours': np.round(_ratio(hours_sum, worked_days), 2).tolist(),
+            'avg_hours_rolling': np.round(_ratio(rolling_sum(hours_sum, window),
+                                                 rolling_sum(worked_days, window)), 2).tolist(),
+            'window': window,
+        }
+
+    def overtime_distribution(self, bins=(0, 0.5, 1, 2, 3, 4), percentiles=(50, 90, 99)):
+        """Histogram and percentiles of overtime on days that had any"""
+        overtime = self.overtime[self.overtime > 0].astype(np.float64)
+        edges = np.array(list(bins) + [max(float(overtime.max()) if overtime.size else 0.0, bins[-1]) + 1e-9])
+        counts, _ = np.histogram(overtime, bins=edges)
+        labels = [f"{low:g}-{high:g}h" for low, high in zip(bins[:-1], bins[1:])] + [f"{bins[-1]:g}h+"]
+        return {
+            'days': int(overtime.size),
+            'histogram': dict(zip(labels, counts.astype(int).tolist())),
+            'percentiles': {f'p{pct}': _round(np.percentile(overtime, pct)) if overtime.size else None
+                            for pct in percentiles},
+        }
+
+def attendance_analytics(start, end, user_id=None, window=7):
+    """JSON-ready org (or single employee) analytics for a date range"""
+    frame = AttendanceFrame.load(start, end, user_id)
+    return {
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'summary': frame.summary(),
+        'departments': frame.by_department(),
+        'daily': frame.daily(window),
+        'overtime': frame.overtime_distribution(),
+    }
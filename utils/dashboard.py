@@ -0,0 +1,156 @@
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, case, select
+
+from extensions import db
+from models import User, Attendance, Leave
+from helpers import get_week_dates
+from utils.leave_stats import leave_cube, leave_type_breakdown
+
+_lock = threading.Lock()
+
+def _count_if(condition):
+    return db.func.coalesce(db.func.sum(case((condition, 1), else_=0)), 0)
+
+def _present_by_day(start, end):
+    return dict(db.session.execute(select(Attendance.date, db.func.count(Attendance.id)).where(
+        Attendance.date >= start, Attendance.date <= end, Attendance.status == 'present'
+    ).group_by(Attendance.date)).all())
+
+def summary():
+    """Stat cards: headcount and today's present, on-leave, late and overtime counts, plus pending leaves"""
+    today = date.today()
+    present, late, overtime = db.session.execute(select(
+        _count_if(Attendance.status == 'present'), _count_if(Attendance.is_late == True),
+        _count_if(Attendance.overtime_hours > 0)
+    ).where(Attendance.date == today)).one()
+    on_leave = db.session.execute(select(db.func.count(Leave.id)).where(
+        Leave.start_date <= today, Leave.end_date >= today, Leave.status == 'approved')).scalar()
+    return {
+        'total_users': db.session.execute(select(db.func.count(User.id)).where(User.is_active == True)).scalar(),
+        'present_today': int(present),
+        'on_leave_today': on_leave,
+        'pending_leaves': leave_cube().rollup('status').get('pending', {'count': 0})['count'],
+        'late_arrivals': int(late),
+        'extra_work_today': int(overtime),
+    }
+
+def weekly():
+    """People present on each day of this week"""
+    days = get_week_dates()
+    present = _present_by_day(days[0], days[-1])
+    return {'labels': [day.strftime('%a') for day in days], 'data': [present.get(day, 0) for day in days]}
+
+def monthly():
+    """People present on each day of this month so far"""
+    today = date.today()
+    days = [today.replace(day=1) + timedelta(days=i) for i in range(today.day)]
+    present = _present_by_day(days[0], today)
+    return {'labels': [day.strftime('%d') for day in days], 'data': [present.get(day, 0) for day in days]}
+
+def departments():
+    """Active employees per department"""
+    rows = db.session.execute(select(User.department, db.func.count(User.id)).where(
+        User.is_active == True, User.role == 'employee').group_by(User.department)).all()
+    return {'labels': [name for name, _ in rows], 'data': [count for _, count in rows]}
+
+def departments_today():
+    """People present today per department of the active users"""
+    rows = db.session.execute(select(User.department, db.func.count(Attendance.id)).outerjoin(Attendance, and_(
+        Attendance.user_id == User.id, Attendance.date == date.today(), Attendance.status == 'present'
+    )).where(User.is_active == True).group_by(User.department)).all()
+    return {'labels': [name for name, _ in rows], 'data': [count for _, count in rows]}
+
+def cities():
+    """Today's attendance rows per city"""
+    rows = db.session.execute(select(Attendance.city, db.func.count(Attendance.id)).where(
+        Attendance.date == date.today(), Attendance.city.isnot(None)).group_by(Attendance.city)).all()
+    return {'labels': [city for city, _ in rows], 'data': [count for _, count in rows]}
+
+def leave_types():
+    """Leaves per type and status, from the leave cube"""
+    return {'types': leave_type_breakdown(leave_cube())}
+
+def roster():
+    """Every active user with today's attendance, from one outer join"""
+    now = datetime.now().time()
+    rows = db.session.execute(select(
+        User.name, User.department, User.current_status, User.logout_time, Attendance.id, Attendance.status,
+        Attendance.check_in, Attendance.check_out, Attendance.is_late, Attendance.location, Attendance.city
+    ).outerjoin(Attendance, and_(Attendance.user_id == User.id, Attendance.date == date.today())).where(
+        User.is_active == True).order_by(User.name)).all()
+    return {'users': [{
+        'name': name, 'department': department, 'current_status': current_status,
+        'attendance_id': attendance_id, 'status': status,
+        'check_in': check_in.strftime('%H:%M') if check_in else None, 'is_late': bool(is_late),
+        'location': location if attendance_id else 'Not available', 'city': city if attendance_id else 'Unknown',
+        'is_working_late': bool(attendance_id and check_out is None and logout_time and now > logout_time),
+    } for (name, department, current_status, logout_time, attendance_id, status, check_in, check_out, is_late,
+           location, city) in rows]}
+
+def recent_attendance(limit=15):
+    """The latest rows of the past week"""
+    rows = db.session.execute(select(
+        User.name, Attendance.date, Attendance.check_in, Attendance.city, Attendance.status
+    ).join(User, User.id == Attendance.user_id).where(Attendance.date >= date.today() - timedelta(days=7)).order_by(
+        Attendance.date.desc(), Attendance.check_in.desc()).limit(limit)).all()
+    return {'rows': [{'name': name, 'date': day.isoformat(), 'check_in': check_in.strftime('%H:%M') if check_in else None,
+                      'city': city, 'status': status} for name, day, check_in, city, status in rows]}
+
+def birthdays():
+    today = date.today()
+    rows = db.session.execute(select(User.name, User.department).where(
+        db.extract('month', User.date_of_birth) == today.month, db.extract('day', User.date_of_birth) == today.day,
+        User.is_active == True)).all()
+    return {'users': [{'name': name, 'department': department} for name, department in rows]}
+
+def late_today():
+    rows = db.session.execute(select(User.name, Attendance.check_in, Attendance.city).join(
+        User, User.id == Attendance.user_id).where(Attendance.date == date.today(), Attendance.is_late == True
+    ).order_by(Attendance.check_in)).all()
+    return {'rows': [{'name': name, 'check_in': check_in.strftime('%H:%M') if check_in else None, 'city': city}
+                     for name, check_in, city in rows]}
+
+# Each panel is served from /admin/api/dashboard/<name> with its own endpoint
+PANELS = {
+    'summary': summary, 'weekly': weekly, 'monthly': monthly, 'departments': departments,
+    'departments_today': departments_today, 'cities': cities, 'leave_types': leave_types, 'roster': roster,
+    'recent_attendance': recent_attendance, 'birthdays': birthdays, 'late_today': late_today,
+}
+
+def _cache_state():
+    return current_app.extensions.setdefault('dashboard_panels', {'generation': 0, 'panels': {}})
+
+def panel_data(name):
+    """
+    A panel's data, built at most once per DASHBOARD_CACHE_TTL seconds and
+    shared by every admin. A build that overlaps an invalidation is returned
+    but not kept, so the cache never holds data older than a sent delta.
+    """
+    ttl = current_app.config['DASHBOARD_CACHE_TTL']
+    state = _cache_state()
+    with _lock:
+        cached = state['panels'].get(name)
+        generation = state['generation']
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    data = PANELS[name]()
+    if ttl:
+        with _lock:
+            if state['generation'] == generation:
+                state['panels'][name] = (time.monotonic() + ttl, data)
+    return data
+
+def invalidate_dashboard():
+    """
+    Drop every cached panel. Called for each live delta pushed to the
+    dashboard: a page loaded afterwards must not start from a snapshot
+    taken before the change it will never receive as a delta.
+    """
+    state = _cache_state()
+    with _lock:
+        state['generation'] += 1
+        state['panels'].clear()
@@ -0,0 +1,189 @@
+import math
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, update
+
+from extensions import db
+from models import Attendance, Geofence
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = EARTH_RADIUS_M * math.pi / 180
+# Index cell size in degrees, about 5.5 km north-south
+GRID_DEGREES = 0.05
+SITE_FIELDS = ('site_id', 'on_site', 'site_distance_m')
+UNCLASSIFIED = dict.fromkeys(SITE_FIELDS)
+RECLASSIFY_CHUNK = 5000
+_lock = threading.Lock()
+
+def parse_polygon(text):
+    """One 'lat, lng' vertex per line -> [[lat, lng], ...]; ValueError when malformed"""
+    ring = [[float(part) for part in line.replace(',', ' ').split()]
+            for line in text.strip().splitlines() if line.strip()]
+    if ring and ring[0] == ring[-1]:
+        ring.pop()  # a closed ring repeats its first vertex
+    if len(ring) < 3 or any(len(point) != 2 for point in ring):
+        raise ValueError("A polygon needs at least three 'lat, lng' lines")
+    if not all(-90 <= lat <= 90 and -180 <= lng <= 180 for lat, lng in ring):
+        raise ValueError("Polygon coordinates are out of range")
+    return ring
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """Great-circle distance in metres"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+def _inside_ring(ring, lat, lng):
+    """Even-odd ray casting along the latitude of the point"""
+    inside = False
+    lat1, lng1 = ring[-1]
+    for lat2, lng2 in ring:
+        if (lat1 > lat) != (lat2 > lat) and lng < (lng2 - lng1) * (lat - lat1) / (lat2 - lat1) + lng1:
+            inside = not inside
+        lat1, lng1 = lat2, lng2
+    return inside
+
+class GeofenceIndex:
+    """
+    Active geofences bucketed by bounding box into a GRID_DEGREES grid, so a
+    point is only tested against the sites sharing its cell. A point inside
+    no site is matched to the nearest site boundary with one vectorised pass
+    over every circle and polygon edge; within `tolerance_m` of it still
+    counts as on-site.
+    """
+
+    def __init__(self, sites, tolerance_m=0.0):
+        self.tolerance_m = tolerance_m
+        self.sites = []  # (id, ring or None, lat, lng, radius_m)
+        self.names = {}
+        self.grid = defaultdict(list)
+        circles, edges = [], []
+        for site in sites:
+            position = len(self.sites)
+            if site.kind == 'polygon':
+                ring = site.ring
+                lats, lngs = [lat for lat, _ in ring], [lng for _, lng in ring]
+                box = (min(lats), min(lngs), max(lats), max(lngs))
+                edges.extend((position, *ring[i - 1], *ring[i]) for i in range(len(ring)))
+            else:
+                ring = None
+                dlat = site.radius_m / METERS_PER_DEGREE
+                dlng = dlat / max(math.cos(math.radians(site.latitude)), 1e-6)
+                box = (site.latitude - dlat, site.longitude - dlng, site.latitude + dlat, site.longitude + dlng)
+                circles.append((position, site.latitude, site.longitude, site.radius_m))
+            self.sites.append((site.id, ring, site.latitude, site.longitude, site.radius_m))
+            self.names[site.id] = site.name
+            for row in range(self._cell(box[0]), self._cell(box[2]) + 1):
+                for column in range(self._cell(box[1]), self._cell(box[3]) + 1):
+                    self.grid[row, column].append(position)
+        # Columns for the vectorised nearest-site pass: circles in radians, and
+        # polygon edges grouped by site so np.minimum.reduceat takes each one's closest
+        circles = np.array(circles, dtype=np.float64).reshape(-1, 4)
+        self.circle_sites = circles[:, 0].astype(int)
+        self.circle_lat, self.circle_lng = np.radians(circles[:, 1]), np.radians(circles[:, 2])
+        self.circle_cos, self.circle_radius = np.cos(self.circle_lat), circles[:, 3]
+        edges = np.array(edges, dtype=np.float64).reshape(-1, 5)
+        self.polygon_sites, self.edge_starts = np.unique(edges[:, 0].astype(int), return_index=True)
+        self.edge_lat1, self.edge_lng1, self.edge_lat2, self.edge_lng2 = edges[:, 1:].T
+
+    @classmethod
+    def load(cls, tolerance_m=0.0):
+        with db.session.no_autoflush:  # may run mid-request, e.g. while a punch's row is pending
+            return cls(Geofence.query.filter_by(is_active=True).order_by(Geofence.id).all(), tolerance_m)
+
+    @staticmethod
+    def _cell(degrees):
+        return math.floor(degrees / GRID_DEGREES)
+
+    def _contains(self, position, lat, lng):
+        _, ring, center_lat, center_lng, radius_m = self.sites[position]
+        if ring is None:
+            return haversine_m(lat, lng, center_lat, center_lng) <= radius_m
+        return _inside_ring(ring, lat, lng)
+
+    def _nearest(self, lat, lng):
+        """(site position, metres to its boundary) for a point outside every site"""
+        distances = np.empty(len(self.sites))
+        if len(self.circle_sites):
+            phi, lam = math.radians(lat), math.radians(lng)
+            a = np.sin((self.circle_lat - phi) / 2) ** 2 + \
+                math.cos(phi) * self.circle_cos * np.sin((self.circle_lng - lam) / 2) ** 2
+            distances[self.circle_sites] = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a)) - self.circle_radius
+        if len(self.polygon_sites):
+            # Planar distance to each edge on an equirectangular projection centred on the point
+            kx = METERS_PER_DEGREE * math.cos(math.radians(lat))
+            ax, ay = (self.edge_lng1 - lng) * kx, (self.edge_lat1 - lat) * METERS_PER_DEGREE
+            dx, dy = (self.edge_lng2 - self.edge_lng1) * kx, (self.edge_lat2 - self.edge_lat1) * METERS_PER_DEGREE
+            t = np.clip(-(ax * dx + ay * dy) / np.maximum(dx * dx + dy * dy, 1e-12), 0.0, 1.0)
+            distances[self.polygon_sites] = np.minimum.reduceat(np.hypot(ax + t * dx, ay + t * dy), self.edge_starts)
+        position = int(np.argmin(distances))
+        return position, max(float(distances[position]), 0.0)
+
+    def classify(self, latitude, longitude):
+        """SITE_FIELDS values for a point; all None without sites or valid coordinates"""
+        try:
+            lat, lng = float(latitude), float(longitude)
+        except (TypeError, ValueError):
+            return dict(UNCLASSIFIED)
+        if not self.sites or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return dict(UNCLASSIFIED)
+        for position in self.grid.get((self._cell(lat), self._cell(lng)), ()):
+            if self._contains(position, lat, lng):
+                return {'site_id': self.sites[position][0], 'on_site': True, 'site_distance_m': 0.0}
+        position, distance = self._nearest(lat, lng)
+        return {'site_id': self.sites[position][0], 'on_site': distance <= self.tolerance_m,
+                'site_distance_m': round(distance, 1)}
+
+def geofence_index():
+    """
+    The app's index, reloaded every GEOFENCE_RELOAD_SECONDS so edits made in
+    other worker processes show up, and right after an edit in this one
+    """
+    state = current_app.extensions.setdefault('geofences', {'index': None, 'expires': 0.0})
+    with _lock:
+        if state['index'] is None or state['expires'] <= time.monotonic():
+            state['index'] = GeofenceIndex.load(current_app.config['GEOFENCE_TOLERANCE_M'])
+            state['expires'] = time.monotonic() + current_app.config['GEOFENCE_RELOAD_SECONDS']
+        return state['index']
+
+def invalidate_geofences():
+    state = current_app.extensions.get('geofences')
+    if state:
+        state['index'] = None
+
+def apply_site(attendance, index=None):
+    """Classify an Attendance row's stored check-in coordinates"""
+    for field, value in (index or geofence_index()).classify(attendance.latitude, attendance.longitude).items():
+        setattr(attendance, field, value)
+
+def reclassify_attendance(start=None, end=None):
+    """
+    Re-run the classification for every geolocated row in [start, end], e.g.
+    after sites change; one executemany UPDATE and commit per
+    RECLASSIFY_CHUNK changed rows
+    """
+    index = geofence_index()
+    query = select(Attendance.id, Attendance.latitude, Attendance.longitude, *(
+        getattr(Attendance, field) for field in SITE_FIELDS)).where(Attendance.latitude.isnot(None))
+    if start:
+        query = query.where(Attendance.date >= start)
+    if end:
+        query = query.where(Attendance.date <= end)
+    summary = {'rows': 0, 'updated': 0, 'on_site': 0, 'off_site': 0}
+    changed = []
+    for row in db.session.execute(query).all():
+        values = index.classify(row.latitude, row.longitude)
+        summary['rows'] += 1
+        if values['on_site'] is not None:
+            summary['on_site' if values['on_site'] else 'off_site'] += 1
+        if any(values[field] != getattr(row, field) for field in SITE_FIELDS):
+            changed.append(dict(values, id=row.id))
+    for i in range(0, len(changed), RECLASSIFY_CHUNK):
+        db.session.execute(update(Attendance), changed[i:i + RECLASSIFY_CHUNK])
+        db.session.commit()
+    summary['updated'] = len(changed)
+    return summary
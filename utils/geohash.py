@@ -0,0 +1,57 @@
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Stored on each attendance row: cells of about 4.8 x 4.8 m. Any prefix of
+# it is the enclosing cell, so nearby points share leading characters.
+PRECISION = 9
+
+def parse_coordinates(latitude, longitude):
+    """(lat, lng) as floats, or (None, None) when either is missing, malformed or out of range"""
+    try:
+        lat, lng = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None, None
+    if not (math.isfinite(lat) and math.isfinite(lng) and -90 <= lat <= 90 and -180 <= lng <= 180):
+        return None, None
+    return lat, lng
+
+def encode(lat, lng, precision=PRECISION):
+    """Geohash of a point: alternate longitude/latitude bisections, five bits per character"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        if coordinate >= middle:
+            value = value * 2 + 1
+            interval[0] = middle
+        else:
+            value *= 2
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+def encode_or_none(latitude, longitude, precision=PRECISION):
+    lat, lng = parse_coordinates(latitude, longitude)
+    return None if lat is None else encode(lat, lng, precision)
+
+def prefix_bounds(prefix):
+    """
+    (low, high) with low <= geohash < high for exactly the geohashes
+    starting with `prefix`, so a prefix match is an index range scan; high
+    is None for a prefix of all 'z'
+    """
+    stem = prefix.rstrip('z')
+    if not stem:
+        return prefix, None
+    return prefix, stem[:-1] + BASE32[BASE32.index(stem[-1]) + 1]
+
+def precision_for_zoom(zoom, cells_per_tile=4):
+    """Shortest prefix whose cells are no wider than a 256px map tile / cells_per_tile at `zoom`"""
+    # A prefix of p characters splits longitude into 2 ** ceil(5p / 2) columns
+    columns = 2 ** zoom * cells_per_tile
+    return next((p for p in range(1, PRECISION + 1) if 2 ** math.ceil(5 * p / 2) >= columns), PRECISION)
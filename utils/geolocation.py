@@ -1,6 +1,229 @@
-import requests
+import os
+import threading
+import time
 import logging
-from flask import current_app
+from collections import OrderedDict
+
+NOMINATIM_URL = os.environ.get('NOMINATIM_URL', 'https://nominatim.openstreetmap.org/reverse')
+USER_AGENT = 'AttendancePro System/1.0 (contact@company.com)'
+REQUEST_TIMEOUT = 5  # seconds
+
+# Keep-alive pool shared by every geocoding call in the process. pool_block
+# caps open connections at HTTP_POOL_SIZE, the semaphore caps calls in flight
+# so a slow upstream cannot tie up every worker.
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 10))
+GEOCODER_MAX_CONCURRENCY = int(os.environ.get('GEOCODER_MAX_CONCURRENCY', 4))
+
+_session = None
+_session_lock = threading.Lock()
+_geocoder_slots = threading.BoundedSemaphore(GEOCODER_MAX_CONCURRENCY)
+
+def get_http_session():
+    """
+    Return the process-wide requests session with a bounded keep-alive pool
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # Imported here so workers that never geocode skip the cost
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=HTTP_POOL_SIZE, pool_block=True)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['User-Agent'] = USER_AGENT
+                _session = session
+    return _session
+
+def _fetch_address(lat, lng, timeout):
+    """
+    Single upstream Nominatim call, None on failure or overload
+    """
+    if not _geocoder_slots.acquire(timeout=timeout):
+        logging.warning("Geocoder concurrency limit reached, skipping lookup")
+        return None
+    try:
+        response = get_http_session().get(NOMINATIM_URL, params={
+            'format': 'json', 'lat': lat, 'lon': lng, 'zoom': 10
+        }, timeout=timeout)
+        if response.status_code != 200:
+            return None
+        return response.json().get('address', {})
+    finally:
+        _geocoder_slots.release()
+
+class TokenBucket:
+    """
+    Token bucket rate limiter handing out reservations in FIFO order
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, deadline):
+        """
+        Reserve a token, returns seconds to wait or None if it would miss the deadline
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if now + wait > deadline:
+                return None
+            self._tokens -= 1
+            return wait
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+class GeocodingGateway:
+    """
+    Front door for reverse geocoding.
+
+    Coordinates are snapped to a grid so nearby punches share a key. Recent
+    results are served from a TTL cache, concurrent lookups for the same key
+    wait on a single in-flight request, and upstream calls go through a token
+    bucket (Nominatim allows 1 req/s) with a bounded queue. Every caller has
+    a deadline; past it the lookup gives up and returns None.
+    """
+
+    def __init__(self, fetch, rate=1.0, burst=1, max_queue=50, deadline=5.0,
+                 cache_ttl=600, cache_size=1024, snap_decimals=3):
+        self.fetch = fetch
+        self.bucket = TokenBucket(rate, burst)
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.snap_decimals = snap_decimals
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._cache = OrderedDict()
+        self._queued = 0
+        self._metrics = {
+            'requests': 0,
+            'cache_hits': 0,
+            'coalesced': 0,
+            'queued': 0,
+            'rejected': 0,
+            'timed_out': 0,
+            'upstream_calls': 0,
+            'upstream_errors': 0,
+            'queue_wait_seconds_total': 0.0,
+            'queue_wait_seconds_max': 0.0
+        }
+
+    def snap(self, lat, lng):
+        return (round(float(lat), self.snap_decimals), round(float(lng), self.snap_decimals))
+
+    def lookup(self, lat, lng):
+        """
+        Return the address dict for a coordinate, None on failure or timeout
+        """
+        key = self.snap(lat, lng)
+        deadline = time.monotonic() + self.deadline
+        with self._lock:
+            self._metrics['requests'] += 1
+            cached = self._cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                self._metrics['cache_hits'] += 1
+                return cached[1]
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._metrics['coalesced'] += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                leader = True
+        
+        if not leader:
+            if not flight.done.wait(max(0.0, deadline - time.monotonic())):
+                self._count('timed_out')
+                return None
+            return flight.result
+        
+        try:
+            flight.result = self._call_upstream(key, deadline)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+                if flight.result is not None:
+                    self._cache[key] = (time.monotonic() + self.cache_ttl, flight.result)
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            flight.done.set()
+        return flight.result
+
+    def _call_upstream(self, key, deadline):
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._metrics['rejected'] += 1
+                return None
+            self._queued += 1
+            self._metrics['queued'] += 1
+        
+        wait = None
+        try:
+            wait = self.bucket.reserve(deadline)
+            if wait is None:
+                self._count('timed_out')
+                return None
+            if wait:
+                time.sleep(wait)
+        finally:
+            with self._lock:
+                self._queued -= 1
+                self._metrics['queue_wait_seconds_total'] += wait or 0.0
+                self._metrics['queue_wait_seconds_max'] = max(self._metrics['queue_wait_seconds_max'], wait or 0.0)
+        
+        self._count('upstream_calls')
+        try:
+            result = self.fetch(key[0], key[1], min(REQUEST_TIMEOUT, max(0.1, deadline - time.monotonic())))
+        except Exception:
+            # e.g. connection refused or bad JSON during an upstream outage
+            self._count('upstream_errors')
+            raise
+        if result is None:
+            self._count('upstream_errors')
+        return result
+
+    def _count(self, name):
+        with self._lock:
+            self._metrics[name] += 1
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['queue_depth'] = self._queued
+            metrics['in_flight'] = len(self._flights)
+            metrics['cache_entries'] = len(self._cache)
+        return metrics
+
+geocoder = GeocodingGateway(
+    _fetch_address,
+    rate=float(os.environ.get('GEOCODER_RATE', 1.0)),
+    burst=int(os.environ.get('GEOCODER_BURST', 1)),
+    max_queue=int(os.environ.get('GEOCODER_MAX_QUEUE', 50)),
+    deadline=float(os.environ.get('GEOCODER_DEADLINE', REQUEST_TIMEOUT)),
+    cache_ttl=int(os.environ.get('GEOCODER_CACHE_TTL', 600))
+)
+
+def reverse_geocode(lat, lng):
+    """
+    Look up the Nominatim address for a coordinate through the shared gateway
+    """
+    return geocoder.lookup(lat, lng)
 
 def get_city_from_coords(lat, lng):
     """
@@ -10,16 +233,8 @@ def get_city_from_coords(lat, lng):
         if not lat or not lng:
             return "Location not available"
         
-        url = f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={lng}&zoom=10"
-        headers = {
-            'User-Agent': 'AttendancePro System/1.0 (contact@company.com)'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            address = data.get('address', {})
-            
+        address = reverse_geocode(lat, lng)
+        if address is not None:
             city = address.get('city') or address.get('town') or address.get('village') or address.get('county')
             state = address.get('state')
             country = address.get('country')
@@ -47,16 +262,8 @@ def get_location_details(lat, lng):
         if not lat or not lng:
             return {"city": "Unknown", "state": "Unknown", "country": "Unknown"}
         
-        url = f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={lng}&zoom=10"
-        headers = {
-            'User-Agent': 'AttendancePro System/1.0 (contact@company.com)'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            address = data.get('address', {})
-            
+        address = reverse_geocode(lat, lng)
+        if address is not None:
             return {
                 "city": address.get('city') or address.get('town') or address.get('village') or address.get('county') or "Unknown",
                 "state": address.get('state') or "Unknown",
@@ -66,4 +273,4 @@ def get_location_details(lat, lng):
             return {"city": "Unknown", "state": "Unknown", "country": "Unknown"}
     except Exception as e:
         logging.error(f"Detailed geocoding error: {str(e)}")
-        return {"city": "Unknown", "state": "Unknown", "country": "Unknown"}
\ No newline at end of file
+        return {"city": "Unknown", "state": "Unknown", "country": "Unknown"}
@@ -0,0 +1,135 @@
+import os
+import logging
+import threading
+import multiprocessing
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Worker processes are spawned, not forked, so they do not inherit the
+# server's threads, sockets or database connections. This module only
+# imports werkzeug so a worker starts quickly. A spawned worker also re-imports
+# the server's main script, so that script must not start the app, schedulers
+# or this pool at import (see wsgi.py); the pool itself starts on the first
+# submitted hash.
+HASH_WORKERS = int(os.environ.get('HASH_WORKERS') or os.cpu_count() or 1)
+INLINE_BELOW = 8  # smaller bulk batches are hashed in-process
+
+logger = logging.getLogger(__name__)
+
+class HashPoolBusy(Exception):
+    """Raised when a bounded pool already has its maximum of pending jobs"""
+
+class HashPool:
+    """
+    Process pool started on first use. With max_pending set, submit()
+    refuses work instead of queueing it without limit.
+    """
+
+    def __init__(self, workers, max_pending=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def configure(self, workers, max_pending=None):
+        with self._lock:
+            if (workers, max_pending) != (self.workers, self.max_pending):
+                self.workers, self.max_pending = workers, max_pending
+                self._reset_locked()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def _reset_locked(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def reset(self):
+        with self._lock:
+            self._reset_locked()
+
+    def _done(self, future):
+        with self._lock:
+            self.pending -= 1
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self.max_pending is not None and self.pending >= self.max_pending:
+                raise HashPoolBusy()
+            future = self._get_executor().submit(fn, *args)
+            self.pending += 1
+        future.add_done_callback(self._done)
+        return future
+
+    def warm(self):
+        """Start the worker processes now rather than on the first request"""
+        for future in [self._get_executor().submit(int) for _ in range(self.workers)]:
+            future.result()
+
+    def map(self, fn, *iterables, chunksize=1):
+        with self._lock:
+            executor = self._get_executor()
+        return executor.map(fn, *iterables, chunksize=chunksize)
+
+# Bulk provisioning and logins use separate pools so an import cannot starve sign-ins
+bulk_pool = HashPool(HASH_WORKERS)
+login_pool = HashPool(HASH_WORKERS, max_pending=HASH_WORKERS * 8)
+
+@lru_cache(maxsize=8)
+def method_prefix(method):
+    """Fully parameterised method string a hash made with `method` starts with,
+    e.g. 'scrypt' -> 'scrypt:32768:8:1'"""
+    return generate_password_hash('', method).split('$', 1)[0]
+
+def needs_rehash(pwhash, method):
+    return pwhash.split('$', 1)[0] != method_prefix(method)
+
+def _hash_one(password, method='scrypt'):
+    return generate_password_hash(password, method)
+
+def _verify_one(pwhash, password, method):
+    """(matches, replacement hash when the stored one uses other parameters)"""
+    if not check_password_hash(pwhash, password):
+        return False, None
+    return True, (generate_password_hash(password, method) if needs_rehash(pwhash, method) else None)
+
+def hash_passwords(passwords, method='scrypt'):
+    """Hash a list of passwords across the bulk pool, preserving order"""
+    passwords = list(passwords)
+    if len(passwords) < INLINE_BELOW:
+        return [_hash_one(password, method) for password in passwords]
+    chunksize = max(1, len(passwords) // (bulk_pool.workers * 4))
+    try:
+        return list(bulk_pool.map(_hash_one, passwords, [method] * len(passwords), chunksize=chunksize))
+    except BrokenProcessPool:
+        # A worker died (killed, or the main module cannot be re-imported);
+        # start a fresh pool next time and finish this batch in-process
+        logger.exception("Password hashing pool broke, hashing in-process")
+        bulk_pool.reset()
+        return [_hash_one(password, method) for password in passwords]
+
+def verify_password(pwhash, password, method='scrypt', timeout=None, use_pool=True):
+    """
+    Check a password off the calling thread. Returns (matches, new_hash);
+    new_hash is set when the stored hash should be replaced. Raises
+    HashPoolBusy when too many checks are queued or the check does not
+    finish within `timeout` seconds.
+    """
+    if not use_pool:
+        return _verify_one(pwhash, password, method)
+    future = login_pool.submit(_verify_one, pwhash, password, method)
+    try:
+        return future.result(timeout)
+    except FutureTimeout:
+        raise HashPoolBusy()
+    except BrokenProcessPool:
+        logger.exception("Login hashing pool broke, verifying in-process")
+        login_pool.reset()
+        return _verify_one(pwhash, password, method)
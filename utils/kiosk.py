@@ -0,0 +1,69 @@
+import hashlib
+import secrets
+from datetime import datetime
+
+from extensions import db
+from models import KioskDevice
+from utils.geohash import parse_coordinates
+from utils.geolocation import get_location_details
+from utils.punch_import import PunchImporter
+
+MAX_EVENTS = 5000  # per request; a kiosk flushes its queue every few seconds
+
+def token_digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def create_kiosk(name, latitude, longitude, location=None):
+    """
+    Register a kiosk and resolve its location once, so badges never wait on
+    the geocoder. Returns (device, token); only the token's digest is stored.
+    """
+    latitude, longitude = parse_coordinates(latitude, longitude)
+    if latitude is None:
+        raise ValueError("kiosk coordinates must be a valid latitude and longitude")
+    token = secrets.token_urlsafe(32)
+    details = get_location_details(latitude, longitude)
+    device = KioskDevice(
+        name=name,
+        token_hash=token_digest(token),
+        latitude=latitude,
+        longitude=longitude,
+        city=details['city'],
+        state=details['state'],
+        country=details['country'],
+        location=location or f"{details['city']}, {details['state']}, {details['country']}"
+    )
+    db.session.add(device)
+    db.session.commit()
+    return device, token
+
+def authenticate_kiosk(authorization):
+    """Active kiosk for an `Authorization: Bearer <token>` header, or None"""
+    if not authorization or not authorization.startswith('Bearer '):
+        return None
+    # Tokens are random 256-bit values, so an indexed digest lookup is safe
+    # to compare on and costs one query
+    return KioskDevice.query.filter_by(token_hash=token_digest(authorization[7:].strip()),
+                                       is_active=True).first()
+
+def record_badges(device, events, batch_size=500):
+    """
+    Fold a kiosk's badge events into attendance, one commit per batch. An
+    event is {'employee': username or id, 'timestamp': optional, 'action':
+    optional, default 'badge'}. Returns the PunchImporter summary.
+    """
+    now = datetime.now().isoformat(timespec='seconds')
+    device.last_seen = datetime.utcnow()  # written with the first batch
+    importer = PunchImporter(batch_size, defaults={
+        'latitude': device.latitude, 'longitude': device.longitude, 'device_info': f"Kiosk: {device.name}",
+        'location': device.location, 'city': device.city, 'state': device.state, 'country': device.country
+    })
+    for number, event in enumerate(events, start=1):
+        if not isinstance(event, dict):
+            importer.add(number, {'_error': 'event must be an object'})
+            continue
+        importer.add(number, dict(event, timestamp=event.get('timestamp') or now,
+                                  action=event.get('action') or 'badge'))
+    importer.flush()
+    db.session.commit()  # last_seen when no batch was written
+    return importer.summary
@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy import or_, select
+
+from extensions import db
+from models import User, Leave
+
+CALENDAR_STATUSES = ('approved', 'pending')
+MAX_CALENDAR_DAYS = 366
+
+def overlaps(start, end):
+    """Leaves sharing at least one day with [start, end]; one range predicate the (user_id, dates) index can serve"""
+    return (Leave.start_date <= end) & (Leave.end_date >= start)
+
+def find_conflict(user_id, start, end, statuses=('approved',)):
+    """First of a user's leaves overlapping [start, end], or None"""
+    return Leave.query.filter(Leave.user_id == user_id, Leave.status.in_(statuses), overlaps(start, end)).first()
+
+def _merge(intervals):
+    """Union of (user, first, last) day offsets sorted by user and first day, so a user counts once per day"""
+    merged = []
+    for user, first, last in intervals:
+        if merged and merged[-1][0] == user and first <= merged[-1][2] + 1:
+            if last > merged[-1][2]:
+                merged[-1][2] = last
+        else:
+            merged.append([user, first, last])
+    return merged
+
+class LeaveCalendar:
+    """
+    Leaves overlapping a date range, clipped to it as day offsets. Per-day
+    headcounts come from a sweep over start (+1) and end (-1) events, so any
+    range costs one query and one cumulative sum whatever its length.
+    """
+
+    def __init__(self, start, end, leaves, departments):
+        self.start = start
+        self.end = end
+        self.days = (end - start).days + 1
+        self.leaves = leaves
+        self.departments = departments
+
+    @classmethod
+    def load(cls, start, end, department=None, statuses=CALENDAR_STATUSES):
+        query = select(
+            Leave.id, Leave.user_id, User.name, User.department, Leave.leave_type,
+            Leave.status, Leave.start_date, Leave.end_date
+        ).join(User, User.id == Leave.user_id).where(
+            overlaps(start, end), Leave.status.in_(statuses), User.is_active == True
+        ).order_by(Leave.user_id, Leave.start_date)
+        if department == 'General':
+            query = query.where(or_(User.department == department, User.department.is_(None)))
+        elif department is not None:
+            query = query.where(User.department == department)
+        leaves = [{
+            'id': leave_id, 'user_id': user_id, 'name': name, 'department': dept or 'General',
+            'leave_type': leave_type, 'status': status,
+            'start_date': leave_start.isoformat(), 'end_date': leave_end.isoformat(),
+            'first': max((leave_start - start).days, 0), 'last': min((leave_end - start).days, (end - start).days)
+        } for leave_id, user_id, name, dept, leave_type, status, leave_start, leave_end
+            in db.session.execute(query)]
+        return cls(start, end, leaves, sorted({leave['department'] for leave in leaves}))
+
+    def _sweep(self, statuses, by_department=False):
+        intervals = _merge((leave['user_id'], leave['first'], leave['last'])
+                           for leave in self.leaves if leave['status'] in statuses)
+        dept_of = {leave['user_id']: self.departments.index(leave['department']) for leave in self.leaves}
+        rows = len(self.departments) if by_department else 1
+        events = np.zeros((max(rows, 1), self.days + 1), dtype=np.int32)
+        if intervals:
+            users, firsts, lasts = (np.array(column) for column in zip(*intervals))
+            row = np.array([dept_of[user] for user in users]) if by_department else np.zeros(len(users), dtype=int)
+            np.add.at(events, (row, firsts), 1)
+            np.add.at(events, (row, lasts + 1), -1)
+        counts = np.cumsum(events, axis=1)[:, :self.days]
+        return counts if by_department else counts[0]
+
+    def dates(self):
+        return [(self.start + timedelta(days=i)).isoformat() for i in range(self.days)]
+
+    def headcount(self):
+        """People off each day: approved, pending, and either"""
+        return {
+            'approved': self._sweep(('approved',)).tolist(),
+            'pending': self._sweep(('pending',)).tolist(),
+            'total': self._sweep(CALENDAR_STATUSES).tolist(),
+        }
+
+    def by_department(self):
+        """Per-department people off each day, approved and including pending"""
+        approved = self._sweep(('approved',), by_department=True)
+        total = self._sweep(CALENDAR_STATUSES, by_department=True)
+        return {name: {'approved': approved[i].tolist(), 'total': total[i].tolist()}
+                for i, name in enumerate(self.departments)}
+
+    def over_limit(self, limit, statuses=CALENDAR_STATUSES):
+        """(date, department, off) for every day a department has more than `limit` people off"""
+        counts = self._sweep(statuses, by_department=True)
+        depts, offsets = np.nonzero(counts > limit)
+        return [{'date': (self.start + timedelta(days=int(offset))).isoformat(),
+                 'department': self.departments[dept], 'off': int(counts[dept, offset])}
+                for dept, offset in zip(depts, offsets)]
+
+def leave_calendar(start, end, department=None, include_pending=True, limit=None):
+    """JSON-ready calendar of leaves, headcounts and over-limit days for a range"""
+    statuses = CALENDAR_STATUSES if include_pending else ('approved',)
+    calendar = LeaveCalendar.load(start, end, department, statuses)
+    headcount = calendar.headcount()
+    peak = int(np.argmax(headcount['total'])) if calendar.days else 0
+    return {
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'dates': calendar.dates(),
+        'departments': calendar.departments,
+        'headcount': headcount,
+        'by_department': calendar.by_department(),
+        'peak': {'date': calendar.dates()[peak], 'off': headcount['total'][peak]},
+        'over_limit': calendar.over_limit(limit, statuses) if limit is not None else [],
+        'leaves': [{key: value for key, value in leave.items() if key not in ('first', 'last')}
+                   for leave in calendar.leaves],
+    }
@@ -0,0 +1,155 @@
+from datetime import date, timedelta
+
+from flask import current_app
+from sqlalchemy import case, delete, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import User, Leave, LeaveLedgerEntry, LeaveBalance
+from utils.leave_calendar import overlaps
+
+ACCRUAL, CONSUMPTION, ADJUSTMENT = 'accrual', 'consumption', 'adjustment'
+# Snapshot column each kind of entry moves, and the sign applied to its days
+SNAPSHOT_COLUMNS = {ACCRUAL: ('accrued', 1), CONSUMPTION: ('used', -1), ADJUSTMENT: ('adjusted', 1)}
+
+def entitlements():
+    return current_app.config['LEAVE_ENTITLEMENTS']
+
+def days_by_year(start, end):
+    """Calendar days of [start, end] in each year it touches"""
+    days = {}
+    while start <= end:
+        year_end = min(end, date(start.year, 12, 31))
+        days[start.year] = (year_end - start).days + 1
+        start = year_end + timedelta(days=1)
+    return days
+
+def _snapshot(user_id, leave_type, year):
+    """
+    The balance row, opened with the year's accrual on a user's first entry
+    for the type. The opening is written in a savepoint, so when another
+    decision opened the same row first the insert is dropped and its row is
+    used instead.
+    """
+    lookup = LeaveBalance.query.filter_by(user_id=user_id, leave_type=leave_type, year=year)
+    balance = lookup.first()
+    if balance is None:
+        days = entitlements().get(leave_type, 0.0)
+        try:
+            with db.session.begin_nested():
+                balance = LeaveBalance(user_id=user_id, leave_type=leave_type, year=year, accrued=days, used=0.0,
+                                       adjusted=0.0)
+                db.session.add(balance)
+                db.session.add(LeaveLedgerEntry(user_id=user_id, leave_type=leave_type, year=year, kind=ACCRUAL,
+                                                days=days, note='Annual entitlement'))
+        except IntegrityError:
+            balance = lookup.one()
+    return balance
+
+def post_entry(user_id, leave_type, year, kind, days, leave_id=None, note=None, created_by=None):
+    """
+    Append a ledger entry and move its snapshot column in the same
+    transaction; the caller commits. Existing snapshots are incremented in
+    SQL, so two decisions committed together do not overwrite each other.
+    """
+    balance = _snapshot(user_id, leave_type, year)
+    column, sign = SNAPSHOT_COLUMNS[kind]
+    if balance in db.session.new:
+        setattr(balance, column, getattr(balance, column) + sign * days)
+    else:
+        setattr(balance, column, getattr(LeaveBalance, column) + sign * days)
+    db.session.add(LeaveLedgerEntry(user_id=user_id, leave_type=leave_type, year=year, kind=kind, days=days,
+                                    leave_id=leave_id, note=note, created_by=created_by))
+    return balance
+
+def record_decision(leave, old_status, actor_id=None):
+    """Consume a leave's days when it becomes approved and give them back when an approval is reversed"""
+    if (leave.status == 'approved') == (old_status == 'approved'):
+        return []
+    sign = -1 if leave.status == 'approved' else 1
+    note = 'Leave approved' if sign < 0 else f'Approval reversed ({leave.status})'
+    return [post_entry(leave.user_id, leave.leave_type, year, CONSUMPTION, sign * days, leave.id, note, actor_id)
+            for year, days in days_by_year(leave.start_date, leave.end_date).items()]
+
+def _as_dict(leave_type, balance):
+    if balance is None:
+        entitled = entitlements().get(leave_type, 0.0)
+        return {'leave_type': leave_type, 'entitled': entitled, 'used': 0.0, 'adjusted': 0.0, 'available': entitled}
+    return {'leave_type': leave_type, 'entitled': balance.accrued, 'used': balance.used,
+            'adjusted': balance.adjusted, 'available': balance.available}
+
+def user_balances(user_id, year):
+    """A user's balance per leave type for a year, from the snapshots in one query"""
+    snapshots = {balance.leave_type: balance for balance in LeaveBalance.query.filter_by(user_id=user_id, year=year)}
+    types = list(entitlements()) + sorted(set(snapshots) - set(entitlements()))
+    return [_as_dict(leave_type, snapshots.get(leave_type)) for leave_type in types]
+
+def available_for(leaves):
+    """{leave id: days available of its type in its start year} for a list of leaves, in one query"""
+    if not leaves:
+        return {}
+    snapshots = {
+        (balance.user_id, balance.leave_type, balance.year): balance
+        for balance in LeaveBalance.query.filter(
+            LeaveBalance.user_id.in_({leave.user_id for leave in leaves}),
+            LeaveBalance.year.in_({leave.start_date.year for leave in leaves}))
+    }
+    return {leave.id: _as_dict(leave.leave_type, snapshots.get(
+        (leave.user_id, leave.leave_type, leave.start_date.year)))['available'] for leave in leaves}
+
+def shortfall(leave):
+    """
+    Most days an approval of `leave` would take past what is available of
+    its type in any year it touches, or 0. Types without an entitlement are
+    not limited.
+    """
+    if leave.leave_type not in entitlements():
+        return 0.0
+    needed = days_by_year(leave.start_date, leave.end_date)
+    snapshots = {balance.year: balance for balance in LeaveBalance.query.filter(
+        LeaveBalance.user_id == leave.user_id, LeaveBalance.leave_type == leave.leave_type,
+        LeaveBalance.year.in_(needed))}
+    return max(max(0.0, days - _as_dict(leave.leave_type, snapshots.get(year))['available'])
+               for year, days in needed.items())
+
+def rebuild_balances(year):
+    """
+    Recreate a year's accrual and consumption entries from the entitlements
+    and approved leaves, keeping adjustments, then rebuild its snapshots
+    from the ledger with one GROUP BY. Used to start the ledger on an
+    existing database or after entitlements change.
+    """
+    start, end = date(year, 1, 1), date(year, 12, 31)
+    db.session.execute(delete(LeaveLedgerEntry).where(
+        LeaveLedgerEntry.year == year, LeaveLedgerEntry.kind.in_((ACCRUAL, CONSUMPTION))))
+
+    approved = db.session.execute(select(
+        Leave.id, Leave.user_id, Leave.leave_type, Leave.start_date, Leave.end_date
+    ).where(Leave.status == 'approved', overlaps(start, end))).all()
+    user_ids = {uid for uid, in db.session.query(User.id).filter(User.is_active == True, User.role == 'employee')}
+    user_ids.update(user_id for _, user_id, _, _, _ in approved)
+    entries = [
+        {'user_id': user_id, 'leave_type': leave_type, 'year': year, 'kind': ACCRUAL, 'days': days,
+         'note': 'Annual entitlement'}
+        for user_id in sorted(user_ids) for leave_type, days in entitlements().items()
+    ] + [
+        {'user_id': user_id, 'leave_type': leave_type, 'year': year, 'kind': CONSUMPTION,
+         'days': -float((min(leave_end, end) - max(leave_start, start)).days + 1), 'leave_id': leave_id,
+         'note': 'Leave approved'}
+        for leave_id, user_id, leave_type, leave_start, leave_end in approved
+    ]
+    if entries:
+        db.session.execute(insert(LeaveLedgerEntry), entries)
+
+    db.session.execute(delete(LeaveBalance).where(LeaveBalance.year == year))
+    total = lambda kind, sign: db.func.coalesce(db.func.sum(
+        case((LeaveLedgerEntry.kind == kind, LeaveLedgerEntry.days * sign), else_=0.0)), 0.0)
+    totals = select(
+        LeaveLedgerEntry.user_id, LeaveLedgerEntry.leave_type, LeaveLedgerEntry.year,
+        *(total(kind, sign) for kind, (_, sign) in SNAPSHOT_COLUMNS.items()), db.func.current_timestamp()
+    ).where(LeaveLedgerEntry.year == year).group_by(LeaveLedgerEntry.user_id, LeaveLedgerEntry.leave_type,
+                                                    LeaveLedgerEntry.year)
+    columns = ['user_id', 'leave_type', 'year'] + [column for column, _ in SNAPSHOT_COLUMNS.values()] + ['updated_at']
+    balances = db.session.execute(insert(LeaveBalance).from_select(columns, totals)).rowcount
+    db.session.commit()
+    return {'entries': len(entries), 'balances': balances}
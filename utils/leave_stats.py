@@ -0,0 +1,116 @@
+import calendar
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app, g
+from sqlalchemy import select
+
+from extensions import db
+from models import User, Leave
+
+DIMENSIONS = ('leave_type', 'status', 'month', 'department')
+_lock = threading.Lock()
+
+def _month_days(year, month, end_year, end_month, count, first_days, last_days):
+    """
+    Yield (year, month, days) for a group of `count` leaves that start in
+    one month and end in another (or the same), given the sums of their
+    start and end days of the month
+    """
+    if (year, month) == (end_year, end_month):
+        yield year, month, last_days - first_days + count
+        return
+    yield year, month, count * (calendar.monthrange(year, month)[1] + 1) - first_days
+    year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    while (year, month) != (end_year, end_month):
+        yield year, month, count * calendar.monthrange(year, month)[1]
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    yield year, month, last_days
+
+class LeaveCube:
+    """
+    Leave counts and days by (leave_type, status, month, department), where
+    users without a department are 'General'. A leave counts once, in the
+    'YYYY-MM' it starts in; its days are split over the months they fall
+    in. Built from one GROUP BY; everything else rolls it up.
+    """
+
+    def __init__(self, cells):
+        self.cells = cells  # [(leave_type, status, month, department, count, days)]
+
+    @classmethod
+    def load(cls):
+        year, month = db.extract('year', Leave.start_date), db.extract('month', Leave.start_date)
+        end_year, end_month = db.extract('year', Leave.end_date), db.extract('month', Leave.end_date)
+        department = db.func.coalesce(User.department, 'General')
+        query = select(
+            Leave.leave_type, Leave.status, department, year, month, end_year, end_month, db.func.count(Leave.id),
+            db.func.sum(db.extract('day', Leave.start_date)), db.func.sum(db.extract('day', Leave.end_date))
+        ).join(User, User.id == Leave.user_id).group_by(
+            Leave.leave_type, Leave.status, department, year, month, end_year, end_month)
+        cells = defaultdict(lambda: [0, 0])
+        for leave_type, status, dept, *months, count, first_days, last_days in db.session.execute(query):
+            y, m, end_y, end_m = (int(value) for value in months)
+            cells[leave_type, status, f"{y:04d}-{m:02d}", dept][0] += count
+            for day_y, day_m, days in _month_days(y, m, end_y, end_m, count, int(first_days), int(last_days)):
+                cells[leave_type, status, f"{day_y:04d}-{day_m:02d}", dept][1] += days
+        return cls([key + tuple(total) for key, total in cells.items()])
+
+    def rollup(self, *dimensions, **filters):
+        """
+        {key: {'count': n, 'days': n}} grouped by `dimensions` (key is a
+        tuple, or a plain value for one dimension) over the cells matching
+        `filters`, e.g. rollup('month', department='Sales', status='approved').
+        Filter values may also be a list/tuple/set of accepted values.
+        """
+        positions = [DIMENSIONS.index(dimension) for dimension in dimensions]
+        checks = [(DIMENSIONS.index(dimension), value if isinstance(value, (list, tuple, set)) else (value,))
+                  for dimension, value in filters.items() if value is not None]
+        totals = defaultdict(lambda: {'count': 0, 'days': 0})
+        for cell in self.cells:
+            if all(cell[position] in accepted for position, accepted in checks):
+                key = tuple(cell[position] for position in positions)
+                total = totals[key[0] if len(key) == 1 else key]
+                total['count'] += cell[4]
+                total['days'] += cell[5]
+        return dict(totals)
+
+    def values(self, dimension):
+        position = DIMENSIONS.index(dimension)
+        return sorted({cell[position] for cell in self.cells})
+
+def leave_cube():
+    """
+    The app's cube, rebuilt when older than LEAVE_STATS_TTL seconds or after
+    a leave changes; a request sees one cube however often it asks
+    """
+    if 'leave_cube' in g:
+        return g.leave_cube
+    state = current_app.extensions.setdefault('leave_stats', {'cube': None, 'expires': 0.0})
+    with _lock:
+        if state['cube'] is None or state['expires'] <= time.monotonic():
+            state['cube'] = LeaveCube.load()
+            state['expires'] = time.monotonic() + current_app.config['LEAVE_STATS_TTL']
+        g.leave_cube = state['cube']
+    return g.leave_cube
+
+def invalidate_leave_stats():
+    state = current_app.extensions.get('leave_stats')
+    if state:
+        state['cube'] = None
+    g.pop('leave_cube', None)
+
+def leave_type_breakdown(cube, statuses=('approved', 'pending', 'rejected')):
+    """{leave_type: {status: count}} as the dashboard chart expects"""
+    counts = cube.rollup('leave_type', 'status')
+    return {leave_type: {status: counts.get((leave_type, status), {'count': 0})['count'] for status in statuses}
+            for leave_type in cube.values('leave_type')}
+
+def month_range(start, end):
+    """'YYYY-MM' months from the month of `start` to the month of `end`"""
+    months, year, month = [], start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
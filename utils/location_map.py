@@ -0,0 +1,99 @@
+import json
+
+from sqlalchemy import case, select
+
+from extensions import db
+from models import User, Attendance
+from utils.geohash import precision_for_zoom, prefix_bounds
+
+# Zoom levels above this get individual points; below it points are grouped
+# by geohash prefix, with cells about 1/GRID_CELLS_PER_TILE of a 256px map tile wide
+CLUSTER_MAX_ZOOM = 14
+GRID_CELLS_PER_TILE = 4
+STREAM_BATCH = 1000
+# Rows already geocoded within a cell of this prefix length (about 1.2 x 0.6 km)
+# share their address with new punches in it
+ADDRESS_PRECISION = 6
+
+def parse_bbox(text):
+    """'min_lng,min_lat,max_lng,max_lat' -> tuple of floats; ValueError when malformed"""
+    parts = [float(part) for part in text.split(',')]
+    if len(parts) != 4 or parts[0] > parts[2] or parts[1] > parts[3]:
+        raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat")
+    return tuple(parts)
+
+def _within(query, day, bbox):
+    query = query.where(Attendance.date == day, Attendance.latitude.isnot(None), Attendance.longitude.isnot(None))
+    if bbox:
+        min_lng, min_lat, max_lng, max_lat = bbox
+        query = query.where(Attendance.latitude.between(min_lat, max_lat),
+                            Attendance.longitude.between(min_lng, max_lng))
+    return query
+
+def _point(row):
+    latitude, longitude, user_id, name, username, department, status, location, city, check_in, is_late = row
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [longitude, latitude]},
+        'properties': {
+            'user_id': user_id, 'user_name': name, 'username': username, 'department': department,
+            'status': status, 'location': location, 'city': city,
+            'check_in_time': check_in.strftime('%H:%M') if check_in else None, 'is_late': bool(is_late),
+        },
+    }
+
+def location_points(day, bbox=None):
+    """Point features for each geolocated attendance row, user fields joined in the same streamed SELECT"""
+    query = _within(select(
+        Attendance.latitude, Attendance.longitude, Attendance.user_id, User.name, User.username, User.department,
+        User.current_status, Attendance.location, Attendance.city, Attendance.check_in, Attendance.is_late
+    ).join(User, User.id == Attendance.user_id), day, bbox)
+    result = db.session.connection().execution_options(stream_results=True, yield_per=STREAM_BATCH).execute(query)
+    for row in result:
+        yield _point(row)
+
+def location_clusters(day, zoom, bbox=None):
+    """
+    One feature per occupied geohash cell at the zoom's prefix length: the
+    members' centroid with point_count and late_count, from one GROUP BY
+    over the (date, geohash) index
+    """
+    cell = db.func.substr(Attendance.geohash, 1, precision_for_zoom(zoom, GRID_CELLS_PER_TILE))
+    query = _within(select(
+        cell, db.func.count(), db.func.avg(Attendance.latitude), db.func.avg(Attendance.longitude),
+        db.func.sum(case((Attendance.is_late == True, 1), else_=0))
+    ).where(Attendance.geohash.isnot(None)), day, bbox).group_by(cell)
+    return [{
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [round(lng, 6), round(lat, 6)]},
+        'properties': {'cluster': True, 'cell': key, 'point_count': count, 'late_count': int(late or 0)},
+    } for key, count, lat, lng, late in db.session.connection().execute(query)]
+
+def location_features(day, zoom=None, bbox=None):
+    """Clusters below CLUSTER_MAX_ZOOM, individual points at it and above (or without a zoom)"""
+    if zoom is not None and zoom < CLUSTER_MAX_ZOOM:
+        return location_clusters(day, zoom, bbox)
+    return location_points(day, bbox)
+
+def known_address(geohash):
+    """
+    City, state and country of a row already geocoded in the same
+    ADDRESS_PRECISION cell, or None. An index range scan on geohash, which
+    saves the reverse geocoding call for punches at a known place.
+    """
+    low, high = prefix_bounds(geohash[:ADDRESS_PRECISION])
+    query = select(Attendance.city, Attendance.state, Attendance.country).where(
+        Attendance.geohash >= low, Attendance.city.isnot(None), Attendance.city != 'Unknown'
+    ).order_by(Attendance.geohash).limit(1)
+    if high is not None:
+        query = query.where(Attendance.geohash < high)
+    with db.session.no_autoflush:  # called while the punch's own row is pending
+        row = db.session.execute(query).first()
+    return dict(zip(('city', 'state', 'country'), row)) if row else None
+
+def geojson_chunks(features):
+    """A FeatureCollection as text chunks, so point sets are encoded and sent as they are read"""
+    yield '{"type":"FeatureCollection","features":['
+    for number, feature in enumerate(features):
+        yield (',' if number else '') + json.dumps(feature, separators=(',', ':'))
+    yield ']}'
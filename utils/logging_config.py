@@ -0,0 +1,107 @@
+import os
+import copy
+import json
+import time
+import atexit
+import queue
+import logging
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from flask import g, has_request_context, request, session
+
+LOG_DIR = os.environ.get('LOG_DIR', 'logs')
+LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 10))
+LOG_ROTATE_WHEN = os.environ.get('LOG_ROTATE_WHEN')  # e.g. 'midnight' for daily files
+
+class RequestContextFilter(logging.Filter):
+    """
+    Attach request fields to records while still on the request thread
+    """
+
+    def filter(self, record):
+        if has_request_context():
+            started = g.get('request_started')
+            record.user_id = session.get('user_id')
+            record.method = request.method
+            record.path = request.path
+            record.endpoint = request.endpoint
+            record.duration_ms = round((time.perf_counter() - started) * 1000, 2) if started else None
+        return True
+
+class TracebackQueueHandler(QueueHandler):
+    """
+    QueueHandler that keeps a traceback apart from the message. The stock
+    prepare() folds it into msg and clears exc_info before the record crosses
+    the queue, leaving JsonFormatter nothing to put in 'exception'.
+    """
+
+    def prepare(self, record):
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = logging.Formatter().formatException(record.exc_info)
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None  # tracebacks hold frames, which cannot cross a queue safely
+        record.exc_text = exc_text
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line
+    """
+
+    fields = ('user_id', 'method', 'path', 'endpoint', 'duration_ms')
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno
+        }
+        for field in self.fields:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+def setup_logging(app):
+    """
+    Route app.logger through a queue so file I/O and rotation happen on a
+    background listener thread instead of inside the request.
+    """
+    if not os.path.exists(LOG_DIR):
+        os.makedirs(LOG_DIR)
+
+    path = os.path.join(LOG_DIR, 'attendance.log')
+    if LOG_ROTATE_WHEN:
+        file_handler = TimedRotatingFileHandler(path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT)
+    else:
+        file_handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
+    file_handler.setFormatter(JsonFormatter())
+    file_handler.setLevel(logging.INFO)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = TracebackQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.setLevel(logging.INFO)
+
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    app.logger.addHandler(queue_handler)
+    app.logger.setLevel(logging.INFO)
+    return listener
@@ -0,0 +1,75 @@
+import threading
+from datetime import datetime
+
+
+class PresenceTracker:
+    """
+    In-memory registry of live SocketIO connections per user.
+
+    A user is online while at least one of their tabs holds a connection.
+    last_seen timestamps are buffered here and written to the database in
+    batches by flush_presence() instead of on every connect/disconnect.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._pending_last_seen = {}
+
+    def connect(self, user_id):
+        """Register a connection, returns True if the user just came online"""
+        with self._lock:
+            count = self._connections.get(user_id, 0) + 1
+            self._connections[user_id] = count
+            self._pending_last_seen[user_id] = datetime.utcnow()
+            return count == 1
+
+    def disconnect(self, user_id):
+        """
+        Drop a connection, returns True if the user just went offline. An
+        untracked disconnect (a duplicate, or a socket from before a restart)
+        changes nothing and returns False.
+        """
+        with self._lock:
+            self._pending_last_seen[user_id] = datetime.utcnow()
+            count = self._connections.get(user_id, 0)
+            if count == 0:
+                return False
+            if count > 1:
+                self._connections[user_id] = count - 1
+            else:
+                del self._connections[user_id]
+            return count == 1
+
+    def touch(self, user_id):
+        """Record activity for a user without changing connection state"""
+        with self._lock:
+            self._pending_last_seen[user_id] = datetime.utcnow()
+
+    def is_online(self, user_id):
+        with self._lock:
+            return user_id in self._connections
+
+    def online_user_ids(self):
+        with self._lock:
+            return set(self._connections)
+
+    def last_seen(self, user_id):
+        """Buffered last_seen for a user, None if nothing is pending"""
+        with self._lock:
+            return self._pending_last_seen.get(user_id)
+
+    def drain(self):
+        """Return and clear the buffered last_seen updates"""
+        with self._lock:
+            pending = self._pending_last_seen
+            self._pending_last_seen = {}
+            return pending
+
+    def restore(self, pending):
+        """Put back drained updates that could not be written, keeping any newer timestamp"""
+        with self._lock:
+            for user_id, seen in pending.items():
+                current = self._pending_last_seen.get(user_id)
+                if current is None or seen > current:
+                    self._pending_last_seen[user_id] = seen
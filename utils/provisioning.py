@@ -0,0 +1,120 @@
+import csv
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import User
+from realtime import send_notifications
+from utils.hashing import hash_passwords
+
+COLUMNS = ('name', 'username', 'email', 'password', 'phone', 'role', 'gender', 'date_of_birth',
+           'week_off', 'department', 'designation', 'login_time', 'logout_time')
+REQUIRED = ('name', 'username', 'email', 'password')
+# Form defaults from users_management()
+DEFAULTS = {'role': 'employee', 'gender': 'Other', 'week_off': 'Sunday', 'department': 'General',
+            'designation': 'Employee', 'login_time': '09:00', 'logout_time': '19:00'}
+ROLES = ('employee', 'admin')
+MAX_ERRORS = 50
+LOOKUP_CHUNK = 500
+INSERT_BATCH = 1000
+
+def _parse_row(record):
+    row = {column: (record.get(column) or '').strip() for column in COLUMNS}
+    row['password'] = record.get('password') or ''
+    for column in REQUIRED:
+        if not row[column]:
+            raise ValueError(f"missing {column}")
+    for column, default in DEFAULTS.items():
+        row[column] = row[column] or default
+    if row['role'] not in ROLES:
+        raise ValueError(f"invalid role {row['role']!r}")
+    row['date_of_birth'] = datetime.strptime(row['date_of_birth'], '%Y-%m-%d').date() if row['date_of_birth'] else None
+    row['login_time'] = datetime.strptime(row['login_time'], '%H:%M').time()
+    row['logout_time'] = datetime.strptime(row['logout_time'], '%H:%M').time()
+    return row
+
+def provision_users(stream):
+    """
+    Create users from a CSV text stream with the users_management() form
+    fields as columns. Rows whose username or email already exist (in the
+    database or earlier in the file) are skipped. Must run inside an app
+    context. Usernames and emails are compared exactly, like login and the
+    unique constraints. Returns a summary dict.
+    """
+    summary = {'received': 0, 'created': 0, 'skipped': 0, 'rejected': 0, 'errors': []}
+
+    def error(number, message, key='rejected'):
+        summary[key] += 1
+        if len(summary['errors']) < MAX_ERRORS:
+            summary['errors'].append(f"line {number}: {message}")
+
+    rows, numbers, seen = [], [], set()
+    for number, record in enumerate(csv.DictReader(stream), start=2):
+        summary['received'] += 1
+        try:
+            row = _parse_row(record)
+        except ValueError as e:
+            error(number, str(e))
+            continue
+        keys = {('username', row['username']), ('email', row['email'])}
+        if keys & seen:
+            error(number, f"duplicate username or email in file ({row['username']})", 'skipped')
+            continue
+        seen |= keys
+        rows.append(row)
+        numbers.append(number)
+
+    # One set query per chunk instead of a lookup per row
+    taken = set()
+    usernames = [row['username'] for row in rows]
+    emails = [row['email'] for row in rows]
+    for i in range(0, len(rows), LOOKUP_CHUNK):
+        for username, email in db.session.query(User.username, User.email).filter(
+            User.username.in_(usernames[i:i + LOOKUP_CHUNK]) | User.email.in_(emails[i:i + LOOKUP_CHUNK])
+        ):
+            taken.add(('username', username))
+            taken.add(('email', email))
+    fresh, fresh_numbers = [], []
+    for number, row in zip(numbers, rows):
+        if ('username', row['username']) in taken or ('email', row['email']) in taken:
+            error(number, f"username or email already exists ({row['username']})", 'skipped')
+        else:
+            fresh.append(row)
+            fresh_numbers.append(number)
+    if not fresh:
+        return summary
+
+    hashes = hash_passwords([row['password'] for row in fresh], current_app.config['PASSWORD_HASH_METHOD'])
+    for row, hashed in zip(fresh, hashes):
+        row['password'] = hashed
+
+    def insert(batch):
+        """Insert and commit `batch`, so a failure rolls back only these rows"""
+        try:
+            ids = db.session.execute(db.insert(User).returning(User.id, User.name),
+                                     [dict(row, is_active=True) for row in batch]).all()
+            db.session.commit()
+            return ids
+        except IntegrityError:
+            db.session.rollback()
+            raise
+
+    created = []
+    for i in range(0, len(fresh), INSERT_BATCH):
+        batch = fresh[i:i + INSERT_BATCH]
+        try:
+            created.extend(insert(batch))
+        except IntegrityError:
+            # A user was added concurrently since the lookup; retry the batch row by row
+            for number, row in zip(fresh_numbers[i:i + INSERT_BATCH], batch):
+                try:
+                    created.extend(insert([row]))
+                except IntegrityError:
+                    error(number, f"username or email already exists ({row['username']})", 'skipped')
+    summary['created'] = len(created)
+
+    send_notifications(((uid, "Welcome!", f"Welcome to AttendancePro, {name}!") for uid, name in created),
+                       'welcome', 'high')
+    return summary
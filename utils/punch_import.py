@@ -0,0 +1,258 @@
+import csv
+import json
+from datetime import datetime
+
+from sqlalchemy import insert, update
+
+from extensions import db
+from models import User, Attendance
+from utils.absences import NO_PUNCH_STATUSES
+from utils.geofence import SITE_FIELDS, geofence_index
+from utils.geohash import encode_or_none, parse_coordinates
+from utils.shifts import SHIFT_FIELDS, shift_metrics
+
+ACTIONS = {
+    'check_in': 'check_in', 'in': 'check_in', 'checkin': 'check_in',
+    'check_out': 'check_out', 'out': 'check_out', 'checkout': 'check_out',
+    'lunch_start': 'lunch_start', 'break_in': 'lunch_start',
+    'lunch_end': 'lunch_end', 'break_out': 'lunch_end',
+    'badge': 'badge', 'tap': 'badge',
+}
+# Earliest punch wins for these, latest for the others, so re-uploading a
+# batch (or an overlapping one) always folds to the same row
+EARLIEST = ('check_in', 'lunch_start')
+LATEST = ('check_out', 'lunch_end')
+# A badge is a check-in if it is the first of the day and otherwise moves the
+# check-out; repeat taps within BADGE_DEBOUNCE seconds of the check-in are ignored
+BADGE_DEBOUNCE = 60
+# Filled from the importer's defaults when a row has no value yet
+LOCATION_FIELDS = ('latitude', 'longitude', 'device_info', 'location', 'city', 'state', 'country')
+FIELDS = ('check_in', 'lunch_start', 'lunch_end', 'check_out', 'status') + SHIFT_FIELDS + LOCATION_FIELDS + \
+    ('geohash',) + SITE_FIELDS
+MAX_ERRORS = 50
+USER_CHUNK = 500
+
+def parse_timestamp(value):
+    """ISO 8601 or epoch seconds; aware timestamps are converted to server local time"""
+    value = str(value).strip()
+    try:
+        return datetime.fromtimestamp(float(value))
+    except ValueError:
+        pass
+    stamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if stamp.tzinfo is not None:
+        stamp = stamp.astimezone().replace(tzinfo=None)
+    return stamp
+
+def read_punches(stream, fmt):
+    """Yield (line number, record dict) from a CSV or NDJSON text stream"""
+    if fmt == 'csv':
+        for number, record in enumerate(csv.DictReader(stream), start=2):
+            yield number, record
+    elif fmt == 'ndjson':
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if line:
+                try:
+                    yield number, json.loads(line)
+                except ValueError as e:
+                    yield number, {'_error': f"invalid JSON: {e}"}
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+def detect_format(filename=None, content_type=None):
+    if (content_type or '').split(';')[0].strip() in ('application/x-ndjson', 'application/jsonl', 'application/json') \
+            or (filename or '').endswith(('.ndjson', '.jsonl', '.json')):
+        return 'ndjson'
+    return 'csv'
+
+def _seconds(t):
+    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6
+
+def _fold_badges(values, badges):
+    """Apply a day's badge taps to check_in/check_out in `values`"""
+    taps = set(badges)
+    if values['check_in'] is not None:
+        taps.add(values['check_in'])
+    check_in = min(taps)
+    later = [t for t in taps if _seconds(t) - _seconds(check_in) >= BADGE_DEBOUNCE]
+    values['check_in'] = check_in
+    if later and (values['check_out'] is None or max(later) > values['check_out']):
+        values['check_out'] = max(later)
+
+class PunchImporter:
+    """
+    Folds punches into one Attendance row per (user, day).
+
+    Punches are buffered and applied per batch with one SELECT for the
+    existing rows, one executemany INSERT and one executemany UPDATE.
+    `defaults` fills LOCATION_FIELDS a row does not have yet, e.g. the
+    pre-resolved location of a kiosk. Rows are classified against the
+    geofences loaded when the importer is created.
+    """
+
+    def __init__(self, batch_size=20000, defaults=None):
+        self.batch_size = batch_size
+        self.defaults = {field: value for field, value in (defaults or {}).items()
+                         if field in LOCATION_FIELDS and value not in (None, '')}
+        lat, lng = parse_coordinates(self.defaults.pop('latitude', None), self.defaults.pop('longitude', None))
+        if lat is not None:
+            self.defaults.update(latitude=lat, longitude=lng)
+        self.pending = {}
+        self.buffered = 0
+        self.user_ids = {}
+        self.shifts = {}
+        self.geofences = geofence_index()
+        self.summary = {'received': 0, 'accepted': 0, 'rejected': 0, 'inserted': 0,
+                        'updated': 0, 'unchanged': 0, 'errors': []}
+
+    def _error(self, number, message):
+        self.summary['rejected'] += 1
+        if len(self.summary['errors']) < MAX_ERRORS:
+            self.summary['errors'].append(f"line {number}: {message}")
+
+    def _resolve_users(self, keys):
+        """Map employee keys (username or numeric id) to user ids and shifts, one query per chunk"""
+        missing = [key for key in keys if key not in self.user_ids]
+        for i in range(0, len(missing), USER_CHUNK):
+            chunk = missing[i:i + USER_CHUNK]
+            ids = [int(key) for key in chunk if key.isdigit()]
+            rows = db.session.query(User.id, User.username, User.login_time, User.logout_time).filter(
+                db.or_(User.username.in_(chunk), User.id.in_(ids))
+            ).all()
+            for uid, username, login_time, logout_time in rows:
+                self.user_ids[username] = uid
+                self.user_ids[str(uid)] = uid
+                self.shifts[uid] = (login_time, logout_time)
+            for key in chunk:
+                self.user_ids.setdefault(key, None)
+
+    def add(self, number, record):
+        self.summary['received'] += 1
+        if '_error' in record:
+            return self._error(number, record['_error'])
+        employee = str(record.get('employee') or '').strip()
+        action = ACTIONS.get(str(record.get('action') or '').strip().lower())
+        if not employee:
+            return self._error(number, "missing employee")
+        if not action:
+            return self._error(number, f"unknown action {record.get('action')!r}")
+        try:
+            stamp = parse_timestamp(record.get('timestamp'))
+        except (TypeError, ValueError, OverflowError, OSError):
+            return self._error(number, f"invalid timestamp {record.get('timestamp')!r}")
+
+        day = self.pending.setdefault((employee, stamp.date()), {})
+        punch = stamp.time().replace(microsecond=0)
+        if action == 'badge':
+            day.setdefault('_badges', set()).add(punch)
+        else:
+            current = day.get(action)
+            if current is None or (punch < current if action in EARLIEST else punch > current):
+                day[action] = punch
+        # The check-in's coordinates and device win, otherwise the first punch's
+        lat, lng = parse_coordinates(record.get('lat'), record.get('lng'))
+        if lat is not None and ('latitude' not in day or action == 'check_in'):
+            day['latitude'], day['longitude'] = lat, lng
+        device = record.get('device')
+        if device not in (None, '') and ('device_info' not in day or action == 'check_in'):
+            day['device_info'] = str(device)
+        day.setdefault('_lines', []).append(number)
+        self.summary['accepted'] += 1
+        self.buffered += 1
+        if self.buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        pending, self.pending, self.buffered = self.pending, {}, 0
+        self._resolve_users({employee for employee, _ in pending})
+
+        days = {}
+        for (employee, day), punches in pending.items():
+            uid = self.user_ids.get(employee)
+            if uid is None:
+                for number in punches['_lines']:
+                    self._error(number, f"unknown employee {employee!r}")
+                self.summary['accepted'] -= len(punches['_lines'])
+                continue
+            merged = days.setdefault((uid, day), {})
+            for action in EARLIEST + LATEST:
+                if action in punches:
+                    current = merged.get(action)
+                    if current is None or (punches[action] < current if action in EARLIEST else punches[action] > current):
+                        merged[action] = punches[action]
+            if '_badges' in punches:
+                merged.setdefault('_badges', set()).update(punches['_badges'])
+            for field in ('latitude', 'longitude', 'device_info'):
+                if field in punches:
+                    merged.setdefault(field, punches[field])
+        if not days:
+            return
+
+        columns = [getattr(Attendance, field) for field in FIELDS]
+        existing = {}
+        uids = sorted({uid for uid, _ in days})
+        first, last = min(day for _, day in days), max(day for _, day in days)
+        for i in range(0, len(uids), USER_CHUNK):
+            rows = db.session.query(Attendance.id, Attendance.user_id, Attendance.date, *columns).filter(
+                Attendance.user_id.in_(uids[i:i + USER_CHUNK]),
+                Attendance.date >= first, Attendance.date <= last
+            ).order_by(Attendance.id).all()
+            for row in rows:
+                # Keep the first row if a day was ever recorded twice
+                existing.setdefault((row.user_id, row.date), row)
+
+        inserts, updates = [], []
+        for (uid, day), punches in days.items():
+            row = existing.get((uid, day))
+            values = {field: getattr(row, field) for field in FIELDS} if row else \
+                {field: None for field in FIELDS}
+            for action in EARLIEST:
+                if action in punches and (values[action] is None or punches[action] < values[action]):
+                    values[action] = punches[action]
+            for action in LATEST:
+                if action in punches and (values[action] is None or punches[action] > values[action]):
+                    values[action] = punches[action]
+            if '_badges' in punches:
+                _fold_badges(values, punches['_badges'])
+            for field in LOCATION_FIELDS:
+                if values[field] is None:
+                    values[field] = punches.get(field, self.defaults.get(field))
+            values['geohash'] = encode_or_none(values['latitude'], values['longitude'])
+            values.update(self.geofences.classify(values['latitude'], values['longitude']))
+            if values['status'] in (None,) + NO_PUNCH_STATUSES:
+                values['status'] = 'present'
+            values.update(shift_metrics(values['check_in'], values['lunch_start'], values['lunch_end'],
+                                        values['check_out'], *self.shifts[uid]))
+
+            if row is None:
+                values.update(user_id=uid, date=day)
+                for field in ('total_hours', 'overtime_hours', 'extra_work_hours'):
+                    values[field] = values[field] or 0.0
+                inserts.append(values)
+            elif any(values[field] != getattr(row, field) for field in FIELDS):
+                values['id'] = row.id
+                updates.append(values)
+            else:
+                self.summary['unchanged'] += 1
+
+        if inserts:
+            db.session.execute(insert(Attendance), inserts)
+        if updates:
+            db.session.execute(update(Attendance), updates)
+        db.session.commit()
+        self.summary['inserted'] += len(inserts)
+        self.summary['updated'] += len(updates)
+
+def import_punches(stream, fmt='csv', batch_size=20000):
+    """
+    Ingest a CSV/NDJSON stream of (employee, timestamp, action, device, lat, lng)
+    punches. Must run inside an app context. Returns a summary dict.
+    """
+    importer = PunchImporter(batch_size)
+    for number, record in read_punches(stream, fmt):
+        importer.add(number, record)
+    importer.flush()
+    return importer.summary
@@ -0,0 +1,151 @@
+from datetime import time
+
+import numpy as np
+from sqlalchemy import String, cast, select, update
+
+from extensions import db
+from models import User, Attendance
+from utils.analytics import time_seconds
+
+# With the default 09:00-19:00 shift these reproduce the old fixed rules:
+# late after 10:00, overtime after 19:00, extra work beyond 9 hours
+DEFAULT_LOGIN = time(9, 0)
+DEFAULT_LOGOUT = time(19, 0)
+LATE_GRACE_MINUTES = 60
+LUNCH_ALLOWANCE_HOURS = 1.0
+RECOMPUTE_CHUNK = 5000
+SHIFT_FIELDS = ('total_hours', 'is_late', 'overtime_hours', 'extra_work_hours')
+
+def _seconds(t):
+    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6
+
+def _shift_end(login, logout):
+    # Overnight shifts end the next day
+    return login + (logout - login) % 86400
+
+def _from_shift_start(check_in, login):
+    # Seconds from the shift start to a check-in within 12 hours either
+    # side of it, so 00:30 is 2.5 hours into a 22:00 shift
+    return (check_in - login + 43200) % 86400 - 43200
+
+def scheduled_hours(login_time=None, logout_time=None):
+    """Working hours a shift expects: its length less the lunch allowance"""
+    length = (_seconds(logout_time or DEFAULT_LOGOUT) - _seconds(login_time or DEFAULT_LOGIN)) % 86400
+    return max(0.0, length / 3600 - LUNCH_ALLOWANCE_HOURS)
+
+def shift_metrics(check_in, lunch_start, lunch_end, check_out, login_time=None, logout_time=None):
+    """
+    Shift-derived fields for one day's punches. is_late is always set; the
+    hour fields only once both check-in and check-out exist. The check-in
+    is placed on the shift's day (within 12 hours of its start), and a
+    check-out or lunch end earlier in the day than its start is taken to be
+    the next day, the same way scheduled_hours wraps an overnight shift.
+    """
+    login = _seconds(login_time or DEFAULT_LOGIN)
+    logout = _shift_end(login, _seconds(logout_time or DEFAULT_LOGOUT))
+    start = None if check_in is None else login + _from_shift_start(_seconds(check_in), login)
+    metrics = {'is_late': start is not None and start > login + LATE_GRACE_MINUTES * 60}
+    if check_in is None or check_out is None:
+        return metrics
+    end = start + (_seconds(check_out) - _seconds(check_in)) % 86400
+    total = end - start
+    if lunch_start and lunch_end:
+        total -= (_seconds(lunch_end) - _seconds(lunch_start)) % 86400
+    total_hours = total / 3600
+    metrics.update(
+        total_hours=total_hours,
+        overtime_hours=max(0.0, end - logout) / 3600,
+        extra_work_hours=max(0.0, total_hours - scheduled_hours(login_time, logout_time))
+    )
+    return metrics
+
+def apply_shift(attendance, user):
+    """Set an Attendance row's shift-derived fields from its punches and the user's shift"""
+    for field, value in shift_metrics(attendance.check_in, attendance.lunch_start, attendance.lunch_end,
+                                      attendance.check_out, user.login_time, user.logout_time).items():
+        setattr(attendance, field, value)
+
+def recompute_attendance(user_ids=None, department=None, start=None, end=None, chunk_size=RECOMPUTE_CHUNK):
+    """
+    Rebuild total_hours, is_late, overtime_hours and extra_work_hours under
+    each user's current shift, for some users, a department and/or a date
+    range. Rows are read in id order, `chunk_size` at a time; each chunk is
+    computed with NumPy and its changed rows are written with one
+    executemany UPDATE and a commit. Returns {'scanned': n, 'updated': n}.
+    """
+    criteria = []
+    if user_ids is not None:
+        criteria.append(User.id.in_(list(user_ids)))
+    if department is not None:
+        criteria.append(User.department == department)
+    users = db.session.connection().execute(
+        select(User.id, cast(User.login_time, String), cast(User.logout_time, String)).where(*criteria)
+    ).fetchall()
+    summary = {'scanned': 0, 'updated': 0}
+    if not users:
+        return summary
+
+    # Shift boundaries in user id order; rows find theirs by binary search
+    users = sorted(users)
+    uids, logins, logouts = zip(*users)
+    uids = np.array(uids, dtype=np.int64)
+    login = time_seconds(logins, np.float64, True)
+    login = np.where(np.isnan(login), _seconds(DEFAULT_LOGIN), login)
+    logout = time_seconds(logouts, np.float64, True)
+    logout = _shift_end(login, np.where(np.isnan(logout), _seconds(DEFAULT_LOGOUT), logout))
+    scheduled = np.maximum(0.0, (logout - login) / 3600 - LUNCH_ALLOWANCE_HOURS)
+
+    query = select(
+        Attendance.id, Attendance.user_id,
+        cast(Attendance.check_in, String), cast(Attendance.lunch_start, String),
+        cast(Attendance.lunch_end, String), cast(Attendance.check_out, String),
+        db.func.coalesce(Attendance.total_hours, 0.0), db.func.coalesce(Attendance.is_late, False),
+        db.func.coalesce(Attendance.overtime_hours, 0.0), db.func.coalesce(Attendance.extra_work_hours, 0.0)
+    ).order_by(Attendance.id).limit(chunk_size)
+    if criteria:
+        query = query.where(Attendance.user_id.in_(select(User.id).where(*criteria).scalar_subquery()))
+    if start is not None:
+        query = query.where(Attendance.date >= start)
+    if end is not None:
+        query = query.where(Attendance.date <= end)
+
+    last_id = 0
+    while True:
+        rows = db.session.connection().execute(query.where(Attendance.id > last_id)).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        summary['scanned'] += len(rows)
+        ids, row_users, check_in, lunch_start, lunch_end, check_out, total, late, overtime, extra = zip(*rows)
+        ids = np.array(ids, dtype=np.int64)
+        row_users = np.searchsorted(uids, np.array(row_users, dtype=np.int64))
+        check_in, lunch_start, lunch_end, check_out = (
+            time_seconds(column, np.float64, True) for column in (check_in, lunch_start, lunch_end, check_out))
+        total, overtime, extra = (np.array(column, dtype=np.float64) for column in (total, overtime, extra))
+        late = np.array(late, dtype=bool)
+
+        complete = ~np.isnan(check_in) & ~np.isnan(check_out)
+        lunch = np.where(np.isnan(lunch_start) | np.isnan(lunch_end), 0.0, (lunch_end - lunch_start) % 86400)
+        with np.errstate(invalid='ignore'):
+            start = _from_shift_start(check_in, login[row_users])
+            new_late = start > LATE_GRACE_MINUTES * 60  # False where NaN
+            span = (check_out - check_in) % 86400
+            worked = (span - lunch) / 3600
+            new_total = np.where(complete, worked, total)
+            new_overtime = np.where(
+                complete, np.maximum(0.0, login[row_users] + start + span - logout[row_users]) / 3600, overtime)
+            new_extra = np.where(complete, np.maximum(0.0, worked - scheduled[row_users]), extra)
+
+        changed = (new_late != late) | ~np.isclose(new_total, total, rtol=0, atol=1e-6) | \
+            ~np.isclose(new_overtime, overtime, rtol=0, atol=1e-6) | ~np.isclose(new_extra, extra, rtol=0, atol=1e-6)
+        if changed.any():
+            db.session.execute(update(Attendance), [
+                dict(zip(('id',) + SHIFT_FIELDS, values))
+                for values in zip(ids[changed].tolist(), new_total[changed].tolist(), new_late[changed].tolist(),
+                                  new_overtime[changed].tolist(), new_extra[changed].tolist())
+            ])
+            summary['updated'] += int(changed.sum())
+        db.session.commit()
+        if len(rows) < chunk_size:
+            break
+    return summary
@@ -0,0 +1,187 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from extensions import db
+from models import User, Attendance, Leave, Message, Notification
+from utils.shifts import shift_metrics
+from utils.geohash import encode
+
+DEPARTMENTS = {
+    'Engineering': ['Software Engineer', 'Senior Engineer', 'QA Engineer', 'Tech Lead'],
+    'Sales': ['Sales Executive', 'Account Manager', 'Sales Manager'],
+    'Support': ['Support Engineer', 'Support Lead'],
+    'Finance': ['Accountant', 'Financial Analyst'],
+    'HR': ['HR Executive', 'Recruiter'],
+    'Operations': ['Operations Executive', 'Operations Manager'],
+    'Marketing': ['Marketing Executive', 'Content Writer'],
+}
+DEPARTMENT_WEIGHTS = [35, 15, 15, 8, 6, 13, 8]
+
+# city, state, latitude, longitude
+CITIES = [
+    ('New Delhi', 'Delhi', 28.6139, 77.2090),
+    ('Mumbai', 'Maharashtra', 19.0760, 72.8777),
+    ('Bengaluru', 'Karnataka', 12.9716, 77.5946),
+    ('Pune', 'Maharashtra', 18.5204, 73.8567),
+    ('Hyderabad', 'Telangana', 17.3850, 78.4867),
+    ('Chennai', 'Tamil Nadu', 13.0827, 80.2707),
+    ('Kolkata', 'West Bengal', 22.5726, 88.3639),
+]
+LEAVE_TYPES = ['Sick Leave', 'Vacation', 'Personal Leave', 'Emergency Leave']
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+CHAT_LINES = [
+    'Can you review my PR?', 'Joining the standup in 5', 'Lunch?', 'Sent you the report',
+    'Client call moved to 3 pm', 'Thanks!', 'Which build is on staging?', 'Leaving early today',
+]
+
+def _clock(minutes):
+    minutes = max(0, min(int(minutes), 24 * 60 - 1))
+    return time(minutes // 60, minutes % 60)
+
+def _point(lat, lng):
+    lat, lng = round(lat, 6), round(lng, 6)
+    return {'latitude': lat, 'longitude': lng, 'geohash': encode(lat, lng)}
+
+def _minutes(t):
+    return t.hour * 60 + t.minute
+
+class _Batcher:
+    """Buffers row dicts per model and writes them with executemany INSERTs"""
+
+    def __init__(self, size):
+        self.size = size
+        self.rows = {}
+        self.counts = {}
+
+    def add(self, model, row):
+        rows = self.rows.setdefault(model, [])
+        rows.append(row)
+        if len(rows) >= self.size:
+            self.flush(model)
+
+    def flush(self, model=None):
+        for m in ([model] if model else list(self.rows)):
+            rows = self.rows.get(m)
+            if rows:
+                db.session.execute(insert(m), rows)
+                self.counts[m.__tablename__] = self.counts.get(m.__tablename__, 0) + len(rows)
+                self.rows[m] = []
+
+def generate_org(employees=200, years=1.0, seed=42, end=None, password='password',
+                 password_hash=None, batch_size=5000, username_prefix='emp'):
+    """
+    Create employees with attendance, leaves, chat and notifications covering
+    `years` up to `end` (today by default). Must run inside an app context.
+    Returns the number of rows written per table.
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    start = end - timedelta(days=int(365 * years))
+    password_hash = password_hash or generate_password_hash(password)
+    batch = _Batcher(batch_size)
+
+    departments = rng.choices(list(DEPARTMENTS), weights=DEPARTMENT_WEIGHTS, k=employees)
+    db.session.execute(insert(User), [{
+        'username': f'{username_prefix}{i}', 'password': password_hash, 'role': 'employee',
+        'name': f'Employee {i}', 'email': f'{username_prefix}{i}@example.com',
+        'department': departments[i], 'designation': rng.choice(DEPARTMENTS[departments[i]]),
+        'gender': rng.choice(['Male', 'Female', 'Female', 'Male', 'Other']),
+        'date_of_birth': date(rng.randrange(1970, 2002), rng.randrange(1, 13), rng.randrange(1, 29)),
+        'week_off': 'Saturday' if rng.random() < 0.15 else 'Sunday',
+        'login_time': time(10, 0) if rng.random() < 0.2 else time(9, 0),
+        'logout_time': time(19, 0),
+        'current_status': 'Available', 'is_active': rng.random() > 0.03,
+        'created_at': datetime.combine(start, time(9, 0)), 'last_seen': datetime.combine(end, time(9, 0))
+    } for i in range(employees)])
+    batch.counts['user'] = employees
+
+    staff = db.session.query(User.id, User.week_off, User.login_time, User.logout_time).filter(
+        User.username.in_([f'{username_prefix}{i}' for i in range(employees)])
+    ).order_by(User.id).all()
+    user_ids = [uid for uid, *_ in staff]
+    home_city = {uid: rng.choice(CITIES) for uid in user_ids}
+    admin_id = db.session.query(User.id).filter_by(role='admin').order_by(User.id).limit(1).scalar()
+
+    # Leaves first so approved days can be skipped when punching
+    on_leave = set()
+    for uid in user_ids:
+        day = start + timedelta(days=rng.randrange(60))
+        while day <= end + timedelta(days=45):
+            length = rng.choice([1, 1, 1, 2, 2, 3, 5])
+            leave_end = day + timedelta(days=length - 1)
+            applied = datetime.combine(day - timedelta(days=rng.randrange(2, 20)), _clock(rng.gauss(11 * 60, 90)))
+            status = 'pending' if day > end or rng.random() < 0.05 else ('approved' if rng.random() < 0.85 else 'rejected')
+            batch.add(Leave, {
+                'user_id': uid, 'start_date': day, 'end_date': leave_end,
+                'leave_type': rng.choices(LEAVE_TYPES, weights=[35, 35, 20, 10])[0],
+                'reason': 'Generated leave', 'status': status, 'applied_date': applied,
+                'approved_by': admin_id if status != 'pending' else None,
+                'approved_date': applied + timedelta(days=1) if status != 'pending' else None,
+                'reject_reason': 'Project deadline' if status == 'rejected' else None
+            })
+            if status == 'approved':
+                on_leave.update((uid, leave_end - timedelta(days=n)) for n in range(length))
+            day = leave_end + timedelta(days=rng.randrange(15, 45))
+
+    day = start
+    while day <= end:
+        weekday = WEEKDAYS[day.weekday()]
+        for uid, week_off, login_time, logout_time in staff:
+            if weekday == week_off or (uid, day) in on_leave or rng.random() < 0.03:
+                continue
+            city, state, lat, lng = home_city[uid]
+            shift_start = _minutes(login_time or time(9, 0))
+            check_in = _clock(rng.gauss(shift_start + 5, 15) + (rng.expovariate(1 / 40) if rng.random() < 0.1 else 0))
+            lunch_start = _clock(rng.gauss(13 * 60 + 10, 20))
+            lunch_end = _clock(_minutes(lunch_start) + rng.choice([30, 45, 45, 60]))
+            check_out = None
+            if day < end:
+                overtime = rng.uniform(30, 180) if rng.random() < 0.15 else 0
+                check_out = _clock(_minutes(check_in) + 9 * 60 + rng.gauss(0, 20) + overtime)
+            # Same shift rules mark_attendance() applies to live punches
+            metrics = shift_metrics(check_in, lunch_start, lunch_end, check_out, login_time, logout_time)
+            batch.add(Attendance, {
+                'user_id': uid, 'date': day, 'check_in': check_in,
+                'lunch_start': lunch_start, 'lunch_end': lunch_end, 'check_out': check_out,
+                'location': f"{city}, {state}, India",
+                **_point(lat + rng.uniform(-0.05, 0.05), lng + rng.uniform(-0.05, 0.05)),
+                'city': city, 'state': state, 'country': 'India',
+                'status': 'present', 'total_hours': round(metrics.get('total_hours', 0.0), 2),
+                'is_late': metrics['is_late'], 'overtime_hours': round(metrics.get('overtime_hours', 0.0), 2),
+                'extra_work_hours': round(metrics.get('extra_work_hours', 0.0), 2),
+                'ip_address': f"10.{uid % 256}.0.1", 'device_info': 'Synthetic'
+            })
+        day += timedelta(days=1)
+
+    # Chat mostly stays inside a department
+    by_department = {}
+    for uid, department in zip(user_ids, departments):
+        by_department.setdefault(department, []).append(uid)
+    span_minutes = max(1, (end - start).days) * 24 * 60
+    now = datetime.combine(end, time(18, 0))
+    for uid, department in zip(user_ids, departments):
+        peers = by_department[department] if len(by_department[department]) > 1 else user_ids
+        for _ in range(int(rng.uniform(20, 60) * years)):
+            receiver = rng.choice(peers if rng.random() < 0.8 else user_ids)
+            if receiver == uid:
+                continue
+            sent = now - timedelta(minutes=rng.randrange(span_minutes))
+            batch.add(Message, {
+                'sender_id': uid, 'receiver_id': receiver, 'message': rng.choice(CHAT_LINES),
+                'timestamp': sent, 'is_read': sent < now - timedelta(days=2) or rng.random() < 0.5
+            })
+        for _ in range(int(rng.uniform(10, 30) * years)):
+            created = now - timedelta(minutes=rng.randrange(span_minutes))
+            batch.add(Notification, {
+                'user_id': uid, 'title': rng.choice(['Leave Approved', 'New Message', 'Announcement']),
+                'message': 'Generated notification', 'type': rng.choice(['leave', 'message', 'system']),
+                'priority': 'normal', 'created_at': created,
+                'is_read': created < now - timedelta(days=7) or rng.random() < 0.3
+            })
+
+    batch.flush()
+    db.session.commit()
+    return batch.counts
@@ -0,0 +1,34 @@
+# wsgi.py - Production entry point running on gevent green threads
+#
+# Worker model: one process, one gevent hub. Every HTTP request and SocketIO
+# connection runs in its own greenlet, so a punch waiting on the geocoder or a
+# slow client only parks its greenlet instead of a whole OS thread. Blocking
+# calls (requests, time.sleep, sockets) cooperate through monkey patching.
+# SQLite and password hashing still run on the hub, keep them short.
+#
+# Run with:  gunicorn -k gevent -w 1 --worker-connections 1000 wsgi:app
+#       or:  python wsgi.py
+#
+# Importing this module only builds the app. The startup work (bootstrap) runs
+# below for `python wsgi.py`, and from the post_worker_init hook in
+# gunicorn.conf.py under gunicorn.
+#
+# Use a single worker: SocketIO rooms and the presence registry live in
+# process memory, so scaling out needs sticky sessions and a message queue.
+import os
+
+# The login hashing pool spawns its processes, and each one re-imports this
+# file as its main module (named __mp_main__) before running a hash. They need
+# none of the monkey patching, app, log listener or schedulers.
+if __name__ != '__mp_main__':
+    from gevent import monkey
+    monkey.patch_all()
+
+    from app import create_app, bootstrap
+    from extensions import socketio
+
+    app = create_app()
+
+if __name__ == '__main__':
+    bootstrap(app)
+    socketio.run(app, host=os.environ.get('HOST', '0.0.0.0'), port=int(os.environ.get('PORT', 5000)))